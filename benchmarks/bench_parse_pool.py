@@ -0,0 +1,63 @@
+"""Parse + normalize throughput of ParsePool vs inline, on the offline Douban fixture.
+
+Runs ``--pages`` copies of the fixture through the pool for each worker count
+and prints pages/sec and the speedup over inline parsing on the main thread.
+
+    python benchmarks/bench_parse_pool.py --pages 400 --workers 1 2 4 8
+"""
+import argparse
+import os
+import pathlib
+import sys
+import time
+
+root = pathlib.Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+from crawler_core.config import load_and_validate
+from crawler_core.extractor import Extractor
+from crawler_core.normalizer import Normalizer
+from crawler_core.parse_pool import ParsePool
+from crawler_core.types import Response
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=400)
+    ap.add_argument("--parser", default="lxml")
+    ap.add_argument("--workers", type=int, nargs="*", default=None)
+    args = ap.parse_args()
+    counts = args.workers or sorted({1, 2, os.cpu_count() or 1})
+
+    cfg = load_and_validate(str(root / "configs" / "douban_top250.yml"))
+    cfg["parser"] = args.parser
+    plan = Extractor.compile(cfg)
+    norm = Normalizer.compile(cfg["items"])
+    fixture = root / "offline" / "douban_top250_page1.html"
+    resp = Response(url=fixture.as_uri(), status=200, text=fixture.read_text("utf-8"))
+
+    start = time.perf_counter()
+    for _ in range(args.pages):
+        _, items = Extractor.parse(resp, plan)
+        Normalizer.run_batch(items, norm)
+    inline = args.pages / (time.perf_counter() - start)
+    print(f"{'inline':>8}: {inline:8.1f} pages/s")
+
+    for n in counts:
+        pool = ParsePool(plan, norm, workers=n)
+        try:
+            pool.submit(-1, resp)  # start the workers outside the timed region
+            pool.drain()
+            start = time.perf_counter()
+            for i in range(args.pages):
+                pool.submit(i, resp)
+            pool.drain()
+            rate = args.pages / (time.perf_counter() - start)
+        finally:
+            pool.close()
+        print(f"{n:>8}: {rate:8.1f} pages/s  {rate / inline:4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Pages/sec of Extractor.parse on the offline Douban fixture, per parser backend.
+
+    python benchmarks/bench_parser.py --pages 200
+"""
+import argparse
+import pathlib
+import sys
+import time
+
+root = pathlib.Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+from crawler_core.config import load_and_validate
+from crawler_core.extractor import Extractor
+from crawler_core.types import Response
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=200)
+    args = ap.parse_args()
+
+    cfg = load_and_validate(str(root / "configs" / "douban_top250.yml"))
+    fixture = root / "offline" / "douban_top250_page1.html"
+    resp = Response(url=fixture.as_uri(), status=200, text=fixture.read_text("utf-8"))
+    results = {}
+    for parser in ("bs4", "lxml"):
+        cfg["parser"] = parser
+        plan = Extractor.compile(cfg)
+        _, items = Extractor.parse(resp, plan)
+        start = time.perf_counter()
+        for _ in range(args.pages):
+            Extractor.parse(resp, plan)
+        elapsed = time.perf_counter() - start
+        results[parser] = (args.pages / elapsed, items)
+        print(f"{parser:>5}: {args.pages / elapsed:8.1f} pages/s  {len(items)} items/page")
+    assert results["bs4"][1] == results["lxml"][1], "backends disagree on field values"
+    print(f"speedup: {results['lxml'][0] / results['bs4'][0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
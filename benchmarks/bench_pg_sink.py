@@ -0,0 +1,51 @@
+"""Rows/sec of PgSink on a sqlite file: per-row commits vs batched upserts.
+
+"per-row" reproduces the old behaviour (``batch_size: 1`` with the sqlite
+default rollback journal and ``synchronous=FULL``, i.e. one fsync per row);
+"batched" uses the defaults (500-row ``executemany`` transactions, WAL,
+``synchronous=NORMAL``).
+
+    python benchmarks/bench_pg_sink.py --rows 100000
+"""
+import argparse
+import pathlib
+import sys
+import tempfile
+import time
+
+root = pathlib.Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+from crawler_core.pipelines.pg_sink import PgSink
+
+MODES = {
+    "per-row": {"batch_size": 1, "journal_mode": "delete", "synchronous": "full"},
+    "batched": {},
+}
+
+
+def _rate(db: pathlib.Path, rows: int, opts: dict) -> float:
+    sink = PgSink({"dsn": f"sqlite:///{db}", "table": "t", "upsert_keys": ["id"], **opts})
+    items = [{"id": i, "title": f"title {i}", "score": i % 10} for i in range(rows)]
+    start = time.perf_counter()
+    sink.emit_batch(items)
+    sink.close()
+    return rows / (time.perf_counter() - start)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    args = ap.parse_args()
+
+    rates = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, opts in MODES.items():
+            rates[mode] = _rate(pathlib.Path(tmp) / f"{mode}.db", args.rows, opts)
+            print(f"{mode:>8}: {rates[mode]:10.0f} rows/s  ({args.rows} rows)")
+    print(f"speedup: {rates['batched'] / rates['per-row']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Enqueue/dequeue cost of the Scheduler frontier as the queue grows.
+
+Fills the frontier with ``--urls`` URLs spread over ``--hosts`` hosts and
+reports the mean cost per operation for each slice of ``--step`` URLs. Flat
+numbers from the first slice to the last mean both operations are O(1) in the
+queue size.
+
+    python benchmarks/bench_scheduler.py --urls 1000000
+"""
+import argparse
+import gc
+import pathlib
+import sys
+import time
+
+root = pathlib.Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+from crawler_core.scheduler import Scheduler
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--urls", type=int, default=1_000_000)
+    ap.add_argument("--hosts", type=int, default=1000)
+    ap.add_argument("--step", type=int, default=200_000)
+    args = ap.parse_args()
+
+    # keep the cyclic GC's full-heap scans out of the per-op numbers, as timeit does
+    gc.disable()
+    sched = Scheduler({})
+    urls = [f"http://h{i % args.hosts}.example/p/{i}" for i in range(args.urls)]
+    print(f"{'queued':>10} {'enqueue ns/op':>14}")
+    for lo in range(0, args.urls, args.step):
+        chunk = urls[lo : lo + args.step]
+        start = time.perf_counter()
+        sched.enqueue(chunk)
+        ns = (time.perf_counter() - start) / len(chunk) * 1e9
+        print(f"{lo + len(chunk):>10} {ns:>14.0f}")
+    print(f"{'remaining':>10} {'dequeue ns/op':>14}")
+    while sched.has_next():
+        remaining = len(sched)
+        n = min(args.step, remaining)
+        start = time.perf_counter()
+        for _ in range(n):
+            sched.next()
+        ns = (time.perf_counter() - start) / n * 1e9
+        print(f"{remaining:>10} {ns:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
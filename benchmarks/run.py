@@ -0,0 +1,270 @@
+"""Offline stage-level benchmark suite on pages synthesized from the Douban fixture.
+
+Each ``<li>`` of ``offline/douban_top250_page1.html`` is replicated into pages
+of 1, 100 and 10k list items; the suite measures pages/sec and items/sec for
+``Extractor.parse`` (bs4 and lxml), ``Normalizer.run_batch``, ``Dedupe.seen``,
+``CSVSink``/``PgSink`` and a full ``engine.run`` over ``file://`` URLs.
+
+    python benchmarks/run.py --out bench.json
+    python benchmarks/run.py --save-baseline benchmarks/baseline.json
+    python benchmarks/run.py --baseline benchmarks/baseline.json --tolerance 0.25
+
+With ``--baseline`` every rate that falls more than ``--tolerance`` below the
+stored value is reported as a regression and the run exits with status 1.
+Baselines are machine-specific; record one per machine.
+"""
+
+import argparse
+import json
+import pathlib
+import platform
+import re
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+root = pathlib.Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+from crawler_core import engine, logger
+from crawler_core.config import load_and_validate
+from crawler_core.dedupe import Dedupe
+from crawler_core.extractor import Extractor
+from crawler_core.normalizer import Normalizer
+from crawler_core.pipelines.csv_sink import CSVSink
+from crawler_core.pipelines.pg_sink import PgSink
+from crawler_core.types import Response
+
+FIXTURE = root / "offline" / "douban_top250_page1.html"
+CONFIG = root / "configs" / "douban_top250.yml"
+SIZES = (1, 100, 10_000)
+# a lone "1" in the first <li> is that item's number (rank, id, title suffix)
+_ITEM_NO = re.compile(r"(?<![\d.])1(?![\d.])")
+
+Result = Dict[str, float]
+
+
+def synthetic_page(n_items: int, offset: int = 0) -> str:
+    """Fixture page with ``n_items`` list items numbered from ``offset + 1``."""
+    html = FIXTURE.read_text("utf-8")
+    head, rest = html.split("<li>", 1)
+    first = "<li>" + rest.split("</li>", 1)[0] + "</li>\n"
+    tail = html[html.rindex("</ol>") :]
+    parts = _ITEM_NO.split(first)
+    items = [str(offset + i + 1).join(parts) for i in range(n_items)]
+    return head + "".join(items) + tail
+
+
+def _timed(
+    fn: Callable[[Any], int],
+    min_time: float,
+    setup: Callable[[], Any] = lambda: None,
+    rounds: int = 3,
+) -> Result:
+    """Best of ``rounds`` rates of ``fn(setup())`` (returns items handled).
+
+    Each round calls ``fn`` until ``min_time / rounds`` seconds were spent in
+    it; ``setup`` runs outside the measurement. Taking the best round keeps
+    scheduler noise out of the baseline comparison.
+    """
+    best: Result = {}
+    for _ in range(rounds):
+        calls = items = 0
+        elapsed = 0.0
+        while elapsed < min_time / rounds or calls == 0:
+            arg = setup()
+            start = time.perf_counter()
+            items += fn(arg)
+            elapsed += time.perf_counter() - start
+            calls += 1
+        if not best or calls / elapsed > best["pages_per_s"]:
+            best = {"pages_per_s": calls / elapsed, "items_per_s": items / elapsed}
+    return best
+
+
+def bench_parse(cfg, pages: Dict[int, Response], min_time: float) -> Dict[str, Result]:
+    out = {}
+    for parser in ("bs4", "lxml"):
+        plan = Extractor.compile({**cfg, "parser": parser})
+        for n, resp in pages.items():
+            out[f"parse.{parser}.{n}"] = _timed(
+                lambda _: len(Extractor.parse(resp, plan)[1]), min_time
+            )
+    return out
+
+
+def bench_normalize(cfg, pages, min_time: float) -> Dict[str, Result]:
+    out = {}
+    plan = Extractor.compile({**cfg, "parser": "lxml"})
+    norm = Normalizer.compile(cfg["items"])
+    for n, resp in pages.items():
+        raw = Extractor.parse(resp, plan)[1]
+        out[f"normalize.{n}"] = _timed(
+            lambda items: len(Normalizer.run_batch(items, norm)),
+            min_time,
+            # the ops work in place, so each call gets fresh copies
+            setup=lambda: [dict(it) for it in raw],
+        )
+    return out
+
+
+def _items(n: int) -> List[dict]:
+    return [
+        {
+            "__type__": "DoubanMovie",
+            "detail_url": f"https://movie.douban.com/subject/{i}/",
+            "title": f"Title {i}",
+            "rating": 9.0,
+            "votes": 10000 + i,
+        }
+        for i in range(n)
+    ]
+
+
+def bench_dedupe(cfg, tmp: pathlib.Path, n: int) -> Dict[str, Result]:
+    out = {}
+    for name, path in (("memory", None), ("sqlite", str(tmp / "dedupe.db"))):
+        items = _items(n)
+        d = Dedupe(site="bench", path=path)
+        start = time.perf_counter()
+        for it in items:
+            d.seen(it, cfg["items"])
+        d.flush()
+        elapsed = time.perf_counter() - start
+        d.close()
+        out[f"dedupe.{name}"] = {"items_per_s": n / elapsed}
+    return out
+
+
+def bench_sinks(tmp: pathlib.Path, n: int) -> Dict[str, Result]:
+    out = {}
+    sinks = {
+        "csv": lambda: CSVSink({"path": str(tmp / "bench.csv")}),
+        "pg": lambda: PgSink(
+            {
+                "dsn": f"sqlite:///{tmp / 'bench.db'}",
+                "table": "t",
+                "upsert_keys": ["detail_url"],
+            }
+        ),
+    }
+    for name, make in sinks.items():
+        items = _items(n)
+        for it in items:
+            it.pop("__type__")
+        sink = make()
+        start = time.perf_counter()
+        for i in range(0, n, 25):  # one page worth of items per batch
+            sink.emit_batch(items[i : i + 25])
+        sink.close()
+        out[f"sink.{name}"] = {"items_per_s": n / (time.perf_counter() - start)}
+    return out
+
+
+def bench_engine(
+    cfg, tmp: pathlib.Path, n_pages: int, per_page: int
+) -> Dict[str, Result]:
+    site = tmp / "site"
+    site.mkdir()
+    urls = []
+    for p in range(n_pages):
+        path = site / f"page{p}.html"
+        path.write_text(synthetic_page(per_page, offset=p * per_page), "utf-8")
+        urls.append({"url": path.as_uri()})
+    run_cfg = {
+        **{
+            k: v
+            for k, v in cfg.items()
+            if k not in ("request", "dedupe", "pagination", "follow_rules")
+        },
+        "entrypoints": urls,
+        "allowed_domains": [],
+        "logging": {"level": "off"},
+        "pipelines": [{"type": "csv", "path": str(tmp / "engine.csv")}],
+    }
+    cfg_path = tmp / "engine.json"
+    cfg_path.write_text(json.dumps(run_cfg))
+    start = time.perf_counter()
+    engine.run(str(cfg_path))
+    elapsed = time.perf_counter() - start
+    return {
+        f"engine.{per_page}": {
+            "pages_per_s": n_pages / elapsed,
+            "items_per_s": n_pages * per_page / elapsed,
+        }
+    }
+
+
+def compare(
+    results: Dict[str, Result], baseline: Dict[str, Result], tolerance: float
+) -> List[str]:
+    """Lines describing every rate more than ``tolerance`` below the baseline."""
+    regressions = []
+    for name, metrics in sorted(results.items()):
+        for metric, value in metrics.items():
+            ref = baseline.get(name, {}).get(metric)
+            if ref and value < ref * (1 - tolerance):
+                regressions.append(
+                    f"{name} {metric}: {value:,.1f} vs baseline {ref:,.1f} "
+                    f"({value / ref - 1:+.0%})"
+                )
+    return regressions
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="*", default=list(SIZES))
+    ap.add_argument("--min-time", type=float, default=0.5, help="seconds per benchmark")
+    ap.add_argument("--rows", type=int, default=10_000, help="items for dedupe/sinks")
+    ap.add_argument("--engine-pages", type=int, default=20)
+    ap.add_argument("--out", help="write JSON results here")
+    ap.add_argument("--baseline", help="fail if slower than this results file")
+    ap.add_argument("--save-baseline", help="write results as the new baseline")
+    ap.add_argument("--tolerance", type=float, default=0.2)
+    args = ap.parse_args()
+
+    cfg = load_and_validate(str(CONFIG))
+    pages = {
+        n: Response(url=FIXTURE.as_uri(), status=200, text=synthetic_page(n))
+        for n in args.sizes
+    }
+    results: Dict[str, Result] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = pathlib.Path(tmp_dir)
+        results.update(bench_parse(cfg, pages, args.min_time))
+        results.update(bench_normalize(cfg, pages, args.min_time))
+        results.update(bench_dedupe(cfg, tmp, args.rows))
+        results.update(bench_sinks(tmp, args.rows))
+        results.update(bench_engine(cfg, tmp, args.engine_pages, 100))
+    logger.configure()
+
+    for name, metrics in results.items():
+        cols = "  ".join(f"{k}={v:>14,.2f}" for k, v in metrics.items())
+        print(f"{name:<22} {cols}")
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    for path in (args.out, args.save_baseline):
+        if path:
+            pathlib.Path(path).write_text(json.dumps(report, indent=2) + "\n")
+    if args.baseline:
+        baseline = json.loads(pathlib.Path(args.baseline).read_text())["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nPERFORMANCE REGRESSION (tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nno regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
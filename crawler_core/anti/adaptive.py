@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# statuses that mean "slow down" (throttled, or an overloaded server or
+# gateway): back off and honor Retry-After
+THROTTLE_STATUSES = (429, 502, 503, 504)
+
+
+def parse_retry_after(
+    value: Optional[str], now: Optional[float] = None
+) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` value (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = time.time() if now is None else now
+    return max(0.0, when.timestamp() - now)
+
+
+@dataclass
+class _HostState:
+    limit: float
+    cond: threading.Condition  # threads waiting for a slot
+    inflight: int = 0
+    latency: float = 0.0  # EWMA of successful fetches, seconds
+    paused_until: float = 0.0  # monotonic
+    decreased_at: float = 0.0  # monotonic time of the last backoff
+    # asyncio tasks waiting for a slot, woken on their own loop
+    waiters: List[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]] = field(
+        default_factory=list
+    )
+
+
+def _wake(fut: "asyncio.Future[None]") -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+class AdaptiveLimiter:
+    """Per-host concurrency window driven by server feedback (AIMD).
+
+    Each host may have at most ``int(limit)`` fetches in flight. Every
+    success whose latency stays within ``latency_factor`` times the host's
+    running average adds ``increase / limit``, so roughly ``increase`` per
+    window of responses. A throttling status (429, 502, 503, 504) or a
+    timeout multiplies the limit by ``decrease`` once per window of requests
+    (responses to requests sent before the last backoff do not count
+    again). With ``Retry-After`` the
+    host is also paused for that long, capped at ``max_retry_after_s``.
+    The limit always stays within ``[min_concurrency, max_concurrency]``.
+
+    ``on_change(host, limit, reason)`` is called whenever a limit moves;
+    ``reason`` is ``"increase"``, the HTTP status or ``"timeout"``.
+    Shared by threads and asyncio tasks, like :class:`RateLimiter`: waiters
+    sleep until :meth:`release` frees a slot or the host's pause ends.
+    """
+
+    def __init__(
+        self,
+        min_concurrency: int = 1,
+        max_concurrency: int = 16,
+        initial_concurrency: int = 2,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_factor: float = 2.0,
+        max_retry_after_s: float = 300.0,
+        on_change: Optional[Callable[[str, float, str], Any]] = None,
+    ) -> None:
+        self.min = max(1, int(min_concurrency))
+        self.max = max(self.min, int(max_concurrency))
+        self.initial = float(min(self.max, max(self.min, initial_concurrency)))
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.max_retry_after = max_retry_after_s
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, _HostState] = {}
+
+    @classmethod
+    def from_config(
+        cls,
+        req_cfg: Dict[str, Any],
+        on_change: Optional[Callable[[str, float, str], Any]] = None,
+    ) -> Optional["AdaptiveLimiter"]:
+        acfg = req_cfg.get("adaptive") or {}
+        if not acfg.get("enabled"):
+            return None
+        keys = (
+            "min_concurrency",
+            "max_concurrency",
+            "initial_concurrency",
+            "increase",
+            "decrease",
+            "latency_factor",
+            "max_retry_after_s",
+        )
+        return cls(**{k: acfg[k] for k in keys if k in acfg}, on_change=on_change)
+
+    def _state(self, host: str) -> _HostState:
+        st = self._hosts.get(host)
+        if st is None:
+            st = self._hosts[host] = _HostState(
+                self.initial, threading.Condition(self._lock)
+            )
+        return st
+
+    def _try_acquire(self, host: str) -> Optional[float]:
+        """Take a slot (returns 0), or return how long ``host`` stays paused,
+        or None while it is at its limit. Call with ``_lock`` held."""
+        st = self._state(host)
+        now = time.monotonic()
+        if st.paused_until > now:
+            return st.paused_until - now
+        if st.inflight >= int(st.limit):
+            return None
+        st.inflight += 1
+        return 0.0
+
+    def window(self, host: str) -> Tuple[int, float]:
+        """``host``'s current limit and how long it stays paused (0 if not).
+
+        The scheduler checks this before handing out a URL, so a worker does
+        not take a fetch slot only to wait here for the host.
+        """
+        with self._lock:
+            st = self._state(host)
+            return int(st.limit), max(0.0, st.paused_until - time.monotonic())
+
+    def acquire(self, host: str = "") -> float:
+        """Block until ``host`` has a free slot; returns the start time to release with."""
+        with self._lock:
+            while True:
+                wait = self._try_acquire(host)
+                if wait == 0:
+                    return time.monotonic()
+                self._state(host).cond.wait(wait)
+
+    async def acquire_async(self, host: str = "") -> float:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                wait = self._try_acquire(host)
+                if wait == 0:
+                    return time.monotonic()
+                fut = loop.create_future()
+                self._state(host).waiters.append((loop, fut))
+            try:
+                await asyncio.wait_for(fut, wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def release(
+        self,
+        host: str,
+        started: float,
+        status: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        timeout: bool = False,
+    ) -> None:
+        """Free the slot taken at ``started`` and adapt to how the fetch went.
+
+        ``status`` is None for transport errors; those other than timeouts
+        leave the limit alone.
+        """
+        now = time.monotonic()
+        reason: Optional[str] = None
+        with self._lock:
+            st = self._state(host)
+            st.inflight = max(0, st.inflight - 1)
+            if timeout or status in THROTTLE_STATUSES:
+                if retry_after is not None:
+                    pause = min(retry_after, self.max_retry_after)
+                    st.paused_until = max(st.paused_until, now + pause)
+                if started >= st.decreased_at:
+                    st.limit = max(float(self.min), st.limit * self.decrease)
+                    st.decreased_at = now
+                    reason = "timeout" if timeout else str(status)
+            elif status is not None and status < 400:
+                latency = now - started
+                stable = not st.latency or latency <= self.latency_factor * st.latency
+                st.latency = (
+                    latency if not st.latency else 0.9 * st.latency + 0.1 * latency
+                )
+                if stable and st.limit < self.max:
+                    st.limit = min(float(self.max), st.limit + self.increase / st.limit)
+                    reason = "increase"
+            limit = st.limit
+            # a slot is free, or the limit or pause changed: waiters re-check
+            st.cond.notify_all()
+            waiters, st.waiters = st.waiters, []
+        for loop, fut in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, fut)
+            except RuntimeError:  # that loop has been closed meanwhile
+                pass
+        if reason is not None and self.on_change is not None:
+            self.on_change(host, limit, reason)
+
+    def limit(self, host: str) -> int:
+        with self._lock:
+            return int(self._state(host).limit)
+
+    def limits(self) -> Dict[str, int]:
+        with self._lock:
+            return {h: int(st.limit) for h, st in self._hosts.items()}
+
+
+__all__ = ["AdaptiveLimiter", "THROTTLE_STATUSES", "parse_retry_after"]
@@ -1,7 +1,57 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
 class RateLimiter:
-    def __init__(self, qps: float = 1.0):
+    """Per-host token bucket shared by threads and asyncio tasks.
+
+    Every host gets its own bucket holding up to ``burst`` tokens that refill at
+    ``qps`` per second. ``acquire`` reserves a token under a lock and then sleeps
+    for exactly as long as the bucket is in deficit, so waiting callers cost no
+    CPU and a throttled host never delays callers targeting another host.
+    """
+
+    def __init__(self, qps: float = 1.0, burst: int = 1):
         self.qps = qps
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    @classmethod
+    def from_config(cls, req_cfg: Dict[str, Any]) -> Optional["RateLimiter"]:
+        rate_cfg = req_cfg.get("rate_limit") or {}
+        qps = rate_cfg.get("domain_qps", 2)
+        if not qps or qps <= 0:
+            return None
+        return cls(qps=float(qps), burst=int(rate_cfg.get("burst", 8) or 1))
+
+    def _reserve(self, host: str) -> float:
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(host, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - last) * self.qps) - 1.0
+            self._buckets[host] = (tokens, now)
+        return -tokens / self.qps if tokens < 0 else 0.0
+
+    def delay(self, host: str = "") -> float:
+        """Seconds until ``host`` has a free token, without reserving it."""
+        with self._lock:
+            if host not in self._buckets:
+                return 0.0
+            tokens, last = self._buckets[host]
+            tokens += (time.monotonic() - last) * self.qps
+        return (1.0 - tokens) / self.qps if tokens < 1.0 else 0.0
 
-    def acquire(self):  # pragma: no cover - not used in tests
-        pass
+    def acquire(self, host: str = "") -> None:
+        wait = self._reserve(host)
+        if wait > 0:
+            time.sleep(wait)
 
+    async def acquire_async(self, host: str = "") -> None:
+        wait = self._reserve(host)
+        if wait > 0:
+            await asyncio.sleep(wait)
@@ -1,35 +1,137 @@
 from __future__ import annotations
 
-from collections import defaultdict
-from typing import Any, Dict, Tuple
+import hashlib
+import json
+import sqlite3
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
 
 from .logger import warn
 
 
 class Dedupe:
-    _seen: dict[str, set[Tuple[Any, ...]]] = defaultdict(set)
-    _warned: set[str] = set()
+    """Item dedupe on hashed ``dedupe_keys``, scoped to one crawl run.
+
+    Each item's key tuple is reduced to a 16-byte fingerprint. Without a
+    ``path`` fingerprints only live as long as the instance. With one they
+    are persisted in a SQLite index keyed by site and item type, so later runs
+    skip items an earlier run already emitted; a bounded LRU in front of the
+    index answers repeats without touching the disk.
+
+    New fingerprints are only staged: the caller commits them with
+    :meth:`flush` once the sinks have written the items (:meth:`due` says
+    ``commit_every`` are waiting), or drops them with :meth:`rollback` if a
+    sink failed, so a later run emits those items again.
+    """
+
+    def __init__(
+        self,
+        site: str = "",
+        path: Optional[str] = None,
+        lru_size: int = 100_000,
+        commit_every: int = 1000,
+    ) -> None:
+        self.site = site
+        self._warned: set[str] = set()
+        self._seen: dict[str, set[bytes]] = {}
+        self._lru: "OrderedDict[Tuple[str, bytes], None]" = OrderedDict()
+        self.lru_size = lru_size
+        self.commit_every = max(1, commit_every)
+        self._uncommitted = 0
+        self.conn: Optional[sqlite3.Connection] = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen (site TEXT NOT NULL, "
+                "item_type TEXT NOT NULL, fp BLOB NOT NULL, "
+                "PRIMARY KEY (site, item_type, fp)) WITHOUT ROWID"
+            )
 
     @classmethod
-    def seen(cls, item: Dict[str, Any], items_cfg: Dict[str, Any]) -> bool:
+    def from_config(cls, cfg: Dict[str, Any]) -> "Dedupe":
+        dcfg = cfg.get("dedupe") or {}
+        return cls(
+            site=cfg.get("name") or "",
+            path=dcfg.get("path"),
+            lru_size=int(dcfg.get("lru_size", 100_000)),
+            commit_every=int(dcfg.get("commit_every", 1000)),
+        )
+
+    @staticmethod
+    def fingerprint(key: Tuple[Any, ...]) -> bytes:
+        raw = json.dumps(list(key), ensure_ascii=False, default=str)
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).digest()
+
+    def seen(self, item: Dict[str, Any], items_cfg: Dict[str, Any]) -> bool:
         name = item.get("__type__")
         if not name or name not in items_cfg:
             return False
         icfg = items_cfg[name]
         keys = icfg.get("dedupe_keys", [])
         if not keys:
-            if name not in cls._warned:
+            if name not in self._warned:
                 warn("dedupe", item=name, err="NO_KEYS")
-                cls._warned.add(name)
+                self._warned.add(name)
             return True
         key = tuple(item.get(k) for k in keys)
         if all(v in (None, "") for v in key):
-            if name not in cls._warned:
+            if name not in self._warned:
                 warn("dedupe", item=name, err="EMPTY_KEY")
-                cls._warned.add(name)
+                self._warned.add(name)
             return True
-        seen = cls._seen.setdefault(name, set())
-        if key in seen:
+        fp = self.fingerprint(key)
+        if self.conn is None:
+            seen = self._seen.setdefault(name, set())
+            if fp in seen:
+                return True
+            seen.add(fp)
+            return False
+        return self._seen_persistent(name, fp)
+
+    def _seen_persistent(self, name: str, fp: bytes) -> bool:
+        assert self.conn is not None
+        lru_key = (name, fp)
+        if lru_key in self._lru:
+            self._lru.move_to_end(lru_key)
             return True
-        seen.add(key)
+        cur = self.conn.execute(
+            "INSERT OR IGNORE INTO seen (site, item_type, fp) VALUES (?, ?, ?)",
+            (self.site, name, fp),
+        )
+        self._remember(lru_key)
+        if cur.rowcount == 0:
+            return True
+        self._uncommitted += 1
         return False
+
+    def _remember(self, lru_key: Tuple[str, bytes]) -> None:
+        if self.lru_size <= 0:
+            return
+        self._lru[lru_key] = None
+        if len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def due(self) -> bool:
+        """Whether ``commit_every`` new fingerprints are staged."""
+        return self._uncommitted >= self.commit_every
+
+    def flush(self) -> None:
+        if self.conn is not None:
+            self.conn.commit()
+        self._uncommitted = 0
+
+    def rollback(self) -> None:
+        """Forget the staged fingerprints; their items were not all written."""
+        if self.conn is not None:
+            self.conn.rollback()
+        self._uncommitted = 0
+        self._lru.clear()
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.flush()
+            self.conn.close()
+            self.conn = None
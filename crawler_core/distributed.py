@@ -0,0 +1,459 @@
+"""Shared, lease-based frontier for crawling one site from many processes.
+
+Every worker runs a normal engine with ``scheduler.backend: distributed``;
+they coordinate only through a :class:`FrontierStore`:
+
+* The store holds every URL ever discovered (the cluster-wide visited set)
+  with its state: queued, leased, done or failed.
+* Hosts are hashed into ``shards``. A shard is leased to one worker at a
+  time, and only that worker fetches its hosts, so the per-host politeness
+  interval each worker enforces holds for the whole cluster. Live workers
+  split the shards evenly and rebalance as workers join or leave.
+* Workers lease queued URLs of their shards in batches of ``lease_batch``
+  for ``lease_ttl_s`` seconds. A heartbeat thread renews both kinds of
+  lease every third of the TTL. If a worker dies, its shards and URLs are
+  handed to the survivors once the leases lapse.
+
+:class:`SqliteFrontierStore` keeps all of this in one SQLite (WAL) file.
+That is enough for processes on one machine or on a disk that supports
+proper locking. Other backends subclass :class:`FrontierStore`, implement
+:meth:`FrontierStore.from_config` and are picked with
+``scheduler.store: "module:Class"``.
+"""
+
+from __future__ import annotations
+
+import heapq
+import importlib
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .logger import info
+from .scheduler import Scheduler, _host
+from .types import Request
+
+QUEUED, LEASED, DONE, FAILED = range(4)
+
+
+def shard_of(url: str, shards: int) -> int:
+    return zlib.crc32(_host(url).encode()) % shards
+
+
+class FrontierStore:
+    """Storage interface shared by the workers of a distributed crawl.
+
+    ``ttl`` arguments are lease lengths in seconds. Implementations must
+    be safe to call from several processes at once.
+    """
+
+    shards: int
+
+    @classmethod
+    def from_config(cls, sched_cfg: Dict[str, Any], name: str) -> "FrontierStore":
+        """Open the store for the crawl ``name`` from its ``scheduler`` config.
+
+        This is how :func:`build_store` creates every backend.
+        """
+        raise NotImplementedError
+
+    def heartbeat(self, worker: str, ttl: float) -> None:
+        """Mark ``worker`` alive and extend its shard and URL leases."""
+        raise NotImplementedError
+
+    def claim(self, worker: str, ttl: float) -> Set[int]:
+        """Take or give back shards toward an even split; return those held."""
+        raise NotImplementedError
+
+    def add(self, urls: Iterable[str]) -> int:
+        """Queue the URLs never seen before; returns how many were new."""
+        raise NotImplementedError
+
+    def lease(
+        self, worker: str, shards: Set[int], n: int, ttl: float
+    ) -> List[Tuple[str, int]]:
+        """Up to ``n`` ``(url, attempts)`` from ``shards``, queued or lapsed."""
+        raise NotImplementedError
+
+    def complete(self, worker: str, urls: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    def retry(self, worker: str, url: str, attempts: int) -> None:
+        raise NotImplementedError
+
+    def fail(self, worker: str, url: str) -> None:
+        raise NotImplementedError
+
+    def release(self, worker: str, urls: Iterable[str]) -> None:
+        """Return leased but unfetched URLs to the queue."""
+        raise NotImplementedError
+
+    def leave(self, worker: str) -> None:
+        """Give up every lease ``worker`` holds."""
+        raise NotImplementedError
+
+    def unfinished(self) -> int:
+        """URLs still queued or leased, cluster-wide."""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Forget every URL, so the next worker starts a fresh crawl."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteFrontierStore(FrontierStore):
+    """The default store: one SQLite (WAL) file at ``scheduler.path``."""
+
+    def __init__(self, path: str, shards: int = 64) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # the engine thread and the heartbeat thread share the connection
+        self._lock = threading.Lock()
+        with self._tx() as c:
+            c.execute(
+                "CREATE TABLE IF NOT EXISTS urls (id INTEGER PRIMARY KEY, "
+                "url TEXT NOT NULL UNIQUE, shard INTEGER NOT NULL, "
+                "state INTEGER NOT NULL DEFAULT 0, attempts INTEGER NOT NULL DEFAULT 0, "
+                "worker TEXT, lease_until REAL)"
+            )
+            c.execute(
+                "CREATE INDEX IF NOT EXISTS urls_ready ON urls (shard, state, id)"
+            )
+            c.execute(
+                "CREATE TABLE IF NOT EXISTS shards (shard INTEGER PRIMARY KEY, "
+                "worker TEXT, lease_until REAL)"
+            )
+            c.execute(
+                "CREATE TABLE IF NOT EXISTS workers (worker TEXT PRIMARY KEY, "
+                "seen_until REAL NOT NULL)"
+            )
+            c.execute("CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT)")
+            c.execute("INSERT OR IGNORE INTO meta VALUES ('shards', ?)", (str(shards),))
+            # the first process to create the store fixes the shard count
+            self.shards = int(
+                c.execute("SELECT v FROM meta WHERE k='shards'").fetchone()[0]
+            )
+            c.executemany(
+                "INSERT OR IGNORE INTO shards (shard) VALUES (?)",
+                [(s,) for s in range(self.shards)],
+            )
+
+    @classmethod
+    def from_config(cls, sched_cfg: Dict[str, Any], name: str) -> "SqliteFrontierStore":
+        path = sched_cfg.get("path") or f"out/.state/{name}.shared-frontier.db"
+        return cls(path, shards=int(sched_cfg.get("shards", 64)))
+
+    def _tx(self) -> "_Transaction":
+        return _Transaction(self.conn, self._lock)
+
+    def heartbeat(self, worker: str, ttl: float) -> None:
+        until = time.time() + ttl
+        with self._tx() as c:
+            c.execute("INSERT OR REPLACE INTO workers VALUES (?, ?)", (worker, until))
+            c.execute("UPDATE shards SET lease_until=? WHERE worker=?", (until, worker))
+            c.execute(
+                "UPDATE urls SET lease_until=? WHERE worker=? AND state=?",
+                (until, worker, LEASED),
+            )
+
+    def claim(self, worker: str, ttl: float) -> Set[int]:
+        now = time.time()
+        with self._tx() as c:
+            c.execute(
+                "INSERT OR REPLACE INTO workers VALUES (?, ?)", (worker, now + ttl)
+            )
+            live = c.execute(
+                "SELECT count(*) FROM workers WHERE seen_until>?", (now,)
+            ).fetchone()[0]
+            share = math.ceil(self.shards / max(1, live))
+            held = [
+                r[0]
+                for r in c.execute(
+                    "SELECT shard FROM shards WHERE worker=? AND lease_until>? "
+                    "ORDER BY shard",
+                    (worker, now),
+                )
+            ]
+            if len(held) > share:
+                extra = held[share:]
+                c.executemany(
+                    "UPDATE shards SET worker=NULL, lease_until=NULL WHERE shard=?",
+                    [(s,) for s in extra],
+                )
+                held = held[:share]
+            elif len(held) < share:
+                free = c.execute(
+                    "SELECT shard FROM shards WHERE worker IS NULL OR lease_until<=? "
+                    "ORDER BY shard LIMIT ?",
+                    (now, share - len(held)),
+                ).fetchall()
+                c.executemany(
+                    "UPDATE shards SET worker=?, lease_until=? WHERE shard=?",
+                    [(worker, now + ttl, s) for (s,) in free],
+                )
+                held += [s for (s,) in free]
+        return set(held)
+
+    def add(self, urls: Iterable[str]) -> int:
+        rows = [(u, shard_of(u, self.shards)) for u in urls]
+        if not rows:
+            return 0
+        with self._tx() as c:
+            before = c.total_changes
+            c.executemany("INSERT OR IGNORE INTO urls (url, shard) VALUES (?, ?)", rows)
+            return c.total_changes - before
+
+    def lease(
+        self, worker: str, shards: Set[int], n: int, ttl: float
+    ) -> List[Tuple[str, int]]:
+        if not shards:
+            return []
+        now = time.time()
+        marks = ",".join("?" * len(shards))
+        with self._tx() as c:
+            rows = c.execute(
+                f"SELECT id, url, attempts FROM urls WHERE shard IN ({marks}) AND "
+                "(state=? OR (state=? AND lease_until<=?)) ORDER BY id LIMIT ?",
+                (*shards, QUEUED, LEASED, now, n),
+            ).fetchall()
+            c.executemany(
+                "UPDATE urls SET state=?, worker=?, lease_until=? WHERE id=?",
+                [(LEASED, worker, now + ttl, r[0]) for r in rows],
+            )
+        return [(url, attempts) for _, url, attempts in rows]
+
+    def _set_state(
+        self,
+        worker: str,
+        urls: Iterable[str],
+        state: int,
+        attempts: Optional[int] = None,
+    ) -> None:
+        set_attempts = "" if attempts is None else f", attempts={int(attempts)}"
+        with self._tx() as c:
+            c.executemany(
+                f"UPDATE urls SET state=?, worker=NULL, lease_until=NULL{set_attempts} "
+                "WHERE url=? AND worker=? AND state=?",
+                [(state, u, worker, LEASED) for u in urls],
+            )
+
+    def complete(self, worker: str, urls: Iterable[str]) -> None:
+        self._set_state(worker, urls, DONE)
+
+    def retry(self, worker: str, url: str, attempts: int) -> None:
+        self._set_state(worker, [url], QUEUED, attempts)
+
+    def fail(self, worker: str, url: str) -> None:
+        self._set_state(worker, [url], FAILED)
+
+    def release(self, worker: str, urls: Iterable[str]) -> None:
+        self._set_state(worker, urls, QUEUED)
+
+    def leave(self, worker: str) -> None:
+        with self._tx() as c:
+            c.execute(
+                "UPDATE urls SET state=?, worker=NULL, lease_until=NULL "
+                "WHERE worker=? AND state=?",
+                (QUEUED, worker, LEASED),
+            )
+            c.execute(
+                "UPDATE shards SET worker=NULL, lease_until=NULL WHERE worker=?",
+                (worker,),
+            )
+            c.execute("DELETE FROM workers WHERE worker=?", (worker,))
+
+    def unfinished(self) -> int:
+        with self._tx() as c:
+            return c.execute(
+                "SELECT count(*) FROM urls WHERE state IN (?, ?)", (QUEUED, LEASED)
+            ).fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        names = ("queued", "leased", "done", "failed")
+        out = dict.fromkeys(names, 0)
+        with self._tx() as c:
+            for state, n in c.execute(
+                "SELECT state, count(*) FROM urls GROUP BY state"
+            ):
+                out[names[state]] = n
+            out["workers"] = c.execute(
+                "SELECT count(*) FROM workers WHERE seen_until>?", (time.time(),)
+            ).fetchone()[0]
+        return out
+
+    def reset(self) -> None:
+        with self._tx() as c:
+            c.execute("DELETE FROM urls")
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+class _Transaction:
+    """``BEGIN IMMEDIATE`` ... ``COMMIT`` under the store's thread lock."""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock) -> None:
+        self.conn = conn
+        self.lock = lock
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.lock.acquire()
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.lock.release()
+            raise
+        return self.conn
+
+    def __exit__(self, exc_type: Any, *exc: Any) -> None:
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.lock.release()
+
+
+def build_store(sched_cfg: Dict[str, Any], name: str) -> FrontierStore:
+    """The :class:`FrontierStore` named by ``scheduler.store``."""
+    store = sched_cfg.get("store", "sqlite")
+    if store == "sqlite":
+        cls: Any = SqliteFrontierStore
+    else:
+        module, _, attr = store.partition(":")
+        cls = getattr(importlib.import_module(module), attr)
+    return cls.from_config(sched_cfg, name)
+
+
+class DistributedScheduler(Scheduler):
+    """Scheduler backed by a shared :class:`FrontierStore`.
+
+    Leased URLs are queued locally in the usual per-host deques, so the
+    ``domain_qps`` spacing applies to them as it does to a local crawl.
+    Discovered links go to the store, which dedupes them for the whole
+    cluster. :meth:`has_next` waits for work only while this worker has
+    nothing in flight, and returns False once the whole frontier is
+    drained.
+    """
+
+    def __init__(self, cfg, store: Optional[FrontierStore] = None) -> None:
+        super().__init__(cfg)
+        sched_cfg = cfg.get("scheduler") or {}
+        self.store = store or build_store(sched_cfg, cfg.get("name") or "crawl")
+        self.worker = str(
+            sched_cfg.get("worker_id") or f"{socket.gethostname()}-{os.getpid()}"
+        )
+        self.lease_batch = max(1, int(sched_cfg.get("lease_batch", 50)))
+        self.ttl = float(sched_cfg.get("lease_ttl_s", 60))
+        self.poll_interval = float(sched_cfg.get("poll_interval_s", 0.5))
+        self.shards: Set[int] = set()
+        self._outstanding = 0  # handed out by next(), not yet done()
+        self._stop = threading.Event()
+        self.store.heartbeat(self.worker, self.ttl)
+        self._rebalance()
+        self._beat = threading.Thread(
+            target=self._heartbeat, name="frontier-heartbeat", daemon=True
+        )
+        self._beat.start()
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                self.store.heartbeat(self.worker, self.ttl)
+            except sqlite3.Error:  # pragma: no cover - retried on the next beat
+                pass
+
+    def _rebalance(self) -> None:
+        shards = self.store.claim(self.worker, self.ttl)
+        lost = self.shards - shards
+        self.shards = shards
+        if lost:
+            self._drop_shards(lost)
+
+    def _drop_shards(self, lost: Set[int]) -> None:
+        """Hand back locally queued URLs of shards now owned elsewhere."""
+        dropped = []
+        for host in list(self.hosts):
+            dq = self.hosts[host]
+            if dq and shard_of(dq[0].url, self.store.shards) in lost:
+                dropped += [req.url for req in dq]
+                self._size -= len(dq)
+                del self.hosts[host]
+                self._parked.discard(host)
+        if dropped:
+            self._ready = [e for e in self._ready if e[2] in self.hosts]
+            heapq.heapify(self._ready)
+            self.store.release(self.worker, dropped)
+            info("frontier", worker=self.worker, released=len(dropped))
+
+    def _lease(self) -> bool:
+        self._rebalance()
+        for url, attempts in self.store.lease(
+            self.worker, self.shards, self.lease_batch, self.ttl
+        ):
+            self._push(Request(url, attempts=attempts))
+        return self._size > 0
+
+    def _maybe_enqueue(self, url: str) -> None:
+        self.store.add([url])
+
+    def enqueue(self, links: Iterable[str]) -> None:
+        self.store.add(links)
+
+    def has_next(self) -> bool:
+        if self._size > 0 or self._lease():
+            return True
+        if self._outstanding:
+            # pages in flight may still add links; the engine asks again later
+            return False
+        while self.store.unfinished():
+            time.sleep(self.poll_interval)
+            if self._lease():
+                return True
+        return False
+
+    def next(self) -> Request:
+        req = super().next()
+        self._outstanding += 1
+        return req
+
+    def defer(self, req: Request, _err: Exception) -> None:
+        if req.attempts + 1 >= self.max_attempts:
+            self.store.fail(self.worker, req.url)
+        else:
+            self.store.retry(self.worker, req.url, req.attempts + 1)
+
+    def done(self, req: Request) -> None:
+        # no-op after defer(): the URL is no longer leased to this worker
+        self.store.complete(self.worker, [req.url])
+        self._outstanding -= 1
+
+    def close(self) -> None:
+        self._stop.set()
+        self._beat.join()
+        self.store.leave(self.worker)
+        self.store.close()
+
+
+__all__ = [
+    "DistributedScheduler",
+    "FrontierStore",
+    "SqliteFrontierStore",
+    "build_store",
+    "shard_of",
+]
@@ -1,17 +1,307 @@
 from __future__ import annotations
 
-from .config import load_and_validate
-from .scheduler import Scheduler
-from .fetcher import Fetcher
-from .extractor import Extractor
-from .normalizer import Normalizer
+import asyncio
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from . import logger
+from .anti.adaptive import THROTTLE_STATUSES, AdaptiveLimiter, parse_retry_after
+from .config import Config, load_and_validate
+from .scheduler import Scheduler, build_scheduler
+from .fetcher import AsyncFetcher, Fetcher
+from .hooks import HookChain
+from .http_cache import HttpCache
+from .extractor import ExtractionPlan, Extractor
+from .normalizer import NormalizePlan, Normalizer
 from .dedupe import Dedupe
+from .membership import membership_stats
+from .parse_pool import ParsePool, ParseResult
 from .pipelines.base import build_sinks
+from .pipelines.dispatcher import SinkDispatcher
 from .telemetry import Telemetry
-from .types import Response
+from .types import Request, Response
+
+
+@dataclass
+class _Crawl:
+    """State shared by the sync and async fetch loops of a single run."""
+
+    cfg: Config
+    sched: Scheduler
+    sinks: SinkDispatcher
+    telem: Telemetry
+    dedupe: Dedupe
+    plan: ExtractionPlan
+    norm: NormalizePlan
+    pool: Optional[ParsePool] = None
+    cache: Optional[HttpCache] = None
+    hooks: HookChain = field(default_factory=HookChain)
+
+    def response(self, req: Request, resp_dict: Dict[str, Any]) -> Optional[Response]:
+        self.telem.observe_fetch(
+            req.url,
+            resp_dict.get("status"),
+            resp_dict.get("elapsed", 0.0),
+            len(resp_dict.get("content") or b""),
+        )
+        if resp_dict.get("error"):
+            self.fail(req, Exception(resp_dict.get("error")))
+            return None
+        status = resp_dict.get("status") or 0
+        if status in THROTTLE_STATUSES or status >= 500:
+            # throttled or a server error: retry later, after Retry-After if sent
+            headers = resp_dict.get("headers") or {}
+            wait = parse_retry_after(headers.get("retry-after"))
+            if wait:
+                self.sched.delay_host(req.url, wait)
+            self.fail(req, Exception(f"HTTP {status}"))
+            return None
+        if resp_dict.get("skipped"):
+            # oversized or unwanted content type: dropped on purpose, not retried
+            self.telem.mark_skipped()
+            self.finish(req)
+            return None
+        resp = Response(
+            url=resp_dict.get("url", ""),
+            status=resp_dict.get("status", 0),
+            content=resp_dict.get("content", b""),
+            headers=resp_dict.get("headers"),
+            not_modified=bool(resp_dict.get("not_modified")),
+        )
+        for hook in self.hooks.post_response:
+            hook(resp, req.meta)
+        return resp
+
+    def extract(self, resp: Response) -> ParseResult:
+        if resp.not_modified:
+            # unchanged since the cached copy: its items were emitted already
+            self.telem.mark_not_modified()
+            return Extractor.links(resp, self.plan), []
+        with self.telem.stage("parse"):
+            links, items = Extractor.parse(resp, self.plan)
+        with self.telem.stage("normalize"):
+            return links, Normalizer.run_batch(items, self.norm)
+
+    def fresh(self, req: Request, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        out = []
+        pre_store = self.hooks.pre_store
+        for it in items:
+            if not self.dedupe.seen(it, self.cfg["items"]):
+                it.pop("__type__", None)
+                if pre_store:
+                    for hook in pre_store:
+                        hook(it, req.meta)
+                out.append(it)
+                self.telem.mark_emit()
+        return out
+
+    def store(
+        self, req: Request, links: List[str], items: List[Dict[str, Any]]
+    ) -> None:
+        """Dedupe and queue normalized items for the sinks, then enqueue links.
+
+        Blocks while a sink queue is full, so a slow sink throttles the crawl.
+        """
+        fresh = self.fresh(req, items)
+        if fresh:
+            self.sinks.emit_batch(fresh)
+        if self.cache is not None:
+            self.cache.keep(req.url)
+        self.sched.enqueue(links)
+        self.telem.mark_success()
+        self.finish(req)
+        if self.dedupe.due():
+            self.commit()
+
+    async def store_async(
+        self, req: Request, links: List[str], items: List[Dict[str, Any]]
+    ) -> None:
+        fresh = self.fresh(req, items)
+        if fresh:
+            await self.sinks.emit_batch_async(fresh)
+        if self.cache is not None:
+            self.cache.keep(req.url)
+        self.sched.enqueue(links)
+        self.telem.mark_success()
+        self.finish(req)
+        if self.dedupe.due():
+            self.commit()
+
+    def commit(self) -> None:
+        """Flush the sinks, then persist the fingerprints and cached responses
+        of what they wrote."""
+        if self.sinks.flush():
+            self.dedupe.flush()
+            if self.cache is not None:
+                self.cache.flush()
+        else:
+            # some items may be lost: let a later run fetch and emit them again
+            self.dedupe.rollback()
+            if self.cache is not None:
+                self.cache.rollback()
+
+    def complete(self, req: Request, outcome: Any) -> None:
+        """Finish a page handed to the parse pool."""
+        if isinstance(outcome, BaseException):
+            self.fail(req, outcome)
+        else:
+            self.store(req, *outcome)
+
+    def handle(self, req: Request, resp_dict: Dict[str, Any]) -> None:
+        """Run extract -> normalize -> dedupe -> sinks for one fetched page."""
+        resp = self.response(req, resp_dict)
+        if resp is not None:
+            self.store(req, *self.extract(resp))
+
+    def fetch(self, fetcher: Fetcher, req: Request) -> Dict[str, Any]:
+        for hook in self.hooks.pre_request:
+            hook(req, req.meta)
+        self.telem.fetch_started()
+        try:
+            return fetcher.get(req)
+        finally:
+            self.sched.fetched(req)
+            self.telem.fetch_finished()
+
+    async def fetch_async(self, fetcher: AsyncFetcher, req: Request) -> Dict[str, Any]:
+        for hook in self.hooks.pre_request:
+            hook(req, req.meta)
+        self.telem.fetch_started()
+        try:
+            return await fetcher.get(req)
+        finally:
+            self.sched.fetched(req)
+            self.telem.fetch_finished()
 
+    async def handle_async(self, req: Request, resp_dict: Dict[str, Any]) -> None:
+        resp = self.response(req, resp_dict)
+        if resp is None:
+            return
+        if self.pool is None or resp.not_modified:
+            await self.store_async(req, *self.extract(resp))
+        else:
+            await self.store_async(req, *await self.pool.parse_async(resp))
 
-def run(config_path: str, dry_run: bool = False) -> None:
+    def fail(self, req: Request, err: Exception) -> None:
+        self.telem.mark_error(err)
+        for hook in self.hooks.on_error:
+            hook(err, req.meta)
+        self.sched.defer(req, err)
+        self.finish(req)
+
+    def finish(self, req: Request) -> None:
+        if self.cache is not None:
+            self.cache.drop(req.url)  # no-op once store() kept it
+        self.sched.done(req)
+        for hook in self.hooks.post_request:
+            hook(req, req.meta)
+
+
+def _concurrency(cfg: Config) -> int:
+    rate_cfg = (cfg.get("request") or {}).get("rate_limit") or {}
+    return max(1, int(rate_cfg.get("concurrency", 1) or 1))
+
+
+def _adaptive(crawl: _Crawl) -> Optional[AdaptiveLimiter]:
+    limiter = AdaptiveLimiter.from_config(
+        crawl.cfg.get("request") or {}, on_change=crawl.telem.observe_host_limit
+    )
+    # hosts at their limit wait in the scheduler, not inside a fetch
+    crawl.sched.slots = limiter
+    return limiter
+
+
+def _run_sync(crawl: _Crawl) -> None:
+    fetch = Fetcher(crawl.cfg, cache=crawl.cache, adaptive=_adaptive(crawl))
+    sched, pool = crawl.sched, crawl.pool
+    try:
+        while sched.has_next() or (pool is not None and pool.pending):
+            if not sched.has_next():
+                # pages still in the parse pool may yield more links
+                for done_req, outcome in pool.wait():  # type: ignore[union-attr]
+                    crawl.complete(done_req, outcome)
+                continue
+            wait = sched.ready_in()
+            if wait:
+                time.sleep(wait)
+            req = sched.next()
+            try:
+                resp_dict = crawl.fetch(fetch, req)
+                if pool is None or resp_dict.get("not_modified"):
+                    crawl.handle(req, resp_dict)
+                    continue
+                resp = crawl.response(req, resp_dict)
+                if resp is not None:
+                    for done_req, outcome in pool.submit(req, resp):
+                        crawl.complete(done_req, outcome)
+            except Exception as e:  # pragma: no cover - simplified error path
+                crawl.fail(req, e)
+    finally:
+        fetch.close()
+        crawl.telem.record_connections(fetch.stats)
+
+
+async def _run_async(crawl: _Crawl, concurrency: int) -> None:
+    """Drain the scheduler with ``concurrency`` fetch workers.
+
+    Workers park on a condition while the queue is empty but other workers
+    are still in flight, since those may enqueue new links; the crawl ends
+    once the queue is empty and nothing is in flight. While every queued
+    host is still rate limited, or at its adaptive limit, they wait on the
+    same condition until the soonest one is ready or a fetch ends, rather
+    than inside a fetch.
+    """
+    fetch = AsyncFetcher(crawl.cfg, cache=crawl.cache, adaptive=_adaptive(crawl))
+    sched = crawl.sched
+    cond = asyncio.Condition()
+    inflight = 0
+
+    async def worker() -> None:
+        nonlocal inflight
+        while True:
+            async with cond:
+                while True:
+                    await cond.wait_for(lambda: sched.has_next() or inflight == 0)
+                    if not sched.has_next():
+                        cond.notify_all()
+                        return
+                    wait = sched.ready_in()
+                    if not wait:
+                        break
+                    try:
+                        await asyncio.wait_for(
+                            cond.wait(), None if wait == math.inf else wait
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                req = sched.next()
+                inflight += 1
+            try:
+                resp_dict = await crawl.fetch_async(fetch, req)
+                if sched.slots is not None:
+                    async with cond:
+                        cond.notify_all()  # its host may take another fetch
+                await crawl.handle_async(req, resp_dict)
+            except Exception as e:  # pragma: no cover - simplified error path
+                crawl.fail(req, e)
+            finally:
+                async with cond:
+                    inflight -= 1
+                    cond.notify_all()
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        await fetch.aclose()
+        crawl.telem.record_connections(fetch.stats)
+
+
+def run(
+    config_path: str, dry_run: bool = False, resume: bool = False
+) -> Optional[Telemetry]:
+    """Crawl the site described by ``config_path``; returns the run's telemetry."""
     cfg = load_and_validate(config_path)
     entrypoints = (
         getattr(cfg, "entrypoints", [])
@@ -22,43 +312,59 @@ def run(config_path: str, dry_run: bool = False) -> None:
         print(
             f"[dry-run] config OK. entrypoints={len(entrypoints)}. skipping network fetch."
         )
-        return
+        return None
+    return run_config(cfg, resume=resume)
 
-    telem = Telemetry()
-    sched = Scheduler(cfg)
-    fetch = Fetcher(cfg)
-    sinks = build_sinks(cfg["pipelines"])
 
-    sched.seed(entrypoints)
-    total_items = 0
-    while sched.has_next():
-        req = sched.next()
-        try:
-            resp_dict = fetch.get(req)
-            if resp_dict.get("error"):
-                telem.mark_error(Exception(resp_dict.get("error")))
-                sched.defer(req, Exception(resp_dict.get("error")))
-                continue
-            resp = Response(
-                url=resp_dict.get("url", ""),
-                status=resp_dict.get("status", 0),
-                text=resp_dict.get("text", ""),
-            )
-            links, items = Extractor.parse(resp, cfg)
-            for it in items:
-                it = Normalizer.run(it, cfg["items"])
-                if not Dedupe.seen(it, cfg["items"]):
-                    it.pop("__type__", None)
-                    for s in sinks:
-                        s.emit(it)
-                    telem.mark_emit()
-            total_items += len(items)
-            sched.enqueue(links)
-            telem.mark_success()
-        except Exception as e:  # pragma: no cover - simplified error path
-            telem.mark_error(e)
-            sched.defer(req, e)
-    print(
-        f"summary: success={telem.success} errors={telem.errors} emitted={telem.emitted}"
+def run_config(cfg: Config, resume: bool = False) -> Telemetry:
+    """Crawl an already loaded config; see :func:`run`."""
+    logger.configure(cfg.get("logging"))
+    plan = Extractor.compile(cfg)
+    norm = Normalizer.compile(cfg["items"])
+    telem = Telemetry.from_config(cfg)
+    crawl = _Crawl(
+        cfg=cfg,
+        sched=build_scheduler(cfg, resume=resume),
+        sinks=SinkDispatcher.from_config(
+            cfg, build_sinks(cfg["pipelines"]), on_write=telem.observe_sink
+        ),
+        telem=telem,
+        dedupe=Dedupe.from_config(cfg),
+        plan=plan,
+        norm=norm,
+        pool=ParsePool.from_config(cfg, plan, norm),
+        cache=HttpCache.from_config(cfg),
+        hooks=HookChain.from_config(cfg),
     )
-
+    # persisted frontier state must not get ahead of the items it produced
+    crawl.sched.before_commit = crawl.commit
+    if crawl.cache is not None:
+        crawl.cache.deferred = True
+    crawl.sched.seed(cfg.get("entrypoints") or [])
+    telem.track_queue(lambda: len(crawl.sched))
+    concurrency = _concurrency(cfg)
+    try:
+        if concurrency > 1:
+            asyncio.run(_run_async(crawl, concurrency))
+        else:
+            _run_sync(crawl)
+        plain = bool((cfg.get("scheduler") or {}).get("membership_stats"))
+        for name in ("visited", "pending"):
+            stats = membership_stats(getattr(crawl.sched, name), plain)
+            if stats is not None:
+                crawl.telem.record_membership(name, *stats)
+    finally:
+        if crawl.pool is not None:
+            crawl.pool.close()
+        crawl.sinks.close()
+        crawl.commit()
+        crawl.telem.record_sink_lag(crawl.sinks.lag())
+        crawl.sched.close()
+        crawl.dedupe.close()
+        if crawl.cache is not None:
+            crawl.cache.close()
+        crawl.hooks.close()
+        telem.close()
+        logger.shutdown()
+    print(crawl.telem.summary())
+    return crawl.telem
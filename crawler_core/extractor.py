@@ -1,161 +1,565 @@
 from __future__ import annotations
 
 import re
-from urllib.parse import urlparse
-from typing import Any, Dict, List, Tuple
+from dataclasses import dataclass, field
+from urllib.parse import urldefrag, urljoin, urlparse
+from typing import Any, Dict, List, Optional, Pattern, Tuple, Union
 
 from .types import Response
 
+try:  # soupsieve ships with beautifulsoup4
+    import soupsieve  # type: ignore
+except Exception:  # pragma: no cover - optional dependency path
+    soupsieve = None
 
-class Extractor:
-    """Very small extractor supporting a subset of CSS and regex."""
+try:
+    import lxml.html  # type: ignore
+    from lxml import etree  # type: ignore
+except Exception:  # pragma: no cover - optional dependency path
+    lxml = None  # type: ignore
+    etree = None
 
-    @staticmethod
-    def parse(resp: Response, cfg) -> Tuple[List[str], List[Dict[str, Any]]]:
-        items: List[Dict[str, Any]] = []
-        links: List[str] = []
-        text = resp.text
-        path = urlparse(resp.url).path
+try:
+    from cssselect import HTMLTranslator  # type: ignore
+except Exception:  # pragma: no cover - optional dependency path
+    HTMLTranslator = None  # type: ignore
+
+
+@dataclass
+class CandidatePlan:
+    """One field candidate with its selectors and patterns prebuilt."""
+
+    css: Optional[str] = None  # selector without ::text / ::attr() suffix
+    rel_css: Optional[str] = None  # same, relative to the item container
+    attr: Optional[str] = None
+    as_list: bool = False
+    select: Any = None  # compiled ``css``
+    rel_select: Any = None  # compiled ``rel_css``
+    regex: Optional[Pattern[str]] = None
+    xpath: Optional[str] = None
+    xpath_select: Any = None  # compiled ``xpath`` (lxml parser only)
+    # regex stand-ins for ``css`` when no HTML parser is available
+    fallback: Optional[str] = None
+    fallback_re: Optional[Pattern[str]] = None
+    fallback_inner: Optional[Pattern[str]] = None
+
+
+@dataclass
+class FieldPlan:
+    name: str
+    from_url: bool = False
+    candidates: List[CandidatePlan] = field(default_factory=list)
+
+
+@dataclass
+class ItemPlan:
+    name: str
+    match_url: Optional[Pattern[str]]
+    container: Optional[str]
+    container_select: Any
+    fields: List[FieldPlan]
+
+
+@dataclass
+class LinkPlan:
+    """``pagination``/``follow_rules``/``allowed_domains`` compiled for link discovery."""
+
+    pagination_css: Optional[str] = None
+    pagination_select: Any = None
+    follow: bool = False  # whether follow_rules is configured at all
+    allow: Optional[Pattern[str]] = None  # all allow patterns as one alternation
+    deny: Optional[Pattern[str]] = None
+    domains: Tuple[str, ...] = ()
 
-        soup = None
+
+@dataclass
+class ExtractionPlan:
+    """``items`` config compiled once by :meth:`Extractor.compile`.
+
+    Compiled lxml XPath objects can't be pickled, so a plan pickles as the
+    config subset it was built from and is recompiled on load (e.g. once per
+    parse worker process).
+    """
+
+    items: List[ItemPlan]
+    parser: str = "bs4"
+    links: Optional[LinkPlan] = None
+    source: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+
+    def __reduce__(self):
+        return Extractor.compile, (self.source,)
+
+
+_TAGS_BLOCK = re.compile(r"<div class=\"tags\">(.*?)</div>", re.S)
+_TAGS_LINK = re.compile(r"<a>(.*?)</a>")
+_ARTICLE = re.compile(r"<article[^>]*>(.*?)</article>", re.S)
+
+
+class _SoupBackend:
+    """BeautifulSoup (``html.parser``) tree with soupsieve selectors."""
+
+    name = "bs4"
+
+    @staticmethod
+    def parse(resp: Response):
         try:
             from bs4 import BeautifulSoup  # type: ignore
 
-            soup = BeautifulSoup(text, "html.parser")
+            return BeautifulSoup(resp.text, "html.parser")
         except Exception:
-            soup = None
+            return None
 
-        for name, icfg in cfg.get("items", {}).items():
-            match = icfg.get("match_url")
-            if match and not re.search(match, path):
-                continue
+    @staticmethod
+    def compile(expr: str, relative: bool) -> Any:
+        if soupsieve is None:
+            return None
+        try:
+            return soupsieve.compile(expr)
+        except Exception:
+            return False  # invalid selector: matches nothing
+
+    @staticmethod
+    def select(root, compiled: Any, expr: Optional[str]) -> list:
+        if compiled is False or not expr:
+            return []
+        if compiled is not None:
+            return compiled.select(root)
+        try:
+            return root.select(expr)
+        except Exception:
+            return []
+
+    @staticmethod
+    def hrefs(root) -> List[str]:
+        return [a["href"] for a in root.find_all("a", href=True)]
+
+    @staticmethod
+    def text(el) -> str:
+        return el.get_text(strip=True)
+
+    @staticmethod
+    def strings(el) -> List[str]:
+        return list(el.stripped_strings)
+
+    @staticmethod
+    def whole_text(el) -> str:
+        text = getattr(el, "text", None)
+        return str(el) if text is None else text
+
+
+class _LxmlBackend:
+    """``lxml.html`` tree with CSS compiled to XPath by cssselect.
+
+    The raw body is parsed with the sniffed charset, so the page is never
+    held as a decoded ``str`` as well. Text helpers mirror BeautifulSoup's
+    ``get_text(strip=True)`` and ``stripped_strings`` (script/style contents
+    and comments excluded) so both backends yield the same field values.
+    """
+
+    name = "lxml"
+    _parsers: Dict[str, Any] = {}
+    _strings = None
+
+    @classmethod
+    def _parser(cls, encoding: str) -> Any:
+        parser = cls._parsers.get(encoding)
+        if parser is None:
+            try:
+                parser = lxml.html.HTMLParser(encoding=encoding)
+            except LookupError:  # unknown charset name
+                parser = cls._parser("utf-8")
+            cls._parsers[encoding] = parser
+        return parser
+
+    @classmethod
+    def parse(cls, resp: Response):
+        if lxml is None:
+            return None
+        try:
+            return lxml.html.document_fromstring(
+                resp.content, parser=cls._parser(resp.encoding)
+            )
+        except Exception:
+            pass
+        try:  # bytes the codec rejects: parse the leniently decoded text
+            return lxml.html.document_fromstring(resp.text)
+        except Exception:
+            return None
+
+    @staticmethod
+    def compile(expr: str, relative: bool) -> Any:
+        if etree is None or HTMLTranslator is None:
+            raise RuntimeError("parser 'lxml' requires the lxml and cssselect packages")
+        try:
+            # match descendants only, like soupsieve's Tag.select()
+            prefix = "descendant::" if relative else "descendant-or-self::"
+            return etree.XPath(HTMLTranslator().css_to_xpath(expr, prefix=prefix))
+        except Exception:
+            return False
 
-            container_selector = icfg.get("list_selector")
-            if not container_selector:
+    @staticmethod
+    def select(root, compiled: Any, expr: Optional[str]) -> list:
+        if not compiled or not expr:
+            return []
+        return compiled(root)
+
+    @staticmethod
+    def hrefs(root) -> List[str]:
+        return [h for h in (a.get("href") for a in root.iter("a")) if h is not None]
+
+    @classmethod
+    def strings(cls, el) -> List[str]:
+        if cls._strings is None:
+            cls._strings = etree.XPath(
+                "descendant-or-self::text()"
+                "[not(parent::script or parent::style or parent::template)]"
+            )
+        return [t.strip() for t in cls._strings(el) if t.strip()]
+
+    @classmethod
+    def text(cls, el) -> str:
+        return "".join(cls.strings(el))
+
+    @staticmethod
+    def whole_text(el) -> str:
+        return el.text_content()
+
+
+_BACKENDS = {"bs4": _SoupBackend, "lxml": _LxmlBackend}
+
+
+def _compile_candidate(
+    cand: Dict[str, Any], container: Optional[str], backend: Any
+) -> CandidatePlan:
+    cp = CandidatePlan(as_list=cand.get("as") == "list")
+    if "css" in cand:
+        raw = cand["css"]
+        expr = raw
+        if expr.endswith("::text"):
+            expr = expr[:-6]
+        elif "::attr(" in expr:
+            base, _, attr = expr.partition("::attr(")
+            expr = base
+            cp.attr = attr.rstrip(")")
+        cp.css = expr
+        cp.select = backend.compile(expr, False)
+        rel = expr
+        if container and rel.startswith(container + " "):
+            rel = rel[len(container) + 1 :]
+        cp.rel_css = rel
+        cp.rel_select = backend.compile(rel, True)
+
+        if raw == "article" and cand.get("as") == "html":
+            cp.fallback, cp.fallback_re = "html", _ARTICLE
+        elif raw.endswith("::text"):
+            if expr.startswith(".tags a"):
+                cp.fallback, cp.fallback_re = "list", _TAGS_BLOCK
+                cp.fallback_inner = _TAGS_LINK
+            else:
+                tag, _, cls = expr.partition(".")
+                if cls:
+                    pattern = rf"<{tag}[^>]*class=\"[^\"]*{cls}[^\"]*\"[^>]*>(.*?)</{tag}>"
+                else:
+                    pattern = rf"<{tag}[^>]*>(.*?)</{tag}>"
+                cp.fallback, cp.fallback_re = "text", re.compile(pattern, re.S)
+        elif cp.attr:
+            pattern = rf"<{expr}[^>]*{cp.attr}=\"([^\"]+)\""
+            cp.fallback, cp.fallback_re = "attr", re.compile(pattern)
+    if "xpath" in cand:
+        cp.xpath = cand["xpath"]
+        if backend is _LxmlBackend and etree is not None:
+            cp.xpath_select = etree.XPath(cp.xpath)
+    if "regex" in cand:
+        cp.regex = re.compile(cand["regex"])
+    return cp
+
+
+# config keys a plan is compiled from
+_PLAN_KEYS = ("items", "parser", "pagination", "follow_rules", "allowed_domains", "base_url")
+
+
+def _combine(patterns: List[str]) -> Optional[Pattern[str]]:
+    return re.compile("|".join(f"(?:{p})" for p in patterns)) if patterns else None
+
+
+def _compile_links(cfg, backend: Any) -> Optional[LinkPlan]:
+    pagination = cfg.get("pagination") or {}
+    rules = cfg.get("follow_rules")
+    lp = LinkPlan(follow=rules is not None)
+    if pagination.get("type") == "next_link" and pagination.get("selector"):
+        lp.pagination_css = pagination["selector"]
+        lp.pagination_select = backend.compile(lp.pagination_css, False)
+    if lp.pagination_css is None and not lp.follow:
+        return None
+    rules = rules or {}
+    lp.allow = _combine(rules.get("allow") or [])
+    lp.deny = _combine(rules.get("deny") or [])
+    domains = cfg.get("allowed_domains") or []
+    if not domains and cfg.get("base_url"):
+        # never wander off the configured site by default
+        domains = [urlparse(cfg["base_url"]).hostname or ""]
+    lp.domains = tuple(d.lower().lstrip(".") for d in domains if d)
+    return lp
+
+
+def _allowed_domain(host: str, domains: Tuple[str, ...]) -> bool:
+    return not domains or any(host == d or host.endswith("." + d) for d in domains)
+
+
+class Extractor:
+    """Very small extractor supporting a subset of CSS and regex."""
+
+    @staticmethod
+    def compile(cfg) -> ExtractionPlan:
+        """Compile ``cfg["items"]`` into a plan that :meth:`parse` runs directly.
+
+        URL patterns and regex candidates are compiled, ``::text``/``::attr()``
+        suffixes are parsed off, selectors are made relative to the item
+        container and precompiled for the selected ``parser`` backend: soupsieve
+        for ``bs4`` (the default), cssselect-generated XPath for ``lxml``.
+        ``xpath`` candidates need ``lxml``, which is picked automatically
+        when the config uses them without naming a parser; naming another
+        parser raises ``ValueError``.
+        """
+        items_cfg = cfg.get("items") or {}
+        parser = cfg.get("parser") or (
+            "lxml"
+            if any(
+                "xpath" in cand
+                for icfg in items_cfg.values()
+                for fcfg in icfg.get("fields", {}).values()
+                for cand in fcfg.get("candidates", [])
+            )
+            else "bs4"
+        )
+        if parser not in _BACKENDS:
+            raise ValueError(f"unknown parser: {parser}")
+        backend = _BACKENDS[parser]
+        plans: List[ItemPlan] = []
+        for name, icfg in items_cfg.items():
+            match = icfg.get("match_url")
+            container = icfg.get("list_selector")
+            if not container:
                 # backward compatible heuristic for Douban list
                 for _field, fcfg in icfg.get("fields", {}).items():
                     for cand in fcfg.get("candidates", []):
                         sel = cand.get("css")
                         if isinstance(sel, str) and "ol.grid_view li" in sel:
-                            container_selector = "ol.grid_view li"
+                            container = "ol.grid_view li"
                             break
-                    if container_selector:
+                    if container:
                         break
+            for fname, fcfg in icfg.get("fields", {}).items():
+                if parser != "lxml" and any(
+                    "xpath" in cand for cand in fcfg.get("candidates", [])
+                ):
+                    raise ValueError(
+                        f"{name}.{fname}: xpath candidates need parser 'lxml', "
+                        f"not {parser!r}"
+                    )
+            fields = [
+                FieldPlan(
+                    name=fname,
+                    from_url=fcfg.get("from") == "meta.url",
+                    candidates=[
+                        _compile_candidate(c, container, backend)
+                        for c in fcfg.get("candidates", [])
+                    ],
+                )
+                for fname, fcfg in icfg.get("fields", {}).items()
+            ]
+            plans.append(
+                ItemPlan(
+                    name=name,
+                    match_url=re.compile(match) if match else None,
+                    container=container,
+                    container_select=(
+                        backend.compile(container, False) if container else None
+                    ),
+                    fields=fields,
+                )
+            )
+        source = {k: cfg.get(k) for k in _PLAN_KEYS if cfg.get(k) is not None}
+        return ExtractionPlan(
+            items=plans,
+            parser=parser,
+            links=_compile_links(cfg, backend),
+            source=source,
+        )
+
+    @staticmethod
+    def parse(
+        resp: Response, cfg: Union[ExtractionPlan, Dict[str, Any]]
+    ) -> Tuple[List[str], List[Dict[str, Any]]]:
+        plan = cfg if isinstance(cfg, ExtractionPlan) else Extractor.compile(cfg)
+        items: List[Dict[str, Any]] = []
+        text: Optional[str] = None  # decoded only for regex fallbacks
+        path = urlparse(resp.url).path
+
+        dom = _BACKENDS[plan.parser]
+        soup = dom.parse(resp)
+        links = Extractor.links(resp, plan, soup)
+
+        for ip in plan.items:
+            if ip.match_url is not None and not ip.match_url.search(path):
+                continue
 
-            if soup is not None and container_selector:
-                nodes = soup.select(container_selector)
+            if soup is not None and ip.container:
+                nodes = dom.select(soup, ip.container_select, ip.container)
                 for node in nodes:
-                    data: Dict[str, Any] = {"__type__": name}
-                    for field, fcfg in icfg.get("fields", {}).items():
+                    data: Dict[str, Any] = {"__type__": ip.name}
+                    for fp in ip.fields:
                         value = None
-                        if fcfg.get("from") == "meta.url":
+                        if fp.from_url:
                             value = resp.url
                         else:
-                            for cand in fcfg.get("candidates", []):
-                                value = Extractor._apply_candidate_bs(node, cand, container_selector)
+                            for cp in fp.candidates:
+                                value = Extractor._apply_candidate_dom(
+                                    dom, node, cp, True
+                                )
                                 if value not in (None, "", []):
                                     break
-                        data[field] = value
+                        data[fp.name] = value
                     items.append(data)
             else:
                 # Fallback: single-item extraction using simplistic CSS/regex rules
-                data: Dict[str, Any] = {"__type__": name}
-                for field, fcfg in icfg.get("fields", {}).items():
+                data = {"__type__": ip.name}
+                for fp in ip.fields:
                     value = None
-                    if fcfg.get("from") == "meta.url":
+                    if fp.from_url:
                         value = resp.url
                     else:
-                        for cand in fcfg.get("candidates", []):
-                            if soup is not None and "css" in cand:
-                                value = Extractor._apply_candidate_bs(soup, cand, None)
+                        for cp in fp.candidates:
+                            if soup is not None and (
+                                cp.css is not None or cp.xpath_select is not None
+                            ):
+                                value = Extractor._apply_candidate_dom(
+                                    dom, soup, cp, False
+                                )
                             else:
-                                value = Extractor._apply_candidate(text, cand)
+                                if text is None:
+                                    text = resp.text
+                                value = Extractor._apply_candidate(text, cp)
                             if value not in (None, ""):
                                 break
-                    data[field] = value
+                    data[fp.name] = value
                 items.append(data)
         return links, items
 
     @staticmethod
-    def _apply_candidate(text: str, cand: Dict[str, Any]):
-        if "css" in cand:
-            expr = cand["css"]
-            if expr == "article" and cand.get("as") == "html":
-                m = re.search(r"<article[^>]*>(.*?)</article>", text, re.S)
+    def links(resp: Response, plan: ExtractionPlan, doc: Any = None) -> List[str]:
+        """Absolute URLs on the page worth enqueueing.
+
+        The ``pagination`` next link is always followed; every other anchor
+        is collected in a single pass and kept when it passes the combined
+        ``follow_rules`` allow/deny patterns (matched against path + query).
+        Both are restricted to ``allowed_domains``. ``doc`` is the already
+        parsed page, if the caller has one.
+        """
+        lp = plan.links
+        if lp is None:
+            return []
+        dom = _BACKENDS[plan.parser]
+        if doc is None:
+            doc = dom.parse(resp)
+            if doc is None:
+                return []
+        out: List[str] = []
+        seen: set[str] = set()
+
+        def keep(href: Optional[str], follow_rule: bool) -> None:
+            if not href:
+                return
+            url = urldefrag(urljoin(resp.url, href.strip()))[0]
+            if url in seen:
+                return
+            parts = urlparse(url)
+            if parts.scheme not in ("http", "https"):
+                return
+            if not _allowed_domain((parts.hostname or "").lower(), lp.domains):
+                return
+            if follow_rule:
+                target = parts.path + ("?" + parts.query if parts.query else "")
+                if lp.allow is not None and not lp.allow.search(target):
+                    return
+                if lp.deny is not None and lp.deny.search(target):
+                    return
+            seen.add(url)
+            out.append(url)
+
+        if lp.pagination_css is not None:
+            for el in dom.select(doc, lp.pagination_select, lp.pagination_css):
+                keep(el.get("href"), False)
+        if lp.follow:
+            for href in dom.hrefs(doc):
+                keep(href, True)
+        return out
+
+    @staticmethod
+    def _apply_candidate(text: str, cp: CandidatePlan):
+        if cp.fallback is not None and cp.fallback_re is not None:
+            if cp.fallback == "html":
+                m = cp.fallback_re.search(text)
                 return m.group(0) if m else None
-            if expr.endswith("::text"):
-                expr = expr[:-6]
-                if expr.startswith(".tags a"):
-                    block = re.search(r"<div class=\"tags\">(.*?)</div>", text, re.S)
-                    if block:
-                        return re.findall(r"<a>(.*?)</a>", block.group(1))
-                    return []
-                tag, _, cls = expr.partition(".")
-                if cls:
-                    pattern = rf"<{tag}[^>]*class=\"[^\"]*{cls}[^\"]*\"[^>]*>(.*?)</{tag}>"
-                else:
-                    pattern = rf"<{tag}[^>]*>(.*?)</{tag}>"
-                m = re.search(pattern, text, re.S)
+            if cp.fallback == "list":
+                block = cp.fallback_re.search(text)
+                if block and cp.fallback_inner is not None:
+                    return cp.fallback_inner.findall(block.group(1))
+                return []
+            m = cp.fallback_re.search(text)
+            if cp.fallback == "text":
                 return m.group(1).strip() if m else None
-            if "::attr(" in expr:
-                tag, _, attr = expr.partition("::attr(")
-                attr = attr.rstrip(")")
-                pattern = rf"<{tag}[^>]*{attr}=\"([^\"]+)\""
-                m = re.search(pattern, text)
-                return m.group(1) if m else None
-        if "regex" in cand:
-            m = re.search(cand["regex"], text)
+            return m.group(1) if m else None
+        if cp.regex is not None:
+            m = cp.regex.search(text)
             if m:
                 return m.group(1) if m.groups() else m.group(0)
         return None
 
     @staticmethod
-    def _apply_candidate_bs(root, cand: Dict[str, Any], container_sel: str | None):
-        # root can be BeautifulSoup object or a Tag (node)
-        if "css" in cand:
-            expr = cand["css"]
-            as_list = cand.get("as") == "list"
-            # handle ::text and ::attr()
-            attr_name = None
-            if expr.endswith("::text"):
-                expr = expr[:-6]
-            elif "::attr(" in expr:
-                base, _, attr = expr.partition("::attr(")
-                expr = base
-                attr_name = attr.rstrip(")")
-            # make selector relative by removing container prefix if present
-            if container_sel and expr.startswith(container_sel + " "):
-                expr = expr[len(container_sel) + 1 :]
-
-            try:
-                matches = root.select(expr)
-            except Exception:
-                matches = []
+    def _apply_candidate_dom(dom, root, cp: CandidatePlan, relative: bool):
+        # root is the parsed document or one container node of it
+        if cp.css is not None:
+            if relative:
+                matches = dom.select(root, cp.rel_select, cp.rel_css)
+            else:
+                matches = dom.select(root, cp.select, cp.css)
 
             if not matches:
-                return [] if as_list else None
+                return [] if cp.as_list else None
 
-            if attr_name:
-                vals = [m.get(attr_name) for m in matches if m and m.get(attr_name) is not None]
-                return vals if as_list else (vals[0] if vals else None)
+            if cp.attr:
+                vals = [v for v in (m.get(cp.attr) for m in matches) if v is not None]
+                return vals if cp.as_list else (vals[0] if vals else None)
 
             # text extraction
-            if as_list:
+            if cp.as_list:
                 texts: List[str] = []
                 for m in matches:
                     # collect stripped strings under each match
-                    for s in m.stripped_strings:
-                        texts.append(s)
+                    texts.extend(dom.strings(m))
                 return texts
             else:
                 # First match text
-                m = matches[0]
-                return m.get_text(strip=True)
-        if "regex" in cand:
-            text = getattr(root, "text", None)
-            if text is None:
-                text = str(root)
-            m = re.search(cand["regex"], text)
+                return dom.text(matches[0])
+        if cp.xpath_select is not None:
+            results = cp.xpath_select(root)
+            if not isinstance(results, list):
+                return results
+            values: List[Any] = []
+            for r in results:
+                if isinstance(r, str):
+                    if r.strip():
+                        values.append(r.strip())
+                elif cp.as_list:
+                    values.extend(dom.strings(r))
+                else:
+                    values.append(dom.text(r))
+            if cp.as_list:
+                return values
+            return values[0] if values else None
+        if cp.regex is not None:
+            m = cp.regex.search(dom.whole_text(root))
             if m:
                 return m.group(1) if m.groups() else m.group(0)
         return None
@@ -3,14 +3,55 @@ from __future__ import annotations
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 from urllib.parse import urlparse
 
 import httpx
 
+from .anti.adaptive import AdaptiveLimiter, parse_retry_after
+from .anti.rate_limit import RateLimiter
+from .http_cache import HttpCache
 from .logger import info, warn, error
 
 
+def _accept_encoding() -> str:
+    """Content codings httpx can decode with the packages installed here."""
+    codings = ["gzip", "deflate"]
+    for coding, modules in (("br", ("brotli", "brotlicffi")), ("zstd", ("zstandard",))):
+        for module in modules:
+            try:
+                __import__(module)
+            except ImportError:
+                continue
+            codings.append(coding)
+            break
+    return ", ".join(codings)
+
+
+@dataclass
+class PoolStats:
+    """Connection reuse counters, fed by httpcore's ``trace`` extension."""
+
+    requests: int = 0
+    new_connections: int = 0
+    tls_handshakes: int = 0
+
+    @property
+    def reused(self) -> int:
+        return max(0, self.requests - self.new_connections)
+
+    def trace(self, event: str, _info: dict) -> None:
+        if event == "connection.connect_tcp.complete":
+            self.new_connections += 1
+        elif event == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+        elif event.endswith(".receive_response_headers.complete"):
+            self.requests += 1
+
+    async def trace_async(self, event: str, info: dict) -> None:
+        self.trace(event, info)
+
+
 @dataclass
 class FetchRequest:
     url: str
@@ -20,23 +61,70 @@ class FetchRequest:
 
 
 class Fetcher:
-    """httpx based fetcher with minimal options."""
+    """httpx based fetcher with minimal options.
 
-    client = httpx.Client(follow_redirects=True)
+    Each fetcher owns its connection pool, sized from ``request.pool``
+    (``max_connections``, ``max_keepalive_connections``, ``keepalive_expiry_s``,
+    ``http2``); call :meth:`close` when done with it.
 
-    def __init__(self, cfg: Any) -> None:
-        req_cfg = (
-            getattr(cfg, "request", {})
-            if hasattr(cfg, "request")
-            else cfg.get("request", {})
-        )
+    Bodies are streamed. A download is abandoned, and the fetch dict marked
+    ``skipped``, as soon as it exceeds ``request.max_body_bytes`` or its
+    Content-Type matches none of ``request.allowed_content_types``. Fetch
+    dicts carry the raw ``content`` only; decoding is left to ``Response``.
+    """
+
+    def __init__(
+        self,
+        cfg: Any,
+        limiter: Optional[RateLimiter] = None,
+        cache: Optional[HttpCache] = None,
+        adaptive: Optional[AdaptiveLimiter] = None,
+    ) -> None:
+        req_cfg = cfg.get("request") or {}
+        # pass a shared limiter to throttle several fetchers as one client
+        self.limiter = limiter or RateLimiter.from_config(req_cfg)
+        self.adaptive = adaptive or AdaptiveLimiter.from_config(req_cfg)
+        self.cache = cache
         self.verify = req_cfg.get("verify", True)
         self.timeout = req_cfg.get("timeout_s", 15) or 15
+        self.max_body_bytes = int(req_cfg.get("max_body_bytes", 0) or 0)
+        self.allowed_types = tuple(
+            t.lower() for t in req_cfg.get("allowed_content_types") or ()
+        )
         self.default_headers = {
             "User-Agent": "confdriven-crawler/0.1 (+https://example.local)",
             "Accept": "*/*",
+            "Accept-Encoding": _accept_encoding(),
+        }
+        self.stats = PoolStats()
+        self.client = self._make_client(req_cfg.get("pool") or {})
+
+    def _client_kwargs(self, pool_cfg: Dict[str, Any]) -> Dict[str, Any]:
+        http2 = bool(pool_cfg.get("http2", False))
+        if http2:
+            try:
+                import h2  # type: ignore  # noqa: F401
+            except ImportError:
+                warn("fetch", err="HTTP2_UNAVAILABLE", hint="pip install httpx[http2]")
+                http2 = False
+        limits = httpx.Limits(
+            max_connections=pool_cfg.get("max_connections", 100),
+            max_keepalive_connections=pool_cfg.get("max_keepalive_connections", 20),
+            keepalive_expiry=pool_cfg.get("keepalive_expiry_s", 5.0),
+        )
+        return {
+            "follow_redirects": True,
+            "verify": self.verify,
+            "http2": http2,
+            "limits": limits,
         }
 
+    def _make_client(self, pool_cfg: Dict[str, Any]) -> Any:
+        return httpx.Client(**self._client_kwargs(pool_cfg))
+
+    def close(self) -> None:
+        self.client.close()
+
     # --- helpers ---------------------------------------------------------
     def _coerce(self, req: Union[FetchRequest, Dict[str, Any], str]) -> FetchRequest:
         if isinstance(req, FetchRequest):
@@ -57,7 +145,7 @@ class Fetcher:
             p = root / Path(path).relative_to("/workspace/spider")
         if not p.exists():
             error("fetch", url=url, err="FILE_NOT_FOUND")
-            return {"url": url, "error": "file not found", "status": 0, "headers": {}, "content": b"", "text": "", "elapsed": 0.0}
+            return {"url": url, "error": "file not found", "status": 0, "headers": {}, "content": b"", "elapsed": 0.0}
         start = time.time()
         body = p.read_bytes()
         elapsed = time.time() - start
@@ -67,7 +155,96 @@ class Fetcher:
             "status": 200,
             "headers": {},
             "content": body,
-            "text": body.decode("utf-8", errors="replace"),
+            "elapsed": elapsed,
+        }
+
+    def _headers(self, fr: FetchRequest) -> Dict[str, str]:
+        headers = dict(self.default_headers)
+        if self.cache is not None and fr.method == "GET":
+            headers.update(self.cache.conditional_headers(fr.url))
+        if fr.headers:
+            headers.update(fr.headers)
+        return headers
+
+    def _skip_reason(self, resp: httpx.Response) -> Optional[str]:
+        """Why ``resp`` is not worth downloading, judged from its headers."""
+        if self.allowed_types and 200 <= resp.status_code < 300:
+            ctype = resp.headers.get("content-type", "").split(";")[0].strip().lower()
+            if not ctype.startswith(self.allowed_types):
+                return f"content-type {ctype or 'missing'}"
+        length = resp.headers.get("content-length", "")
+        if self.max_body_bytes and length.isdigit() and int(length) > self.max_body_bytes:
+            return "body too large"
+        return None
+
+    def _take(self, chunks: List[bytes], size: int, chunk: bytes) -> int:
+        """Buffer ``chunk``; return the new size, or -1 once over the cap."""
+        size += len(chunk)
+        if self.max_body_bytes and size > self.max_body_bytes:
+            return -1
+        chunks.append(chunk)
+        return size
+
+    def _skipped(
+        self, fr: FetchRequest, resp: httpx.Response, reason: str, elapsed: float
+    ) -> Dict[str, Any]:
+        warn("fetch", url=fr.url, status=resp.status_code, skipped=reason)
+        return {
+            "url": fr.url,
+            "status": resp.status_code,
+            "headers": dict(resp.headers),
+            "content": b"",
+            "elapsed": elapsed,
+            "skipped": reason,
+        }
+
+    def _release(
+        self,
+        host: str,
+        started: float,
+        resp: Optional[httpx.Response],
+        failure: Optional[httpx.HTTPError],
+    ) -> None:
+        """Report how a fetch went to the adaptive limiter."""
+        if self.adaptive is None:
+            return
+        timeout = isinstance(failure, httpx.TimeoutException)
+        if resp is None or (failure is not None and not timeout):
+            self.adaptive.release(host, started, timeout=timeout)
+            return
+        self.adaptive.release(
+            host,
+            started,
+            resp.status_code,
+            parse_retry_after(resp.headers.get("retry-after")),
+            timeout,
+        )
+
+    def _result(
+        self, fr: FetchRequest, resp: httpx.Response, body: bytes, elapsed: float
+    ) -> Dict[str, Any]:
+        """Fetch dict for ``resp``; a 304 is answered from the cache."""
+        url = fr.url
+        info("fetch", url=url, status=resp.status_code, ms=int(elapsed * 1000))
+        if self.cache is not None and fr.method == "GET":
+            if resp.status_code == 304:
+                cached = self.cache.not_modified(url, dict(resp.headers))
+                if cached is not None:
+                    return {
+                        "url": url,
+                        "status": cached["status"],
+                        "headers": cached["headers"],
+                        "content": cached["content"],
+                        "elapsed": elapsed,
+                        "not_modified": True,
+                    }
+            else:
+                self.cache.store(url, resp.status_code, dict(resp.headers), body)
+        return {
+            "url": url,
+            "status": resp.status_code,
+            "headers": dict(resp.headers),
+            "content": body,
             "elapsed": elapsed,
         }
 
@@ -78,60 +255,115 @@ class Fetcher:
         if url.startswith("file://"):
             return self._file_fetch(url)
 
-        headers = dict(self.default_headers)
-        if fr.headers:
-            headers.update(fr.headers)
+        headers = self._headers(fr)
+        host = urlparse(url).hostname or ""
+        if self.limiter is not None:
+            self.limiter.acquire(host)
+        slot = self.adaptive.acquire(host) if self.adaptive is not None else 0.0
         start = time.time()
+        chunks: List[bytes] = []
+        resp: Optional[httpx.Response] = None
+        failure: Optional[httpx.HTTPError] = None
         try:
-            resp = self.client.request(
+            with self.client.stream(
                 fr.method,
                 url,
                 headers=headers,
                 content=fr.data,
                 timeout=self.timeout,
-            )
+                extensions={"trace": self.stats.trace},
+            ) as resp:
+                skipped = self._skip_reason(resp)
+                if skipped is None:
+                    size = 0
+                    for chunk in resp.iter_bytes():
+                        size = self._take(chunks, size, chunk)
+                        if size < 0:
+                            skipped = "body too large"
+                            break
         except httpx.HTTPError as e:
-            if (not self.verify) and "certificate" in str(e).lower():
-                warn("fetch", url=url, err="SSL_CERT")
-                try:
-                    resp = self.client.request(
-                        fr.method,
-                        url,
-                        headers=headers,
-                        content=fr.data,
-                        timeout=self.timeout,
-                        verify=False,
-                    )
-                except httpx.HTTPError as e2:
-                    error("fetch", url=url, err="SSL_CERT")
-                    return {
-                        "url": url,
-                        "error": str(e2),
-                        "status": None,
-                        "headers": {},
-                        "content": b"",
-                        "text": "",
-                        "elapsed": time.time() - start,
-                    }
-            else:
-                error("fetch", url=url, err=str(e))
-                return {
-                    "url": url,
-                    "error": str(e),
-                    "status": None,
-                    "headers": {},
-                    "content": b"",
-                    "text": "",
-                    "elapsed": time.time() - start,
-                }
-        body = resp.content
-        elapsed = time.time() - start
-        info("fetch", url=url, status=resp.status_code, ms=int(elapsed * 1000))
-        return {
-            "url": url,
-            "status": resp.status_code,
-            "headers": dict(resp.headers),
-            "content": body,
-            "text": body.decode(resp.encoding or "utf-8", errors="replace"),
-            "elapsed": elapsed,
-        }
+            failure = e
+            error("fetch", url=url, err=str(e))
+            return {
+                "url": url,
+                "error": str(e),
+                "status": None,
+                "headers": {},
+                "content": b"",
+                "elapsed": time.time() - start,
+            }
+        finally:
+            self._release(host, slot, resp, failure)
+        if skipped is not None:
+            return self._skipped(fr, resp, skipped, time.time() - start)
+        return self._result(fr, resp, b"".join(chunks), time.time() - start)
+
+
+class AsyncFetcher(Fetcher):
+    """``httpx.AsyncClient`` variant of :class:`Fetcher` for the async engine."""
+
+    def __init__(
+        self,
+        cfg: Any,
+        limiter: Optional[RateLimiter] = None,
+        cache: Optional[HttpCache] = None,
+        adaptive: Optional[AdaptiveLimiter] = None,
+    ) -> None:
+        super().__init__(cfg, limiter, cache, adaptive)
+
+    def _make_client(self, pool_cfg: Dict[str, Any]) -> Any:
+        return httpx.AsyncClient(**self._client_kwargs(pool_cfg))
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def get(self, req: Union[FetchRequest, Dict[str, Any], str]):  # type: ignore[override]
+        fr = self._coerce(req)
+        url = fr.url
+        if url.startswith("file://"):
+            return self._file_fetch(url)
+
+        headers = self._headers(fr)
+        host = urlparse(url).hostname or ""
+        if self.limiter is not None:
+            await self.limiter.acquire_async(host)
+        slot = 0.0
+        if self.adaptive is not None:
+            slot = await self.adaptive.acquire_async(host)
+        start = time.time()
+        chunks: List[bytes] = []
+        resp: Optional[httpx.Response] = None
+        failure: Optional[httpx.HTTPError] = None
+        try:
+            async with self.client.stream(
+                fr.method,
+                url,
+                headers=headers,
+                content=fr.data,
+                timeout=self.timeout,
+                extensions={"trace": self.stats.trace_async},
+            ) as resp:
+                skipped = self._skip_reason(resp)
+                if skipped is None:
+                    size = 0
+                    async for chunk in resp.aiter_bytes():
+                        size = self._take(chunks, size, chunk)
+                        if size < 0:
+                            skipped = "body too large"
+                            break
+        except httpx.HTTPError as e:
+            failure = e
+            error("fetch", url=url, err=str(e))
+            return {
+                "url": url,
+                "error": str(e),
+                "status": None,
+                "headers": {},
+                "content": b"",
+                "elapsed": time.time() - start,
+            }
+        finally:
+            self._release(host, slot, resp, failure)
+        if skipped is not None:
+            return self._skipped(fr, resp, skipped, time.time() - start)
+        return self._result(fr, resp, b"".join(chunks), time.time() - start)
@@ -1,4 +1,24 @@
+from __future__ import annotations
+
+import cProfile
+import importlib
+import json
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+_POINTS = ("pre_request", "post_response", "pre_store", "on_error", "post_request")
+
+
 class Hooks:
+    """Base class for engine hooks; override only the points you need.
+
+    ``context`` is the request's ``meta`` dict, shared by every point of one
+    request. Hooks mutate their arguments in place; return values are ignored.
+    """
+
     def pre_request(self, request, context):  # pragma: no cover - placeholder
         pass
 
@@ -11,3 +31,148 @@ class Hooks:
     def on_error(self, error, context):  # pragma: no cover - placeholder
         pass
 
+    def post_request(self, request, context):  # pragma: no cover - placeholder
+        pass
+
+    def close(self) -> None:  # pragma: no cover - placeholder
+        pass
+
+
+class HookChain:
+    """Per hook point, the bound methods of the hooks that override it.
+
+    Resolved once per run, so the engine can skip a point with a single
+    truthiness check when no hook implements it.
+    """
+
+    def __init__(self, hooks: Sequence[Hooks] = ()) -> None:
+        self.hooks = list(hooks)
+        for point in _POINTS:
+            base = getattr(Hooks, point)
+            fns: Tuple[Callable[[Any, Dict[str, Any]], Any], ...] = tuple(
+                getattr(h, point)
+                for h in self.hooks
+                if getattr(type(h), point, base) is not base
+            )
+            setattr(self, point, fns)
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "HookChain":
+        """Instantiate ``hooks`` entries: ``"module:Class"`` or ``{class, options}``."""
+        hooks: List[Hooks] = []
+        for spec in cfg.get("hooks") or ():
+            if isinstance(spec, str):
+                spec = {"class": spec}
+            module, _, name = spec["class"].partition(":")
+            factory = getattr(importlib.import_module(module), name)
+            hooks.append(factory(**(spec.get("options") or {})))
+        return cls(hooks)
+
+    def __bool__(self) -> bool:
+        return bool(self.hooks)
+
+    def close(self) -> None:
+        for h in self.hooks:
+            h.close()
+
+
+class ProfilingHook(Hooks):
+    """Per-URL timing spans, with sampled cProfile/tracemalloc runs.
+
+    Every request gets a span of fetch time (``pre_request`` to
+    ``post_response``) and total time; the last ``keep`` spans are kept and
+    written to ``<out_dir>/spans.jsonl`` on close. With ``every_n`` set,
+    every Nth request is profiled with ``mode`` (``cprofile`` or
+    ``tracemalloc``) into ``<out_dir>/<n>.prof`` / ``<n>.tracemalloc.txt``.
+    Only one request is sampled at a time; in the async engine the sample
+    also covers whatever else runs concurrently.
+    """
+
+    def __init__(
+        self,
+        every_n: int = 0,
+        mode: str = "cprofile",
+        out_dir: str = "out/profiles",
+        keep: int = 10_000,
+        top: int = 25,
+    ) -> None:
+        if mode not in ("cprofile", "tracemalloc"):
+            raise ValueError(f"unknown profiling mode: {mode}")
+        self.every_n = every_n
+        self.mode = mode
+        self.out_dir = Path(out_dir)
+        self.top = top
+        self.spans: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self.requests = 0
+        self._sampling: Optional[str] = None  # url of the request being sampled
+        self._profiler: Optional[cProfile.Profile] = None
+
+    def pre_request(self, request, context):
+        self.requests += 1
+        context["profile"] = {"start": time.perf_counter(), "n": self.requests}
+        if self.every_n and self._sampling is None and self.requests % self.every_n == 0:
+            self._start_sample(request.url)
+
+    def post_response(self, response, context):
+        span = context.get("profile")
+        if span is not None:
+            span["fetched"] = time.perf_counter()
+
+    def on_error(self, error, context):
+        span = context.get("profile")
+        if span is not None:
+            span["error"] = repr(error)
+
+    def post_request(self, request, context):
+        span = context.pop("profile", None)
+        if span is None:
+            return
+        end = time.perf_counter()
+        fetched = span.get("fetched", end)
+        record = {
+            "url": request.url,
+            "fetch_s": round(fetched - span["start"], 6),
+            "process_s": round(end - fetched, 6),
+            "total_s": round(end - span["start"], 6),
+        }
+        if "error" in span:
+            record["error"] = span["error"]
+        self.spans.append(record)
+        if self._sampling == request.url:
+            self._stop_sample(span["n"])
+
+    def _start_sample(self, url: str) -> None:
+        self._sampling = url
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _stop_sample(self, n: int) -> None:
+        self._sampling = None
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(str(self.out_dir / f"{n:06d}.prof"))
+            self._profiler = None
+        elif tracemalloc.is_tracing():
+            stats = tracemalloc.take_snapshot().statistics("lineno")[: self.top]
+            tracemalloc.stop()
+            (self.out_dir / f"{n:06d}.tracemalloc.txt").write_text(
+                "\n".join(str(s) for s in stats) + "\n", encoding="utf-8"
+            )
+
+    def close(self) -> None:
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler = None
+        if tracemalloc.is_tracing() and self._sampling is not None:
+            tracemalloc.stop()
+        self._sampling = None
+        if not self.spans:
+            return
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.out_dir / "spans.jsonl", "w", encoding="utf-8") as f:
+            for record in self.spans:
+                f.write(json.dumps(record) + "\n")
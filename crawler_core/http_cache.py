@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonical_url(url: str) -> str:
+    """``url`` with scheme/host lowercased, default port, fragment dropped and query sorted."""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+class HttpCache:
+    """On-disk response cache for conditional recrawls.
+
+    Responses that carry an ``ETag`` or ``Last-Modified`` validator are stored
+    by canonical URL; :meth:`conditional_headers` turns them into
+    ``If-None-Match``/``If-Modified-Since`` for the next fetch, and a 304 is
+    answered from the stored body. Entries older than ``ttl_s`` are dropped,
+    and once the stored bodies exceed ``max_bytes`` the least recently used
+    entries are evicted. ``0`` disables either bound.
+
+    With ``deferred`` set (the engine does), a stored response is held in
+    memory until :meth:`keep` says its page's items were handed to the sinks,
+    and nothing is committed until :meth:`flush`; :meth:`rollback` drops what
+    was kept since. A later run then never gets a 304, and skips the items,
+    for a page whose items were not written.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 0,
+        ttl_s: float = 0,
+        commit_every: int = 100,
+    ) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, "
+            "status INTEGER, headers TEXT, body BLOB, etag TEXT, "
+            "last_modified TEXT, size INTEGER, stored_at REAL, used_at REAL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_used ON responses (used_at)"
+        )
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.commit_every = max(1, commit_every)
+        self._uncommitted = 0
+        self.deferred = False
+        self._held: Dict[str, Tuple[Any, ...]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.size = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if ttl_s:
+            self._expire()
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> Optional["HttpCache"]:
+        ccfg = cfg.get("http_cache") or {}
+        if not ccfg.get("path"):
+            return None
+        return cls(
+            ccfg["path"],
+            max_bytes=int(ccfg.get("max_bytes", 0)),
+            ttl_s=float(ccfg.get("ttl_s", 0)),
+        )
+
+    def _fresh(self, stored_at: float) -> bool:
+        return not self.ttl_s or time.time() - stored_at < self.ttl_s
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        row = self.conn.execute(
+            "SELECT etag, last_modified, stored_at FROM responses WHERE url = ?",
+            (canonical_url(url),),
+        ).fetchone()
+        if row is None or not self._fresh(row[2]):
+            return {}
+        headers = {}
+        if row[0]:
+            headers["If-None-Match"] = row[0]
+        if row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def not_modified(self, url: str, headers: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Cached response for a 304 on ``url``, refreshing its validators."""
+        key = canonical_url(url)
+        row = self.conn.execute(
+            "SELECT status, headers, body, etag, last_modified FROM responses "
+            "WHERE url = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        now = time.time()
+        lower = {k.lower(): v for k, v in headers.items()}
+        self.conn.execute(
+            "UPDATE responses SET etag = ?, last_modified = ?, stored_at = ?, "
+            "used_at = ? WHERE url = ?",
+            (lower.get("etag", row[3]), lower.get("last-modified", row[4]), now, now, key),
+        )
+        self._tick()
+        return {"status": row[0], "headers": json.loads(row[1]), "content": row[2]}
+
+    def store(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> None:
+        lower = {k.lower(): v for k, v in headers.items()}
+        etag, last_modified = lower.get("etag"), lower.get("last-modified")
+        if status != 200 or not (etag or last_modified):
+            return
+        if "no-store" in lower.get("cache-control", ""):
+            return
+        key = canonical_url(url)
+        now = time.time()
+        row = (
+            key, status, json.dumps(headers), body, etag, last_modified, len(body), now, now
+        )
+        if self.deferred:
+            self._held[key] = row
+        else:
+            self._write(row)
+
+    def _write(self, row: Tuple[Any, ...]) -> None:
+        key, size = row[0], row[6]
+        old = self.conn.execute(
+            "SELECT size FROM responses WHERE url = ?", (key,)
+        ).fetchone()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row
+        )
+        self.size += size - (old[0] if old else 0)
+        if self.max_bytes and self.size > self.max_bytes:
+            self._evict()
+        self._tick()
+
+    def keep(self, url: str) -> None:
+        """Write the response held for ``url``; its items went to the sinks."""
+        row = self._held.pop(canonical_url(url), None)
+        if row is not None:
+            self._write(row)
+
+    def drop(self, url: str) -> None:
+        """Forget the response held for ``url``, if it was not kept."""
+        self._held.pop(canonical_url(url), None)
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl_s
+        self.conn.execute("DELETE FROM responses WHERE stored_at < ?", (cutoff,))
+        self.size = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        self.conn.commit()
+
+    def _evict(self) -> None:
+        rows = self.conn.execute(
+            "SELECT url, size FROM responses ORDER BY used_at"
+        ).fetchall()
+        drop = []
+        for url, size in rows:
+            if self.size <= self.max_bytes:
+                break
+            drop.append((url,))
+            self.size -= size
+        self.conn.executemany("DELETE FROM responses WHERE url = ?", drop)
+
+    def _tick(self) -> None:
+        self._uncommitted += 1
+        if not self.deferred and self._uncommitted >= self.commit_every:
+            self.flush()
+
+    def flush(self) -> None:
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def rollback(self) -> None:
+        """Undo what was written since the last :meth:`flush`."""
+        self.conn.rollback()
+        self._uncommitted = 0
+        self.size = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
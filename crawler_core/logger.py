@@ -1,15 +1,191 @@
+"""Structured JSON logging off the hot path.
+
+``info``/``warn``/``error`` only check the level and per-tag sampling, then
+hand ``(level, tag, fields, time)`` to a bounded queue; a background thread
+renders each event to one JSON line with structlog and writes it out. When
+the queue is full events are dropped (and counted) rather than blocking the
+caller. Configure from the ``logging`` config section via :func:`configure`.
+"""
+
 from __future__ import annotations
 
-def _fmt(fields: dict[str, object]) -> str:
-    return " ".join(f"{k}={v}" for k, v in fields.items())
+import atexit
+import itertools
+import json
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, IO, Optional, Tuple
+
+try:  # optional dependency: fall back to plain json.dumps
+    import structlog
+except ImportError:  # pragma: no cover - exercised only without the package
+    structlog = None  # type: ignore[assignment]
+
+_LEVELS = {"debug": 10, "info": 20, "warn": 30, "warning": 30, "error": 40, "off": 100}
+_NAMES = {20: "info", 30: "warning", 40: "error"}
+_STOP = None
+
+Event = Tuple[int, str, Dict[str, Any], float]
+
+
+def _timestamp(_logger: Any, _name: str, event: Dict[str, Any]) -> Dict[str, Any]:
+    event["timestamp"] = datetime.fromtimestamp(
+        event.pop("ts"), timezone.utc
+    ).isoformat()
+    return event
+
+
+class _Writer(threading.Thread):
+    def __init__(self, stream: Optional[IO[str]], maxsize: int) -> None:
+        super().__init__(name="crawler-log", daemon=True)
+        self.stream = stream
+        self.queue: "queue.Queue[Optional[Event]]" = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self._render = self._renderer()
+
+    def _renderer(self) -> Callable[[Event], str]:
+        if structlog is None:
+            return lambda e: json.dumps(
+                {"event": e[1], "level": _NAMES.get(e[0], "debug"), "ts": e[3], **e[2]},
+                default=str,
+                ensure_ascii=False,
+            )
+        processors = [
+            structlog.processors.add_log_level,
+            _timestamp,
+            structlog.processors.JSONRenderer(default=str, ensure_ascii=False),
+        ]
+
+        def render(e: Event) -> str:
+            event = {"event": e[1], "ts": e[3], **e[2]}
+            method = _NAMES.get(e[0], "debug")
+            for proc in processors:
+                event = proc(None, method, event)
+            return event  # type: ignore[return-value]
+
+        return render
+
+    def put(self, event: Event) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def run(self) -> None:
+        while True:
+            event = self.queue.get()
+            if event is _STOP:
+                return
+            batch = [event]
+            # drain whatever else is waiting so each write() covers many lines
+            while len(batch) < 512:
+                try:
+                    nxt = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    self._write(batch)
+                    return
+                batch.append(nxt)
+            self._write(batch)
+
+    def _write(self, batch) -> None:
+        stream = self.stream or sys.stdout
+        try:
+            stream.write("".join(self._render(e) + "\n" for e in batch))
+            stream.flush()
+        except Exception:  # pragma: no cover - never let logging kill the crawl
+            pass
+
+    def stop(self) -> None:
+        self.queue.put(_STOP)
+        self.join()
+
+
+_level = _LEVELS["info"]
+# tag -> N: keep one in N info events with that tag
+_sample: Dict[str, int] = {}
+_counters: Dict[str, "itertools.count[int]"] = {}
+_writer: Optional[_Writer] = None
+_stream: Optional[IO[str]] = None
+_owned: Optional[IO[str]] = None  # opened from ``path``; closed on reconfigure
+_maxsize = 10_000
+_lock = threading.Lock()
+
+
+def configure(
+    cfg: Optional[Dict[str, Any]] = None, stream: Optional[IO[str]] = None
+) -> None:
+    """Apply a ``logging`` config section.
+
+    Keys: ``level`` (debug/info/warn/error/off), ``sample`` (tag -> keep one
+    in N info events), ``path`` (append JSON lines there instead of stdout)
+    and ``queue_size``. Flushes and restarts the writer thread.
+    """
+    global _level, _sample, _counters, _stream, _owned, _maxsize
+    cfg = cfg or {}
+    shutdown()
+    if _owned is not None:
+        _owned.close()
+        _owned = None
+    _level = _LEVELS[str(cfg.get("level", "info")).lower()]
+    _sample = {tag: max(1, int(n)) for tag, n in (cfg.get("sample") or {}).items()}
+    _counters = {tag: itertools.count() for tag in _sample}
+    _maxsize = int(cfg.get("queue_size", 10_000))
+    if stream is None and cfg.get("path"):
+        stream = _owned = open(cfg["path"], "a", encoding="utf-8")
+    _stream = stream
+
+
+def _emit(level: int, tag: str, fields: Dict[str, Any], ts: float) -> None:
+    global _writer
+    writer = _writer
+    if writer is None:
+        with _lock:
+            if _writer is None:
+                _writer = _Writer(_stream, _maxsize)
+                _writer.start()
+            writer = _writer
+    writer.put((level, tag, fields, ts))
+
 
 def info(tag: str, **fields: object) -> None:
-    print(f"[{tag}][ok] {_fmt(fields)}")
+    if _level > 20:
+        return
+    if _sample:
+        n = _sample.get(tag)
+        if n is not None and next(_counters[tag]) % n:
+            return
+    _emit(20, tag, fields, time.time())
+
 
 def warn(tag: str, **fields: object) -> None:
-    print(f"[{tag}][warn] {_fmt(fields)}")
+    if _level <= 30:
+        _emit(30, tag, fields, time.time())
+
 
 def error(tag: str, **fields: object) -> None:  # pragma: no cover - trivial
-    print(f"[{tag}][err] {_fmt(fields)}")
+    if _level <= 40:
+        _emit(40, tag, fields, time.time())
+
+
+def dropped() -> int:
+    """Events discarded so far because the queue was full."""
+    return _writer.dropped if _writer is not None else 0
+
+
+def shutdown() -> None:
+    """Flush queued events and stop the writer thread (it restarts on demand)."""
+    global _writer
+    with _lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop()
+
+
+atexit.register(shutdown)
 
-__all__ = ["info", "warn", "error"]
+__all__ = ["configure", "info", "warn", "error", "dropped", "shutdown"]
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import sys
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+# slot markers of FingerprintSet; real fingerprints are shifted past them
+_EMPTY = 0
+_TOMBSTONE = 1
+
+
+def url_fingerprint(url: str) -> int:
+    """Stable 64-bit fingerprint of ``url``."""
+    return int.from_bytes(
+        hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+class FingerprintSet:
+    """Compact URL set storing fixed-width fingerprints in an open-addressed array.
+
+    Only the fingerprint is kept, truncated to the fewest bits (32 or 64) that
+    keep the false-positive rate under ``error_rate`` at ``capacity`` entries,
+    so each URL costs 4-16 bytes instead of a full ``str`` in a ``set``. Supports
+    ``discard`` via tombstones, which makes it usable for ``pending`` as well.
+    """
+
+    _MAX_LOAD = 0.7
+
+    def __init__(self, error_rate: float = 1e-9, capacity: int = 1_000_000) -> None:
+        bits = math.ceil(math.log2(max(capacity, 1) / error_rate))
+        self.bits = 32 if bits <= 32 else 64
+        self._typecode = "I" if self.bits == 32 else "Q"
+        self._mask = (1 << self.bits) - 1
+        self._slots = array(self._typecode, bytes(8 * array(self._typecode).itemsize))
+        self._len = 0
+        self._used = 0  # live entries plus tombstones
+
+    def _fp(self, url: str) -> int:
+        fp = url_fingerprint(url) & self._mask
+        return fp + 2 if fp < 2 else fp
+
+    def _find(self, fp: int) -> Tuple[int, bool]:
+        """Return (slot, found); when not found, slot is where ``fp`` belongs."""
+        slots = self._slots
+        mask = len(slots) - 1
+        i = fp & mask
+        first_free = -1
+        while True:
+            cur = slots[i]
+            if cur == fp:
+                return i, True
+            if cur == _EMPTY:
+                return (i if first_free < 0 else first_free), False
+            if cur == _TOMBSTONE and first_free < 0:
+                first_free = i
+            i = (i + 1) & mask
+
+    def _resize(self, size: int) -> None:
+        old = self._slots
+        self._slots = array(self._typecode, bytes(size * old.itemsize))
+        self._used = self._len
+        mask = size - 1
+        slots = self._slots
+        for fp in old:
+            if fp > _TOMBSTONE:
+                i = fp & mask
+                while slots[i] != _EMPTY:
+                    i = (i + 1) & mask
+                slots[i] = fp
+
+    def __contains__(self, url: str) -> bool:
+        return self._find(self._fp(url))[1]
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, url: str) -> None:
+        fp = self._fp(url)
+        i, found = self._find(fp)
+        if found:
+            return
+        if self._slots[i] == _EMPTY:
+            self._used += 1
+        self._slots[i] = fp
+        self._len += 1
+        if self._used > len(self._slots) * self._MAX_LOAD:
+            size = len(self._slots)
+            # mostly tombstones: rehash in place instead of growing
+            self._resize(size * 2 if self._len > size * self._MAX_LOAD / 2 else size)
+
+    def discard(self, url: str) -> None:
+        i, found = self._find(self._fp(url))
+        if found:
+            self._slots[i] = _TOMBSTONE
+            self._len -= 1
+
+    def memory_bytes(self) -> int:
+        return self._slots.itemsize * len(self._slots)
+
+    def false_positive_rate(self) -> float:
+        return self._len / float(1 << self.bits)
+
+
+class _BloomSlice:
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.k = max(1, math.ceil(math.log2(1 / error_rate)))
+        self.m = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.bits = bytearray((self.m + 7) // 8)
+        self.count = 0
+
+    def __contains__(self, fp: int) -> bool:
+        bits, m = self.bits, self.m
+        h1, h2 = fp & 0xFFFFFFFF, (fp >> 32) | 1
+        for i in range(self.k):
+            j = (h1 + i * h2) % m
+            if not bits[j >> 3] & (1 << (j & 7)):
+                return False
+        return True
+
+    def add(self, fp: int) -> None:
+        bits, m = self.bits, self.m
+        h1, h2 = fp & 0xFFFFFFFF, (fp >> 32) | 1
+        for i in range(self.k):
+            j = (h1 + i * h2) % m
+            bits[j >> 3] |= 1 << (j & 7)
+        self.count += 1
+
+    def fill_ratio(self) -> float:
+        return int.from_bytes(self.bits, "little").bit_count() / self.m
+
+
+class ScalableBloomFilter:
+    """Scalable Bloom filter (Almeida et al.) for the ``visited`` set.
+
+    A new, larger slice with a tighter error bound is added whenever the
+    current one reaches its capacity, so the compound false-positive rate
+    stays below ``error_rate`` however many URLs are added. Items can't be
+    removed, so it is only used where ``discard`` is never needed.
+    """
+
+    _GROWTH = 2
+    _TIGHTENING = 0.5
+
+    def __init__(self, error_rate: float = 1e-6, capacity: int = 1_000_000) -> None:
+        self.error_rate = error_rate
+        self.initial_capacity = max(1, capacity)
+        self.slices: List[_BloomSlice] = []
+        self._len = 0
+        self._grow()
+
+    def _grow(self) -> None:
+        n = len(self.slices)
+        self.slices.append(
+            _BloomSlice(
+                self.initial_capacity * self._GROWTH**n,
+                self.error_rate * (1 - self._TIGHTENING) * self._TIGHTENING**n,
+            )
+        )
+
+    def __contains__(self, url: str) -> bool:
+        fp = url_fingerprint(url)
+        return any(fp in s for s in reversed(self.slices))
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, url: str) -> None:
+        fp = url_fingerprint(url)
+        if any(fp in s for s in self.slices):
+            return
+        if self.slices[-1].count >= self.slices[-1].capacity:
+            self._grow()
+        self.slices[-1].add(fp)
+        self._len += 1
+
+    def discard(self, url: str) -> None:
+        raise TypeError("ScalableBloomFilter does not support removal")
+
+    def memory_bytes(self) -> int:
+        return sum(len(s.bits) for s in self.slices)
+
+    def false_positive_rate(self) -> float:
+        miss = 1.0
+        for s in self.slices:
+            miss *= 1.0 - s.fill_ratio() ** s.k
+        return 1.0 - miss
+
+
+def build_url_set(sched_cfg: Dict[str, Any], discard: bool = False):
+    """Build the ``pending``/``visited`` container selected by ``scheduler.membership``.
+
+    ``discard=True`` asks for a structure that supports removal, which rules
+    out the Bloom filter.
+    """
+    kind = sched_cfg.get("membership", "set")
+    error_rate = float(sched_cfg.get("error_rate", 1e-9))
+    capacity = int(sched_cfg.get("capacity", 1_000_000))
+    if kind == "bloom" and not discard:
+        return ScalableBloomFilter(error_rate=error_rate, capacity=capacity)
+    if kind in ("fingerprint", "bloom"):
+        return FingerprintSet(error_rate=error_rate, capacity=capacity)
+    return set()
+
+
+def membership_stats(urls: Any, plain: bool = False) -> Optional[Tuple[int, float]]:
+    """(approximate bytes, false-positive rate) of a ``pending``/``visited`` set.
+
+    Sizing a plain ``set`` walks every URL, so it is only done with ``plain``.
+    """
+    if isinstance(urls, (FingerprintSet, ScalableBloomFilter)):
+        return urls.memory_bytes(), urls.false_positive_rate()
+    if plain and isinstance(urls, set):
+        return sys.getsizeof(urls) + sum(sys.getsizeof(u) for u in urls), 0.0
+    return None
+
+
+__all__ = [
+    "FingerprintSet",
+    "ScalableBloomFilter",
+    "build_url_set",
+    "membership_stats",
+    "url_fingerprint",
+]
@@ -1,75 +1,165 @@
 from __future__ import annotations
 
 import re
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple, Union
 from zoneinfo import ZoneInfo
 
+Op = Callable[[Any], Any]
+
+_INT_RE = re.compile(r"[-+]?\d+")
+_FLOAT_RE = re.compile(r"[-+]?\d+(?:\.\d+)?")
+_SCRIPT_RE = re.compile(r"<script.*?>.*?</script>", re.S)
+
+
+@dataclass
+class NormalizePlan:
+    """Per item type, the ``(field, ops)`` pairs prebuilt by :meth:`Normalizer.compile`.
+
+    Like ``ExtractionPlan`` it pickles as its source config and is rebuilt on
+    load, since the compiled ops are closures.
+    """
+
+    types: Dict[str, List[Tuple[str, Tuple[Op, ...]]]]
+    source: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+
+    def __reduce__(self):
+        return Normalizer.compile, (self.source,)
+
+
+def _trim(value: Any) -> Any:
+    return value.strip() if isinstance(value, str) else value
+
+
+def _lower(value: Any) -> Any:
+    return value.lower() if isinstance(value, str) else value
+
+
+def _to_int(value: Any) -> Any:
+    try:
+        return int(value)
+    except Exception:
+        m = _INT_RE.search(str(value))
+        return int(m.group(0)) if m else value
+
+
+def _to_float(value: Any) -> Any:
+    try:
+        return float(value)
+    except Exception:
+        m = _FLOAT_RE.search(str(value))
+        return float(m.group(0)) if m else value
+
+
+def _sanitize_html(value: Any) -> Any:
+    return _SCRIPT_RE.sub("", value)
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+@lru_cache(maxsize=None)
+def _compile_op(op: str) -> Op:
+    """Turn one ``normalize`` entry into a callable, parsing its argument once."""
+    if op == "trim":
+        return _trim
+    if op == "lower":
+        return _lower
+    if op == "to_int":
+        return _to_int
+    if op == "to_float":
+        return _to_float
+    if op.startswith("to_datetime:"):
+        fmt = op.split(":", 1)[1]
+        return lambda value: datetime.strptime(value, fmt)
+    if op.startswith("to_tz:"):
+        tz = ZoneInfo(op.split(":", 1)[1])
+        return lambda value: (
+            value.replace(tzinfo=tz) if isinstance(value, datetime) else value
+        )
+    if op == "sanitize_html":
+        return _sanitize_html
+    if op == "strip_ads":
+        return _identity
+    if op.startswith("split:"):
+        sep, raw_idx = op.split(":", 1)[1].split("->")
+        idx = int(raw_idx)
+
+        def _split(value: Any) -> Any:
+            parts = value.split(sep)
+            return parts[idx] if len(parts) > idx else value
+
+        return _split
+    if op.startswith("join:"):
+        sep = op.split(":", 1)[1]
+        # best-effort to unescape common escapes like \n, \t
+        sep = sep.encode("utf-8").decode("unicode_escape")
+        return lambda value: (
+            sep.join(str(v) for v in value) if isinstance(value, list) else value
+        )
+    if op.startswith("regex_extract:"):
+        pattern = re.compile(op.split(":", 1)[1])
+
+        def _regex_extract(value: Any) -> Any:
+            m = pattern.search(str(value))
+            if m:
+                return m.group(1) if m.groups() else m.group(0)
+            return value
+
+        return _regex_extract
+    return _identity
+
 
 class Normalizer:
     @staticmethod
-    def run(item: Dict[str, Any], item_cfg: Dict[str, Any]) -> Dict[str, Any]:
-        # Apply normalize ops based on any matching field spec across items
-        for _iname, icfg in item_cfg.items():
-            for name, field_cfg in icfg.get("fields", {}).items():
-                if name in item:
-                    value = item[name]
-                    for op in field_cfg.get("normalize", []):
-                        value = Normalizer.apply(value, op)
-                    item[name] = value
+    def compile(item_cfg: Dict[str, Any]) -> NormalizePlan:
+        """Prebuild the op chain of every field that declares ``normalize``."""
+        types: Dict[str, List[Tuple[str, Tuple[Op, ...]]]] = {}
+        for iname, icfg in item_cfg.items():
+            types[iname] = [
+                (name, tuple(_compile_op(op) for op in field_cfg["normalize"]))
+                for name, field_cfg in icfg.get("fields", {}).items()
+                if field_cfg.get("normalize")
+            ]
+        return NormalizePlan(types=types, source=item_cfg)
+
+    @staticmethod
+    def _plan(item_cfg: Union[NormalizePlan, Dict[str, Any]]) -> NormalizePlan:
+        if isinstance(item_cfg, NormalizePlan):
+            return item_cfg
+        return Normalizer.compile(item_cfg)
+
+    @staticmethod
+    def run(
+        item: Dict[str, Any], item_cfg: Union[NormalizePlan, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Apply the normalize ops of the item's own ``__type__`` in place."""
+        plan = Normalizer._plan(item_cfg)
+        for name, ops in plan.types.get(item.get("__type__") or "", ()):
+            if name in item:
+                value = item[name]
+                for op in ops:
+                    if value is None:
+                        break
+                    value = op(value)
+                item[name] = value
         return item
 
+    @staticmethod
+    def run_batch(
+        items: List[Dict[str, Any]], item_cfg: Union[NormalizePlan, Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Normalize a whole page of items, compiling the config at most once."""
+        plan = Normalizer._plan(item_cfg)
+        for item in items:
+            Normalizer.run(item, plan)
+        return items
+
     @staticmethod
     def apply(value: Any, op: str) -> Any:
         if value is None:
             return value
-        if op == "trim":
-            return value.strip() if isinstance(value, str) else value
-        if op == "lower":
-            return value.lower() if isinstance(value, str) else value
-        if op == "to_int":
-            try:
-                if isinstance(value, str):
-                    return int(value)
-                return int(value)
-            except Exception:
-                m = re.search(r"[-+]?\d+", str(value))
-                return int(m.group(0)) if m else value
-        if op == "to_float":
-            try:
-                if isinstance(value, str):
-                    return float(value)
-                return float(value)
-            except Exception:
-                m = re.search(r"[-+]?\d+(?:\.\d+)?", str(value))
-                return float(m.group(0)) if m else value
-        if op.startswith("to_datetime:"):
-            fmt = op.split(":", 1)[1]
-            return datetime.strptime(value, fmt)
-        if op.startswith("to_tz:"):
-            tz = op.split(":", 1)[1]
-            if isinstance(value, datetime):
-                return value.replace(tzinfo=ZoneInfo(tz))
-            return value
-        if op == "sanitize_html":
-            return re.sub(r"<script.*?>.*?</script>", "", value, flags=re.S)
-        if op == "strip_ads":
-            return value
-        if op.startswith("split:"):
-            sep, idx = op.split(":", 1)[1].split("->")
-            parts = value.split(sep)
-            return parts[int(idx)] if len(parts) > int(idx) else value
-        if op.startswith("join:"):
-            sep = op.split(":", 1)[1]
-            # best-effort to unescape common escapes like \n, \t
-            sep = sep.encode("utf-8").decode("unicode_escape")
-            if isinstance(value, list):
-                return sep.join(str(v) for v in value)
-            return value
-        if op.startswith("regex_extract:"):
-            pattern = op.split(":", 1)[1]
-            m = re.search(pattern, str(value))
-            if m:
-                return m.group(1) if m.groups() else m.group(0)
-            return value
-        return value
+        return _compile_op(op)(value)
@@ -0,0 +1,229 @@
+"""Run many site configs in parallel, one fresh process per site.
+
+Each site is crawled by :func:`engine.run_config` in its own worker process
+(``max_tasks_per_child=1``), so module-level state such as the logger
+configuration never leaks from one site into the next. Sites are started
+longest first (LPT) using the durations earlier runs recorded in the
+``history`` file, so one big site starts early instead of becoming the tail
+of the batch; sites without history go first.
+
+Two global budgets are split evenly between the sites running at once:
+``max_connections`` caps each site's connection pool and fetch concurrency,
+and ``cpus`` bounds the number of worker processes plus each site's
+``parse.workers``.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from . import engine
+from .config import Config, load_and_validate
+
+
+@dataclass
+class SiteJob:
+    path: str
+    name: str
+    cost: float  # seconds from history, else the entrypoint count
+    known: bool = False  # whether ``cost`` came from history
+    error: Optional[str] = None  # the config could not be loaded
+
+
+@dataclass
+class SiteResult:
+    path: str
+    name: str
+    seconds: float
+    counters: Dict[str, int] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def _entrypoint_count(cfg: Config) -> int:
+    n = 0
+    for ep in cfg.get("entrypoints") or []:
+        if "url_template" in ep and "range" in ep:
+            r = ep["range"]
+            n += len(range(r["start"], r["stop"], r.get("step", 1)))
+        else:
+            n += 1
+    return n
+
+
+def plan_jobs(paths: Sequence[str], history: Dict[str, float]) -> List[SiteJob]:
+    """Jobs for ``paths`` in start order.
+
+    Sites without history come first, by entrypoint count: any of them may
+    be the longest crawl. The rest follow by recorded duration, longest
+    first. A config that fails to load becomes a job with ``error`` set
+    (named after the file), so one broken file cannot stop the batch.
+    """
+    jobs = []
+    for path in paths:
+        try:
+            cfg = load_and_validate(path)
+        except Exception as e:
+            jobs.append(SiteJob(path, Path(path).stem, 0.0, error=repr(e)))
+            continue
+        name = cfg["name"]
+        if name in history:
+            jobs.append(SiteJob(path, name, float(history[name]), known=True))
+        else:
+            jobs.append(SiteJob(path, name, float(_entrypoint_count(cfg))))
+    return sorted(jobs, key=lambda j: (not j.known, j.cost), reverse=True)
+
+
+def apply_limits(cfg: Config, max_connections: int, cpus: int) -> Config:
+    """Clamp ``cfg``'s connections and parse workers to its budget share.
+
+    ``max_connections``/``cpus`` of 0 leave the respective settings alone.
+    One CPU of the share is the crawl process itself.
+    """
+    cfg = Config(cfg)
+    if max_connections:
+        req = dict(cfg.get("request") or {})
+        pool = dict(req.get("pool") or {})
+        rate = dict(req.get("rate_limit") or {})
+        pool["max_connections"] = min(pool.get("max_connections", 100), max_connections)
+        pool["max_keepalive_connections"] = min(
+            pool.get("max_keepalive_connections", 20), max_connections
+        )
+        rate["concurrency"] = min(int(rate.get("concurrency", 1) or 1), max_connections)
+        req["pool"], req["rate_limit"] = pool, rate
+        cfg["request"] = req
+    if cpus:
+        parse = dict(cfg.get("parse") or {})
+        if parse.get("workers"):
+            parse["workers"] = min(int(parse["workers"]), cpus - 1)
+            cfg["parse"] = parse
+    return cfg
+
+
+def _run_site(
+    job: SiteJob, max_connections: int, cpus: int, resume: bool
+) -> SiteResult:
+    start = time.perf_counter()
+    cfg = apply_limits(load_and_validate(job.path), max_connections, cpus)
+    telem = engine.run_config(cfg, resume=resume)
+    failed = telem.sink_errors()
+    return SiteResult(
+        job.path,
+        job.name,
+        time.perf_counter() - start,
+        telem.counters(),
+        error=f"sink errors: {failed}" if failed else None,
+    )
+
+
+class Orchestrator:
+    """Crawl ``paths`` with up to ``workers`` sites at a time.
+
+    ``max_connections`` and ``cpus`` are totals across all running sites
+    (0: no connection cap; ``cpus`` defaults to ``os.cpu_count()``).
+    ``history`` names a JSON file of per-site durations that orders the
+    next run and is updated after this one.
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[str],
+        workers: int = 1,
+        max_connections: int = 0,
+        cpus: int = 0,
+        history: Optional[str] = None,
+        resume: bool = False,
+    ) -> None:
+        self.paths = list(paths)
+        self.cpus = cpus or os.cpu_count() or 1
+        self.workers = max(1, min(workers, self.cpus, len(self.paths) or 1))
+        self.max_connections = max_connections
+        self.history_path = Path(history) if history else None
+        self.resume = resume
+
+    def _load_history(self) -> Dict[str, float]:
+        if self.history_path is None or not self.history_path.exists():
+            return {}
+        return json.loads(self.history_path.read_text(encoding="utf-8"))
+
+    def _save_history(
+        self, history: Dict[str, float], results: List[SiteResult]
+    ) -> None:
+        if self.history_path is None:
+            return
+        for r in results:
+            if r.error is None:
+                history[r.name] = round(r.seconds, 3)
+        self.history_path.parent.mkdir(parents=True, exist_ok=True)
+        self.history_path.write_text(
+            json.dumps(history, indent=2, sort_keys=True) + "\n"
+        )
+
+    def run(self) -> List[SiteResult]:
+        history = self._load_history()
+        jobs = plan_jobs(self.paths, history)
+        conns = (
+            max(1, self.max_connections // self.workers) if self.max_connections else 0
+        )
+        cpus = max(1, self.cpus // self.workers)
+        results = [
+            SiteResult(job.path, job.name, 0.0, error=job.error)
+            for job in jobs
+            if job.error is not None
+        ]
+        jobs = [job for job in jobs if job.error is None]
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=1,
+        ) as pool:
+            # submission order is start order: longest expected crawl first
+            futures = {
+                pool.submit(_run_site, job, conns, cpus, self.resume): job
+                for job in jobs
+            }
+            for fut in as_completed(futures):
+                job = futures[fut]
+                try:
+                    results.append(fut.result())
+                except Exception as e:  # one broken site must not sink the batch
+                    results.append(SiteResult(job.path, job.name, 0.0, error=repr(e)))
+        self._save_history(history, results)
+        return results
+
+
+def summary(
+    results: Sequence[SiteResult],
+    wall: float,
+    prefix: str = "schedule",
+    unit: str = "sites",
+) -> str:
+    """One aggregated line for the whole batch."""
+    totals: Dict[str, int] = {}
+    for r in results:
+        for k, v in r.counters.items():
+            totals[k] = totals.get(k, 0) + v
+    failed = sum(1 for r in results if r.error is not None)
+    line = f"{prefix}: {unit}={len(results)} failed={failed}"
+    for k, v in totals.items():
+        if v or k in ("success", "errors", "emitted"):
+            line += f" {k}={v}"
+    serial = sum(r.seconds for r in results)
+    line += f" wall_s={wall:.1f} site_s={serial:.1f}"
+    return line
+
+
+__all__ = [
+    "Orchestrator",
+    "SiteJob",
+    "SiteResult",
+    "apply_limits",
+    "plan_jobs",
+    "summary",
+]
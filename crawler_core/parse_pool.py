@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import pickle
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .extractor import ExtractionPlan, Extractor
+from .normalizer import NormalizePlan, Normalizer
+from .types import Response
+
+# per-worker state, installed once by _init()
+_plan: Optional[ExtractionPlan] = None
+_norm: Optional[NormalizePlan] = None
+
+ParseResult = Tuple[List[str], List[Dict[str, Any]]]
+
+
+def _init(payload: bytes) -> None:
+    global _plan, _norm
+    _plan, _norm = pickle.loads(payload)
+
+
+def _parse(url: str, status: int, content: bytes, encoding: str) -> ParseResult:
+    assert _plan is not None and _norm is not None
+    resp = Response(url=url, status=status, content=content, encoding=encoding)
+    links, items = Extractor.parse(resp, _plan)
+    return links, Normalizer.run_batch(items, _norm)
+
+
+class ParsePool:
+    """Runs ``Extractor.parse`` + ``Normalizer.run`` in worker processes.
+
+    The compiled plans are pickled once and installed in each worker by the pool
+    initializer, so a task only carries the page. At most ``max_inflight``
+    pages are queued; :meth:`submit` blocks for results once that bound is hit.
+    With ``ordered=True`` results come back in submission order, otherwise in
+    completion order.
+    """
+
+    def __init__(
+        self,
+        plan: ExtractionPlan,
+        norm: NormalizePlan,
+        workers: Optional[int] = None,
+        max_inflight: Optional[int] = None,
+        ordered: bool = False,
+    ) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.max_inflight = max(1, max_inflight or self.workers * 4)
+        self.ordered = ordered
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init,
+            initargs=(pickle.dumps((plan, norm)),),
+        )
+        self._inflight: Deque[Tuple[Any, Future]] = deque()
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    def from_config(
+        cls, cfg, plan: ExtractionPlan, norm: NormalizePlan
+    ) -> Optional["ParsePool"]:
+        pcfg = cfg.get("parse") or {}
+        if not pcfg.get("workers"):
+            return None
+        return cls(
+            plan,
+            norm,
+            workers=int(pcfg["workers"]),
+            max_inflight=pcfg.get("max_inflight"),
+            ordered=bool(pcfg.get("ordered", False)),
+        )
+
+    @property
+    def pending(self) -> int:
+        return len(self._inflight)
+
+    def submit(self, token: Any, resp: Response) -> List[Tuple[Any, Any]]:
+        """Queue ``resp``; return ``(token, result)`` pairs that are ready.
+
+        ``result`` is ``(links, items)`` or the exception the worker raised.
+        """
+        fut = self.executor.submit(_parse, *_task(resp))
+        self._inflight.append((token, fut))
+        return self._collect(block=len(self._inflight) >= self.max_inflight)
+
+    def wait(self) -> List[Tuple[Any, Any]]:
+        """Block until at least one queued page is done (if any are queued)."""
+        return self._collect(block=bool(self._inflight))
+
+    def drain(self) -> List[Tuple[Any, Any]]:
+        out: List[Tuple[Any, Any]] = []
+        while self._inflight:
+            out.extend(self._collect(block=True))
+        return out
+
+    def _collect(self, block: bool) -> List[Tuple[Any, Any]]:
+        if self.ordered:
+            if block:
+                self._inflight[0][1].exception()
+            out = []
+            while self._inflight and self._inflight[0][1].done():
+                token, fut = self._inflight.popleft()
+                out.append((token, _outcome(fut)))
+            return out
+        if block:
+            wait([f for _, f in self._inflight], return_when=FIRST_COMPLETED)
+        out, keep = [], deque()
+        for token, fut in self._inflight:
+            if fut.done():
+                out.append((token, _outcome(fut)))
+            else:
+                keep.append((token, fut))
+        self._inflight = keep
+        return out
+
+    async def parse_async(self, resp: Response) -> ParseResult:
+        """Parse ``resp`` in the pool from a coroutine, bounded by ``max_inflight``."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_inflight)
+        async with self._slots:
+            fut = self.executor.submit(_parse, *_task(resp))
+            return await asyncio.wrap_future(fut)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _task(resp: Response) -> Tuple[str, int, bytes, str]:
+    # ship the raw body; the worker decodes it
+    return resp.url, resp.status, resp.content, resp.encoding
+
+
+def _outcome(fut: Future) -> Any:
+    err = fut.exception()
+    return err if err is not None else fut.result()
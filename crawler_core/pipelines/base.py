@@ -1,12 +1,29 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Iterable, List
 
 
 class Sink:
     def emit(self, item: dict) -> None:  # pragma: no cover - interface
         raise NotImplementedError
 
+    def emit_batch(self, items: Iterable[dict]) -> None:
+        for item in items:
+            self.emit(item)
+
+    def flush(self) -> None:
+        """Push buffered items to the backing store."""
+
+    def close(self) -> None:
+        """Flush and release resources; the engine calls this once per run."""
+        self.flush()
+
+    def __enter__(self) -> "Sink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
 
 def build_sinks(cfg_list) -> List[Sink]:
     sinks: List[Sink] = []
@@ -20,4 +37,3 @@ def build_sinks(cfg_list) -> List[Sink]:
 
             sinks.append(PgSink(cfg))
     return sinks
-
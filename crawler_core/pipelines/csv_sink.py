@@ -1,24 +1,142 @@
 from __future__ import annotations
 
 import csv
+import gzip
+import io
+import re
+import time
 from pathlib import Path
-from typing import Dict
+from typing import Dict, IO, List, Optional
 
 from .base import Sink
 
+_SUFFIX = {"gzip": ".gz", "zstd": ".zst"}
+
 
 class CSVSink(Sink):
+    """CSV writer that buffers rows and writes them in batches.
+
+    Buffered rows go out through ``writerows`` once ``flush_rows`` rows or
+    about ``flush_bytes`` bytes are pending, or ``flush_interval_s`` seconds
+    have passed since the last flush (checked on emit), and always on
+    ``close()``. With ``rotate_bytes``/``rotate_interval_s`` output rolls over
+    into numbered segments (``name.00001.csv``); ``compression`` may be
+    ``gzip`` or ``zstd`` (needs the ``zstandard`` package).
+    """
+
     def __init__(self, cfg: Dict) -> None:
-        self.path = Path(cfg["path"])
+        self.compression: Optional[str] = cfg.get("compression") or None
+        if self.compression not in (None, "gzip", "zstd"):
+            raise ValueError(f"unsupported csv compression: {self.compression}")
+        path = Path(cfg["path"])
+        suffix = _SUFFIX.get(self.compression or "", "")
+        if suffix and path.suffix != suffix:
+            path = path.with_name(path.name + suffix)
+        self.path = path
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.file = open(self.path, "a", newline="", encoding="utf-8")
+        self.flush_rows = max(1, int(cfg.get("flush_rows", 500)))
+        self.flush_bytes = int(cfg.get("flush_bytes", 1 << 20))
+        self.flush_interval = float(cfg.get("flush_interval_s", 5.0))
+        self.rotate_bytes = int(cfg.get("rotate_bytes", 0))
+        self.rotate_interval = float(cfg.get("rotate_interval_s", 0))
+        self.rotating = bool(self.rotate_bytes or self.rotate_interval)
+
+        self.file: Optional[IO[str]] = None
+        self.writer: Optional[csv.DictWriter] = None
+        self.fieldnames: Optional[List[str]] = None
+        self.segment = self._last_segment() if self.rotating else 0
+        self.segment_path: Optional[Path] = None
+        self._segment_opened = 0.0
+        self._buffer: List[dict] = []
+        self._buffered_bytes = 0
+        self._last_flush = time.monotonic()
+
+    # --- files -----------------------------------------------------------
+    def _segment_name(self, n: int) -> Path:
+        name = self.path.name
+        base, dot, ext = name.partition(".")
+        return self.path.with_name(f"{base}.{n:05d}{dot}{ext}")
+
+    def _last_segment(self) -> int:
+        base, dot, ext = self.path.name.partition(".")
+        pattern = re.compile(rf"^{re.escape(base)}\.(\d{{5}}){re.escape(dot + ext)}$")
+        found = [
+            int(m.group(1))
+            for p in self.path.parent.iterdir()
+            if (m := pattern.match(p.name))
+        ]
+        return max(found, default=0)
+
+    def _open(self) -> None:
+        if self.rotating:
+            self.segment += 1
+            path = self._segment_name(self.segment)
+        else:
+            path = self.path
+        new = not path.exists() or path.stat().st_size == 0
+        if self.compression == "gzip":
+            self.file = gzip.open(path, "at", newline="", encoding="utf-8")
+        elif self.compression == "zstd":
+            import zstandard  # type: ignore
+
+            raw = zstandard.ZstdCompressor().stream_writer(open(path, "ab"))
+            self.file = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        else:
+            self.file = open(path, "a", newline="", encoding="utf-8")
+        self.segment_path = path
+        self._segment_opened = time.monotonic()
+        self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames or [])
+        if new:
+            self.writer.writeheader()
+
+    def _close_file(self) -> None:
+        if self.file is not None:
+            self.file.close()
+        self.file = None
         self.writer = None
 
+    def _should_rotate(self) -> bool:
+        if not self.rotating or self.segment_path is None:
+            return False
+        if self.rotate_bytes and self.segment_path.stat().st_size >= self.rotate_bytes:
+            return True
+        return bool(
+            self.rotate_interval
+            and time.monotonic() - self._segment_opened >= self.rotate_interval
+        )
+
+    # --- Sink API ----------------------------------------------------------
     def emit(self, item: dict) -> None:
+        self.emit_batch((item,))
+
+    def emit_batch(self, items) -> None:
+        for item in items:
+            if self.fieldnames is None:
+                self.fieldnames = list(item.keys())
+            self._buffer.append(item)
+            self._buffered_bytes += sum(len(str(v)) + 1 for v in item.values())
+            if (
+                len(self._buffer) >= self.flush_rows
+                or self._buffered_bytes >= self.flush_bytes
+            ):
+                self.flush()
+        if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
         if self.writer is None:
-            self.writer = csv.DictWriter(self.file, fieldnames=list(item.keys()))
-            if self.file.tell() == 0:
-                self.writer.writeheader()
-        self.writer.writerow(item)
+            self._open()
+        assert self.writer is not None and self.file is not None
+        self.writer.writerows(self._buffer)
         self.file.flush()
+        self._buffer = []
+        self._buffered_bytes = 0
+        if self._should_rotate():
+            self._close_file()
 
+    def close(self) -> None:
+        self.flush()
+        self._close_file()
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..logger import error
+from .base import Sink
+
+_STOP = object()
+
+# called with (sink name, seconds spent writing one batch)
+OnWrite = Callable[[str, float], None]
+
+
+class _Lane:
+    """One sink, its bounded queue of batches and the thread that drains it."""
+
+    def __init__(
+        self,
+        name: str,
+        sink: Sink,
+        maxsize: int,
+        idle_flush_s: float,
+        on_write: Optional[OnWrite] = None,
+    ) -> None:
+        self.name = name
+        self.sink = sink
+        self.on_write = on_write
+        self.queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self.idle_flush_s = idle_flush_s
+        self.pending_items = 0
+        self.written = 0
+        self.errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(
+            target=self._drain, name=f"sink-{name}", daemon=True
+        )
+        self.thread.start()
+
+    def put(self, batch: List[dict], block: bool = True) -> bool:
+        with self._lock:
+            self.pending_items += len(batch)
+        try:
+            self.queue.put((time.monotonic(), batch), block=block)
+        except queue.Full:
+            with self._lock:
+                self.pending_items -= len(batch)
+            return False
+        return True
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                entry = self.queue.get(timeout=self.idle_flush_s)
+            except queue.Empty:
+                # nothing arrived for a while: let time-based flush policies fire
+                self._call(self.sink.flush)
+                continue
+            if entry is _STOP:
+                return
+            if isinstance(entry, threading.Event):
+                # SinkDispatcher.flush(): everything queued before is written
+                self._call(self.sink.flush)
+                entry.set()
+                continue
+            queued_at, batch = entry
+            started = time.monotonic()
+            self._call(self.sink.emit_batch, batch)
+            now = time.monotonic()
+            if self.on_write is not None:
+                self.on_write(self.name, now - started)
+            lag = now - queued_at
+            with self._lock:
+                self.pending_items -= len(batch)
+                self.written += len(batch)
+                self.last_lag = lag
+                self.max_lag = max(self.max_lag, lag)
+
+    def _call(self, fn, *args) -> None:
+        try:
+            fn(*args)
+        except Exception as e:
+            self.errors += 1
+            error("sink", sink=self.name, err=repr(e))
+
+    def stop(self) -> None:
+        self.queue.put(_STOP)
+        self.thread.join()
+        self._call(self.sink.close)
+
+
+class SinkDispatcher(Sink):
+    """Fans item batches out to each sink on its own writer thread.
+
+    Every sink gets a queue of at most ``maxsize`` batches. :meth:`emit_batch`
+    blocks while a queue is full, which holds the crawl back to the pace of
+    the slowest sink; :meth:`emit_batch_async` waits for room off the event
+    loop. :meth:`flush` waits until everything queued so far is written;
+    :meth:`close` drains every queue and then closes the sinks.
+    """
+
+    def __init__(
+        self,
+        sinks: Sequence[Sink],
+        maxsize: int = 64,
+        idle_flush_s: float = 1.0,
+        on_write: Optional[OnWrite] = None,
+    ) -> None:
+        self.lanes: List[_Lane] = []
+        names: Dict[str, int] = {}
+        for sink in sinks:
+            name = type(sink).__name__
+            names[name] = names.get(name, 0) + 1
+            if names[name] > 1:
+                name = f"{name}{names[name]}"
+            self.lanes.append(
+                _Lane(name, sink, max(1, maxsize), idle_flush_s, on_write)
+            )
+        self._closed = False
+        self._errors_seen = 0
+
+    @classmethod
+    def from_config(
+        cls, cfg, sinks: Sequence[Sink], on_write: Optional[OnWrite] = None
+    ) -> "SinkDispatcher":
+        qcfg = cfg.get("sink_queue") or {}
+        return cls(
+            sinks,
+            maxsize=int(qcfg.get("maxsize", 64)),
+            idle_flush_s=float(qcfg.get("idle_flush_s", 1.0)),
+            on_write=on_write,
+        )
+
+    def emit(self, item: dict) -> None:
+        self.emit_batch([item])
+
+    def emit_batch(self, items) -> None:
+        batch = list(items)
+        for lane in self.lanes:
+            lane.put(batch)
+
+    async def emit_batch_async(self, items) -> None:
+        batch = list(items)
+        for lane in self.lanes:
+            if not lane.put(batch, block=False):
+                await asyncio.to_thread(lane.put, batch)
+
+    def flush(self) -> bool:
+        """Block until every batch queued so far is written and flushed.
+
+        Returns False if a sink failed since the previous call, in which case
+        some of those items may be missing from it.
+        """
+        if not self._closed:
+            flushed = []
+            for lane in self.lanes:
+                event = threading.Event()
+                lane.queue.put(event)
+                flushed.append(event)
+            for event in flushed:
+                event.wait()
+        errors = sum(lane.errors for lane in self.lanes)
+        clean = errors == self._errors_seen
+        self._errors_seen = errors
+        return clean
+
+    def lag(self) -> Dict[str, Tuple[int, float, float, int]]:
+        """Per sink: ``(items still queued, last queue lag s, max queue lag s,
+        failed calls)``; every failed call may have lost items."""
+        return {
+            lane.name: (lane.pending_items, lane.last_lag, lane.max_lag, lane.errors)
+            for lane in self.lanes
+        }
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for lane in self.lanes:
+            lane.stop()
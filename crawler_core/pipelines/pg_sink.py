@@ -1,13 +1,27 @@
 from __future__ import annotations
 
+import json
 import sqlite3
-from typing import Dict
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
 
+from ..logger import error
 from .base import Sink
 
 
 class PgSink(Sink):
-    """Simplified PostgreSQL sink using SQLite for tests."""
+    """Simplified PostgreSQL sink using SQLite for tests.
+
+    Rows are buffered and upserted with ``executemany`` in one transaction per
+    batch, once ``batch_size`` rows are pending or ``flush_interval_s`` seconds
+    have passed since the last write, and on ``close()``. For the sqlite
+    backend ``journal_mode`` and ``synchronous`` set the matching pragmas.
+
+    A batch the database rejects is not retried: its rows are appended as
+    JSON lines to ``reject_path`` (logged only, without one) and the error
+    is raised to the caller.
+    """
 
     def __init__(self, cfg: Dict) -> None:
         dsn: str = cfg.get("dsn", "sqlite:///crawler.db")
@@ -15,26 +29,71 @@ class PgSink(Sink):
             path = dsn.replace("sqlite:///", "")
         else:  # pragma: no cover - placeholder for real PG
             path = ":memory:"
-        self.conn = sqlite3.connect(path)
+        # written from the sink dispatcher's writer thread, not the creating one
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self.conn.execute(f"PRAGMA journal_mode={cfg.get('journal_mode', 'wal')}")
+        self.conn.execute(f"PRAGMA synchronous={cfg.get('synchronous', 'normal')}")
         self.table = cfg.get("table", "items")
         self.upsert_keys = cfg.get("upsert_keys", [])
-        self.columns = None
+        self.batch_size = max(1, int(cfg.get("batch_size", 500)))
+        self.flush_interval = float(cfg.get("flush_interval_s", 5.0))
+        self.reject_path: Optional[str] = cfg.get("reject_path") or None
+        self.columns: Optional[List[str]] = None
+        self._sql = ""
+        self._rows: List[list] = []
+        self._last_flush = time.monotonic()
 
-    def emit(self, item: dict) -> None:
-        if self.columns is None:
-            self.columns = list(item.keys())
-            cols = ", ".join(f"{c} TEXT" for c in self.columns)
-            unique = ", ".join(self.upsert_keys)
-            self.conn.execute(
-                f"CREATE TABLE IF NOT EXISTS {self.table} ({cols}, UNIQUE({unique}))"
-            )
-        placeholders = ", ".join(["?"] * len(self.columns))
+    def _prepare(self, item: dict) -> None:
+        self.columns = list(item.keys())
+        cols = ", ".join(f"{c} TEXT" for c in self.columns)
         columns = ", ".join(self.columns)
-        update = ", ".join(f"{c}=excluded.{c}" for c in self.columns)
-        sql = (
-            f"INSERT INTO {self.table} ({columns}) VALUES ({placeholders}) "
-            f"ON CONFLICT({', '.join(self.upsert_keys)}) DO UPDATE SET {update}"
-        )
-        self.conn.execute(sql, [item.get(c) for c in self.columns])
-        self.conn.commit()
+        placeholders = ", ".join(["?"] * len(self.columns))
+        self._sql = f"INSERT INTO {self.table} ({columns}) VALUES ({placeholders})"
+        if self.upsert_keys:
+            unique = ", ".join(self.upsert_keys)
+            cols += f", UNIQUE({unique})"
+            update = ", ".join(f"{c}=excluded.{c}" for c in self.columns)
+            self._sql += f" ON CONFLICT({unique}) DO UPDATE SET {update}"
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({cols})")
+
+    def emit(self, item: dict) -> None:
+        self.emit_batch((item,))
+
+    def emit_batch(self, items) -> None:
+        for item in items:
+            if self.columns is None:
+                self._prepare(item)
+            self._rows.append([item.get(c) for c in self.columns])
+            if len(self._rows) >= self.batch_size:
+                self.flush()
+        if self._rows and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+        try:
+            with self.conn:
+                self.conn.executemany(self._sql, rows)
+        except sqlite3.Error as e:
+            self._reject(rows, e)
+            raise
+
+    def _reject(self, rows: List[list], err: Exception) -> None:
+        """Set a failed batch aside so later batches are not held up by it."""
+        error("sink", sink="PgSink", rejected=len(rows), err=repr(err))
+        if self.reject_path is None:
+            return
+        path = Path(self.reject_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as f:
+            for row in rows:
+                record = dict(zip(self.columns or [], row))
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
 
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
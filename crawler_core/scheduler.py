@@ -1,30 +1,97 @@
 from __future__ import annotations
 
-from typing import Iterable, List
+import heapq
+import itertools
+import math
+import re
+import sqlite3
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
 
+from .anti.adaptive import AdaptiveLimiter
+from .logger import warn
+from .membership import build_url_set
 from .types import Request
 
+# cheaper than urlparse() on the enqueue hot path; only used as a partition key
+_HOST_RE = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*://(?:[^@/?#]*@)?(\[[^\]]*\]|[^:/?#]*)")
+
+
+def _host(url: str) -> str:
+    m = _HOST_RE.match(url)
+    return m.group(1).lower() if m else ""
+
 
 class Scheduler:
-    """Very small in-memory FIFO scheduler with dedupe and retry."""
+    """In-memory frontier partitioned by host, with dedupe and retry.
+
+    URLs queue FIFO in one deque per host. Hosts with queued URLs sit in a heap
+    keyed by the time they may next be hit (a ``domain_qps``/``burst`` token
+    bucket per host, like the fetcher's), so ``next`` hands out the URL of
+    the host that is ready soonest and a throttled host never blocks the
+    others; :meth:`ready_in` says how long that is. Every operation is O(1) in
+    the number of queued URLs and O(log hosts) for the heap.
+
+    With ``slots`` set to the fetcher's :class:`AdaptiveLimiter`, a host also
+    waits while it is paused or has as many fetches out (handed out by
+    :meth:`next`, not yet :meth:`fetched`) as its adaptive limit allows; it
+    is parked off the heap until one of them is over.
+    """
 
     def __init__(self, cfg) -> None:
-        self.queue: List[Request] = []
-        self.pending: set[str] = set()
-        self.visited: set[str] = set()
-        req_cfg = (
-            getattr(cfg, "request", {})
-            if hasattr(cfg, "request")
-            else cfg.get("request", {})
-        )
+        self.hosts: Dict[str, Deque[Request]] = {}
+        sched_cfg = cfg.get("scheduler") or {}
+        # plain sets by default; scheduler.membership swaps in compact ones
+        self.pending = build_url_set(sched_cfg, discard=True)
+        self.visited = build_url_set(sched_cfg)
+        self._ready: List[Tuple[float, int, str]] = []
+        self._next_at: Dict[str, float] = {}
+        self._seq = itertools.count()
+        self._size = 0
+        req_cfg = cfg.get("request") or {}
         retry_cfg = req_cfg.get("retry", {})
         self.max_attempts = retry_cfg.get("max_attempts", 3)
+        # mirrors the fetcher's RateLimiter buckets, so hosts are handed out
+        # only once a fetch to them would not have to wait for a token
+        rate_cfg = req_cfg.get("rate_limit") or {}
+        qps = rate_cfg.get("domain_qps", 2)
+        self.qps = float(qps) if qps and qps > 0 else 0.0
+        self.burst = max(1, int(rate_cfg.get("burst", 8) or 1))
+        self._tokens: Dict[str, Tuple[float, float]] = {}
+        # run before persistent backends commit; the engine flushes its sinks
+        self.before_commit: Optional[Callable[[], None]] = None
+        # set by the engine when adaptive throttling is on
+        self.slots: Optional[AdaptiveLimiter] = None
+        self._fetching: Dict[str, int] = {}
+        self._parked: Set[str] = set()
 
     # ------------------------------------------------------------------
+    @property
+    def queue(self) -> List[Request]:
+        """Snapshot of all queued requests, grouped by host (O(n))."""
+        return [req for dq in self.hosts.values() for req in dq]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _push(self, req: Request) -> None:
+        host = _host(req.url)
+        dq = self.hosts.get(host)
+        if dq is None:
+            dq = self.hosts[host] = deque()
+        if not dq:
+            heapq.heappush(
+                self._ready, (self._next_at.get(host, 0.0), next(self._seq), host)
+            )
+        dq.append(req)
+        self._size += 1
+
     def _maybe_enqueue(self, url: str) -> None:
         if url in self.visited or url in self.pending:
             return
-        self.queue.append(Request(url))
+        self._push(Request(url))
         self.pending.add(url)
 
     def seed(self, entrypoints: Iterable[dict]) -> None:
@@ -39,13 +106,99 @@ class Scheduler:
                     self._maybe_enqueue(url)
 
     def has_next(self) -> bool:
-        return bool(self.queue)
+        return self._size > 0
+
+    def _slot_wait(self, host: str) -> Optional[float]:
+        """How long ``host`` stays paused, or None while its adaptive window is full."""
+        if self.slots is None or not host:
+            return 0.0
+        limit, paused = self.slots.window(host.strip("[]"))
+        if self._fetching.get(host, 0) >= limit:
+            return None
+        return paused
+
+    def _head(self) -> Optional[Tuple[float, int, str]]:
+        """The heap entry of the host that is ready soonest, if any host is."""
+        now = time.monotonic()
+        while self._ready:
+            ready_at, _, host = self._ready[0]
+            next_at = self._next_at.get(host, 0.0)
+            if next_at > ready_at:
+                # pushed back by delay_host() since it was queued: re-key it
+                heapq.heapreplace(self._ready, (next_at, next(self._seq), host))
+                continue
+            if ready_at <= now and self.slots is not None:
+                wait = self._slot_wait(host)
+                if wait is None:
+                    heapq.heappop(self._ready)
+                    self._parked.add(host)
+                    continue
+                if wait:
+                    self._next_at[host] = now + wait
+                    continue
+            return self._ready[0]
+        return None
+
+    def ready_in(self) -> float:
+        """Seconds until :meth:`next` has a host that may be hit (0 if one is ready).
+
+        The engine waits this out before taking a URL, so a worker never
+        holds a concurrency slot while it sleeps in a limiter. It is
+        ``math.inf`` while every queued host is waiting for a fetch to end.
+        """
+        head = self._head()
+        if head is None:
+            return math.inf if self._parked else 0.0
+        return max(0.0, head[0] - time.monotonic())
+
+    def _take_token(self, host: str) -> float:
+        """Spend one of ``host``'s tokens; returns when the next one is due."""
+        now = time.monotonic()
+        if not self.qps or not host:
+            return now  # file:// and the like: the fetcher does not throttle them
+        tokens, last = self._tokens.get(host, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * self.qps) - 1.0
+        self._tokens[host] = (tokens, now)
+        return now + max(0.0, 1.0 - tokens) / self.qps
 
     def next(self) -> Request:
-        req = self.queue.pop(0)
+        if self._head() is None:
+            raise IndexError("next from empty scheduler")
+        ready_at, _, host = heapq.heappop(self._ready)
+        dq = self.hosts[host]
+        req = dq.popleft()
+        self._size -= 1
+        ready_at = max(self._take_token(host), self._next_at.get(host, 0.0))
+        self._next_at[host] = ready_at
+        if dq:
+            heapq.heappush(self._ready, (ready_at, next(self._seq), host))
+        else:
+            del self.hosts[host]
+        if self.slots is not None and host:
+            self._fetching[host] = self._fetching.get(host, 0) + 1
+        self._dispatched(req)
+        return req
+
+    def fetched(self, req: Request) -> None:
+        """Called once the fetch of ``req`` is over, whatever its outcome."""
+        host = _host(req.url)
+        n = self._fetching.get(host)
+        if n is None:
+            return
+        if n > 1:
+            self._fetching[host] = n - 1
+        else:
+            del self._fetching[host]
+        if host in self._parked:
+            self._parked.discard(host)
+            if self.hosts.get(host):
+                heapq.heappush(
+                    self._ready, (self._next_at.get(host, 0.0), next(self._seq), host)
+                )
+
+    def _dispatched(self, req: Request) -> None:
         self.pending.discard(req.url)
         self.visited.add(req.url)
-        return req
 
     def enqueue(self, links: Iterable[str]) -> None:
         for url in links:
@@ -55,5 +208,189 @@ class Scheduler:
         if req.attempts + 1 >= self.max_attempts:
             return
         req.attempts += 1
-        self.queue.append(req)
+        self._push(req)
         self.pending.add(req.url)
+
+    def delay_host(self, url: str, seconds: float) -> None:
+        """Keep ``url``'s host behind the others for at least ``seconds``."""
+        host = _host(url)
+        self._next_at[host] = max(
+            self._next_at.get(host, 0.0), time.monotonic() + seconds
+        )
+
+    def done(self, req: Request) -> None:
+        """Called once the engine is finished with ``req``, whatever the outcome."""
+
+    def close(self) -> None:
+        """Release any backing store; the in-memory frontier has none."""
+
+
+class _SqliteURLSet:
+    """Set-like view over the ``url`` column of a frontier table."""
+
+    def __init__(self, conn: sqlite3.Connection, table: str) -> None:
+        self.conn = conn
+        self.table = table
+
+    def __contains__(self, url: str) -> bool:
+        cur = self.conn.execute(f"SELECT 1 FROM {self.table} WHERE url=?", (url,))
+        return cur.fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.conn.execute(f"SELECT count(*) FROM {self.table}").fetchone()[0]
+
+    def add(self, url: str) -> None:
+        self.conn.execute(f"INSERT OR IGNORE INTO {self.table} (url) VALUES (?)", (url,))
+
+    def discard(self, url: str) -> None:
+        self.conn.execute(f"DELETE FROM {self.table} WHERE url=?", (url,))
+
+
+class SqliteScheduler(Scheduler):
+    """Scheduler whose frontier and visited set live in a SQLite (WAL) file.
+
+    Every queued URL has a row in ``queue``; only up to ``hot_window`` of them
+    are also held in the in-memory host deques, the rest stay on disk and are
+    paged back in FIFO order as the hot window drains. A URL handed out by
+    :meth:`next` keeps its row, marked in flight, until :meth:`done` moves it
+    to ``visited``. Writes are committed every ``checkpoint_every`` operations
+    or ``checkpoint_interval_s`` seconds, after ``before_commit`` has flushed
+    the sinks, so after a crash ``resume=True`` continues from the last
+    checkpoint and fetches again every page not finished before it.
+    """
+
+    def __init__(self, cfg, resume: bool = False) -> None:
+        super().__init__(cfg)
+        sched_cfg = cfg.get("scheduler") or {}
+        path = Path(
+            sched_cfg.get("path")
+            or f"out/.state/{cfg.get('name') or 'crawl'}.frontier.db"
+        )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.hot_window = max(1, int(sched_cfg.get("hot_window", 10000)))
+        self.checkpoint_every = max(1, int(sched_cfg.get("checkpoint_every", 1000)))
+        self.checkpoint_interval = float(sched_cfg.get("checkpoint_interval_s", 30))
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # hot: 0 on disk only, 1 also in the host deques, 2 in flight
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS queue (id INTEGER PRIMARY KEY, "
+            "url TEXT NOT NULL UNIQUE, attempts INTEGER NOT NULL DEFAULT 0, "
+            "hot INTEGER NOT NULL DEFAULT 0)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS visited (url TEXT PRIMARY KEY) WITHOUT ROWID"
+        )
+        if resume:
+            # pages in flight at the crash were never finished: queue them again
+            self.conn.execute("UPDATE queue SET hot=0")
+        else:
+            self.conn.execute("DELETE FROM queue")
+            self.conn.execute("DELETE FROM visited")
+        self.conn.commit()
+        self.pending = _SqliteURLSet(self.conn, "queue")  # type: ignore[assignment]
+        self.visited = _SqliteURLSet(self.conn, "visited")  # type: ignore[assignment]
+        self._cold = self.conn.execute("SELECT count(*) FROM queue").fetchone()[0]
+        self._writes = 0
+        self._last_checkpoint = time.monotonic()
+
+    def __len__(self) -> int:
+        return self._size + self._cold
+
+    def _tick(self) -> None:
+        self._writes += 1
+        if (
+            self._writes >= self.checkpoint_every
+            or time.monotonic() - self._last_checkpoint >= self.checkpoint_interval
+        ):
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        if self.before_commit is not None:
+            self.before_commit()
+        self.conn.commit()
+        self._writes = 0
+        self._last_checkpoint = time.monotonic()
+
+    def _store(self, req: Request) -> None:
+        # once anything is on disk, newer URLs queue behind it to keep FIFO order
+        hot = not self._cold and self._size < self.hot_window
+        self.conn.execute(
+            "INSERT INTO queue (url, attempts, hot) VALUES (?, ?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET attempts=excluded.attempts, hot=excluded.hot",
+            (req.url, req.attempts, int(hot)),
+        )
+        if hot:
+            self._push(req)
+        else:
+            self._cold += 1
+        self._tick()
+
+    def _refill(self) -> None:
+        rows = self.conn.execute(
+            "SELECT id, url, attempts FROM queue WHERE hot=0 ORDER BY id LIMIT ?",
+            (self.hot_window - self._size,),
+        ).fetchall()
+        self.conn.executemany(
+            "UPDATE queue SET hot=1 WHERE id=?", [(row[0],) for row in rows]
+        )
+        for _id, url, attempts in rows:
+            self._push(Request(url, attempts=attempts))
+        self._cold -= len(rows)
+
+    def _maybe_enqueue(self, url: str) -> None:
+        if url in self.visited or url in self.pending:
+            return
+        self._store(Request(url))
+
+    def has_next(self) -> bool:
+        return self._size > 0 or self._cold > 0
+
+    def ready_in(self) -> float:
+        if self._cold and self._size <= self.hot_window // 2:
+            self._refill()
+        return super().ready_in()
+
+    def next(self) -> Request:
+        if self._cold and self._size <= self.hot_window // 2:
+            self._refill()
+        req = super().next()
+        self._tick()
+        return req
+
+    def _dispatched(self, req: Request) -> None:
+        self.conn.execute("UPDATE queue SET hot=2 WHERE url=?", (req.url,))
+
+    def defer(self, req: Request, _err: Exception) -> None:
+        if req.attempts + 1 >= self.max_attempts:
+            return
+        req.attempts += 1
+        self._store(req)
+
+    def done(self, req: Request) -> None:
+        # a deferred URL is queued again and keeps its row
+        cur = self.conn.execute(
+            "DELETE FROM queue WHERE url=? AND hot=2", (req.url,)
+        )
+        if cur.rowcount:
+            self.visited.add(req.url)
+        self._tick()
+
+    def close(self) -> None:
+        self.checkpoint()
+        self.conn.close()
+
+
+def build_scheduler(cfg, resume: bool = False) -> Scheduler:
+    backend = (cfg.get("scheduler") or {}).get("backend", "memory")
+    if backend == "sqlite":
+        return SqliteScheduler(cfg, resume=resume)
+    if backend == "distributed":
+        from .distributed import DistributedScheduler
+
+        # the shared store is the persistent state; every worker resumes it
+        return DistributedScheduler(cfg)
+    if resume:
+        warn("scheduler", backend=backend, err="RESUME_UNSUPPORTED")
+    return Scheduler(cfg)
@@ -0,0 +1,304 @@
+"""Deterministic local HTTP site for offline load tests.
+
+:class:`SiteSimulator` serves a generated site graph on ``127.0.0.1``:
+``/page/<n>`` for ``n`` in ``range(pages)``, each listing ``items_per_page``
+items and linking to its ``fanout`` children in a tree rooted at
+``/page/0`` (so every page is reachable) plus ``cross_links`` pseudo-random
+pages. Everything a page serves, including whether a given request fails,
+is derived from ``seed``, so two runs issuing the same requests see the
+same site.
+
+Per request the server sleeps for a latency drawn from a log-normal
+distribution (median ``latency_ms``, shape ``latency_sigma``), answers
+``error_rate`` of requests with 500/503 and ``throttle_rate`` with 429 plus
+``Retry-After``, and pads bodies to ``page_bytes``. With ``etag`` on, pages
+carry an ``ETag`` and ``If-None-Match`` revalidation gets a 304. Counters
+are served as JSON on ``/__stats``.
+
+:meth:`SiteSimulator.crawl_config` returns an engine config that crawls
+the simulated site.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class SiteSpec:
+    pages: int = 1000
+    fanout: int = 5
+    cross_links: int = 2
+    items_per_page: int = 20
+    page_bytes: int = 16_384
+    latency_ms: float = 20.0
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after_s: int = 1
+    etag: bool = True
+    seed: int = 0
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "SiteSpec":
+        return cls(**{k: v for k, v in d.items() if k in cls.__dataclass_fields__})
+
+
+class _Site:
+    """Page bodies and per-request outcomes for one :class:`SiteSpec`."""
+
+    def __init__(self, spec: SiteSpec) -> None:
+        self.spec = spec
+        self.lock = threading.Lock()
+        self.hits: Counter = Counter()  # path -> requests so far
+        self.statuses: Counter = Counter()
+        self.bytes_sent = 0
+
+    def _rng(self, *key: Any) -> random.Random:
+        return random.Random(":".join(map(str, (self.spec.seed,) + key)))
+
+    def links(self, n: int) -> List[int]:
+        spec = self.spec
+        children = range(n * spec.fanout + 1, n * spec.fanout + spec.fanout + 1)
+        out = [c for c in children if c < spec.pages]
+        rng = self._rng("links", n)
+        out += [rng.randrange(spec.pages) for _ in range(spec.cross_links)]
+        return out
+
+    def body(self, n: int) -> bytes:
+        spec = self.spec
+        rng = self._rng("items", n)
+        items = "".join(
+            f'<li class="item"><a class="title" href="/item/{n}-{k}">'
+            f'Item {n}-{k}</a> <span class="price">{rng.uniform(1, 500):.2f}'
+            "</span></li>\n"
+            for k in range(spec.items_per_page)
+        )
+        links = "".join(
+            f'<a class="page" href="/page/{m}">{m}</a>\n' for m in self.links(n)
+        )
+        html = (
+            '<!doctype html><html><head><meta charset="utf-8">'
+            f'<title>Page {n}</title></head><body>\n<ul class="items">\n{items}</ul>\n'
+            f'<div class="links">\n{links}</div>\n'
+        )
+        pad = spec.page_bytes - len(html) - len("<!--  --></body></html>")
+        if pad > 0:
+            html += "<!-- " + "x" * pad + " -->"
+        return (html + "</body></html>").encode("utf-8")
+
+    def etag(self, n: int) -> str:
+        digest = hashlib.blake2b(f"{self.spec.seed}:{n}".encode(), digest_size=8)
+        return f'"{digest.hexdigest()}"'
+
+    def latency(self, path: str, nth: int) -> float:
+        spec = self.spec
+        if spec.latency_ms <= 0:
+            return 0.0
+        rng = self._rng("latency", path, nth)
+        return spec.latency_ms / 1000 * math.exp(rng.gauss(0, spec.latency_sigma))
+
+    def failure(self, path: str, nth: int) -> Optional[int]:
+        """Error status for the ``nth`` request of ``path``, if it fails."""
+        spec = self.spec
+        roll = self._rng("fail", path, nth).random()
+        if roll < spec.throttle_rate:
+            return 429
+        if roll < spec.throttle_rate + spec.error_rate / 2:
+            return 503
+        if roll < spec.throttle_rate + spec.error_rate:
+            return 500
+        return None
+
+    def count(self, status: int, nbytes: int) -> None:
+        with self.lock:
+            self.statuses[status] += 1
+            self.bytes_sent += nbytes
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "requests": sum(self.statuses.values()),
+                "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+                "bytes_sent": self.bytes_sent,
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body go out in separate writes; without TCP_NODELAY every
+    # keep-alive response would stall on a delayed ACK
+    disable_nagle_algorithm = True
+    site: _Site  # set on the per-server subclass
+
+    def do_GET(self) -> None:
+        site = self.site
+        path = self.path.split("?", 1)[0]
+        if path == "/__stats":
+            self._send(
+                200, json.dumps(site.stats()).encode(), "application/json", count=False
+            )
+            return
+        with site.lock:
+            nth = site.hits[path]
+            site.hits[path] += 1
+        delay = site.latency(path, nth)
+        if delay:
+            time.sleep(delay)
+        n = self._page_no(path)
+        if n is None:
+            self._send(404, b"not found")
+            return
+        status = site.failure(path, nth)
+        if status is not None:
+            headers = (
+                {"Retry-After": str(site.spec.retry_after_s)} if status == 429 else {}
+            )
+            self._send(status, b"unavailable", headers=headers)
+            return
+        headers = {}
+        if site.spec.etag:
+            etag = headers["ETag"] = site.etag(n)
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, b"", headers=headers)
+                return
+        self._send(200, site.body(n), headers=headers)
+
+    def _page_no(self, path: str) -> Optional[int]:
+        prefix, _, num = path.rpartition("/")
+        if prefix != "/page" or not num.isdigit() or int(num) >= self.site.spec.pages:
+            return None
+        return int(num)
+
+    def _send(
+        self,
+        status: int,
+        body: bytes,
+        ctype: str = "text/html; charset=utf-8",
+        headers: Optional[Dict[str, str]] = None,
+        count: bool = True,
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        # counted before the body goes out, so a client that has read the
+        # response always finds it in /__stats
+        if count:
+            self.site.count(status, len(body))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+class SiteSimulator:
+    """Serve a :class:`SiteSpec` site from a background thread.
+
+    Use as a context manager, or call :meth:`start` and :meth:`close`.
+    """
+
+    def __init__(
+        self, spec: Optional[SiteSpec] = None, host: str = "127.0.0.1", port: int = 0
+    ) -> None:
+        self.spec = spec or SiteSpec()
+        self.site = _Site(self.spec)
+        handler = type("SiteHandler", (_Handler,), {"site": self.site})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "SiteSimulator":
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name="sitesim", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+
+    def __enter__(self) -> "SiteSimulator":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.site.stats()
+
+    def crawl_config(self, out_dir: str, **overrides: Any) -> Dict[str, Any]:
+        return crawl_config(self.base_url, out_dir, **overrides)
+
+
+def crawl_config(base_url: str, out_dir: str, **overrides: Any) -> Dict[str, Any]:
+    """Engine config crawling the simulated site at ``base_url`` from ``/page/0``.
+
+    Items go to ``<out_dir>/items.csv``; fetching is unthrottled and logging
+    off unless ``overrides`` (merged over the top level) say otherwise.
+    """
+    cfg: Dict[str, Any] = {
+        "name": "sitesim",
+        "base_url": base_url,
+        "entrypoints": [{"url": f"{base_url}/page/0"}],
+        "follow_rules": {"allow": [r"^/page/\d+$"]},
+        "request": {"timeout_s": 30, "rate_limit": {"domain_qps": 0, "concurrency": 1}},
+        "items": {
+            "SimItem": {
+                "list_selector": "ul.items li",
+                "fields": {
+                    "url": {"candidates": [{"css": "ul.items li a.title::attr(href)"}]},
+                    "title": {"candidates": [{"css": "ul.items li a.title::text"}]},
+                    "price": {
+                        "candidates": [{"css": "ul.items li span.price::text"}],
+                        "normalize": ["to_float"],
+                    },
+                },
+                "dedupe_keys": ["url"],
+            }
+        },
+        "pipelines": [{"type": "csv", "path": f"{out_dir}/items.csv"}],
+        "logging": {"level": "off"},
+    }
+    cfg.update(overrides)
+    return cfg
+
+
+def serve_process(spec: Dict[str, Any], conn: Any) -> None:
+    """``multiprocessing`` target: serve ``spec`` until ``conn`` receives anything.
+
+    Sends the base URL once listening and the final ``/__stats`` counters on
+    shutdown, so the load generator's RSS and GIL are not shared with the site.
+    """
+    sim = SiteSimulator(SiteSpec.from_dict(spec)).start()
+    conn.send(sim.base_url)
+    try:
+        conn.recv()
+    except EOFError:  # pragma: no cover - parent died
+        pass
+    sim.close()
+    conn.send(sim.stats())
+
+
+__all__ = ["SiteSpec", "SiteSimulator", "crawl_config", "serve_process"]
@@ -1,15 +1,244 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:  # optional dependency: without it the metrics calls are no-ops
+    from prometheus_client import (
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        Histogram,
+        start_http_server,
+    )
+except ImportError:  # pragma: no cover - exercised only without the package
+    CollectorRegistry = None  # type: ignore[assignment,misc]
+
+# fetches span ~1ms (file://, cache) to tens of seconds (slow hosts)
+_FETCH_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+_STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+
 class Telemetry:
+    """Run counters for the end-of-run summary, plus Prometheus metrics.
+
+    Metrics live in a registry owned by the instance, so runs in one process
+    do not collide; with ``metrics.port`` set :meth:`from_config` serves them
+    on ``http://<metrics.addr>:<port>/metrics`` until :meth:`close`.
+    """
+
     def __init__(self) -> None:
         self.success = 0
         self.errors = 0
         self.emitted = 0
+        self.not_modified = 0
+        self.skipped = 0
+        self.backoffs = 0
+        # host -> current adaptive concurrency limit
+        self.host_limits: Dict[str, float] = {}
+        self.connections: Dict[str, int] = {}
+        # name -> (approximate bytes, estimated false-positive rate)
+        self.membership: Dict[str, Tuple[int, float]] = {}
+        # sink -> (items still queued, last queue lag s, max queue lag s,
+        # failed sink calls)
+        self.sink_lag: Dict[str, Tuple[int, float, float, int]] = {}
+        self._server: Any = None
+        self.registry: Any = None
+        if CollectorRegistry is not None:
+            self._init_metrics()
+
+    def _init_metrics(self) -> None:
+        r = self.registry = CollectorRegistry()
+        self.fetch_seconds = Histogram(
+            "crawler_fetch_seconds",
+            "Fetch latency",
+            ["host", "status"],
+            registry=r,
+            buckets=_FETCH_BUCKETS,
+        )
+        self.fetch_bytes = Counter(
+            "crawler_fetch_bytes", "Response bytes downloaded", ["host"], registry=r
+        )
+        self.stage_seconds = Histogram(
+            "crawler_stage_seconds",
+            "Time per page in a processing stage",
+            ["stage"],
+            registry=r,
+            buckets=_STAGE_BUCKETS,
+        )
+        self.sink_seconds = Histogram(
+            "crawler_sink_emit_seconds",
+            "Sink write latency per batch",
+            ["sink"],
+            registry=r,
+            buckets=_STAGE_BUCKETS,
+        )
+        self.sink_failures = Counter(
+            "crawler_sink_errors", "Failed sink calls", ["sink"], registry=r
+        )
+        self.pages = Counter(
+            "crawler_pages", "Pages by outcome", ["outcome"], registry=r
+        )
+        self.items = Counter("crawler_items_emitted", "Items sent to sinks", registry=r)
+        self.queue_depth = Gauge(
+            "crawler_queue_depth", "URLs waiting in the frontier", registry=r
+        )
+        self.inflight = Gauge(
+            "crawler_inflight_requests", "Fetches in progress", registry=r
+        )
+        self.host_limit = Gauge(
+            "crawler_host_concurrency_limit",
+            "Adaptive per-host concurrency limit",
+            ["host"],
+            registry=r,
+        )
+        self.host_backoffs = Counter(
+            "crawler_host_backoffs",
+            "Adaptive limit decreases",
+            ["host", "reason"],
+            registry=r,
+        )
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "Telemetry":
+        telem = cls()
+        mcfg = cfg.get("metrics") or {}
+        if mcfg.get("port") is not None:
+            telem.serve(int(mcfg["port"]), mcfg.get("addr", "127.0.0.1"))
+        return telem
+
+    def serve(self, port: int, addr: str = "127.0.0.1") -> Optional[int]:
+        """Expose ``/metrics``; returns the bound port (``0`` picks a free one)."""
+        if self.registry is None:
+            return None
+        self._server, _ = start_http_server(port, addr=addr, registry=self.registry)
+        return self._server.server_port
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    # --- metrics ---------------------------------------------------------
+    def observe_fetch(self, url: str, status: Any, seconds: float, nbytes: int) -> None:
+        if self.registry is None:
+            return
+        host = urlsplit(url).hostname or "local"
+        self.fetch_seconds.labels(host, str(status or "error")).observe(seconds)
+        self.fetch_bytes.labels(host).inc(nbytes)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block into ``crawler_stage_seconds{stage=name}``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.registry is not None:
+                self.stage_seconds.labels(name).observe(time.perf_counter() - start)
+
+    def observe_sink(self, sink: str, seconds: float) -> None:
+        if self.registry is not None:
+            self.sink_seconds.labels(sink).observe(seconds)
+
+    def track_queue(self, depth: Callable[[], int]) -> None:
+        if self.registry is not None:
+            self.queue_depth.set_function(depth)
+
+    def fetch_started(self) -> None:
+        if self.registry is not None:
+            self.inflight.inc()
+
+    def fetch_finished(self) -> None:
+        if self.registry is not None:
+            self.inflight.dec()
+
+    def observe_host_limit(self, host: str, limit: float, reason: str) -> None:
+        """``AdaptiveLimiter`` callback: a host's concurrency limit moved."""
+        self.host_limits[host] = limit
+        if reason != "increase":
+            self.backoffs += 1
+        if self.registry is not None:
+            self.host_limit.labels(host).set(limit)
+            if reason != "increase":
+                self.host_backoffs.labels(host, reason).inc()
+
+    # --- counters --------------------------------------------------------
+    def _page(self, outcome: str) -> None:
+        if self.registry is not None:
+            self.pages.labels(outcome).inc()
 
     def mark_success(self) -> None:
         self.success += 1
+        self._page("success")
 
     def mark_error(self, _err: Exception) -> None:  # pragma: no cover - trivial
         self.errors += 1
+        self._page("error")
 
     def mark_emit(self) -> None:
         self.emitted += 1
+        if self.registry is not None:
+            self.items.inc()
+
+    def mark_not_modified(self) -> None:
+        self.not_modified += 1
+        self._page("not_modified")
+
+    def mark_skipped(self) -> None:
+        self.skipped += 1
+        self._page("skipped")
+
+    def record_connections(self, stats: Any) -> None:
+        """Take the fetcher's ``PoolStats`` once the run is over."""
+        self.connections = {
+            "conn_new": stats.new_connections,
+            "conn_reused": stats.reused,
+            "tls_handshakes": stats.tls_handshakes,
+        }
+
+    def record_membership(self, name: str, memory_bytes: int, fp_rate: float) -> None:
+        self.membership[name] = (memory_bytes, fp_rate)
+
+    def record_sink_lag(self, lag: Dict[str, Tuple[int, float, float, int]]) -> None:
+        self.sink_lag.update(lag)
+        if self.registry is not None:
+            for name, (_, _, _, errors) in lag.items():
+                self.sink_failures.labels(name).inc(errors)
+
+    def sink_errors(self) -> Dict[str, int]:
+        """Failed calls per sink that had any; those sinks may miss items."""
+        return {name: lag[3] for name, lag in self.sink_lag.items() if lag[3]}
+
+    def counters(self) -> Dict[str, int]:
+        """Page and item counts as a plain (picklable) dict."""
+        return {
+            "success": self.success,
+            "errors": self.errors,
+            "emitted": self.emitted,
+            "not_modified": self.not_modified,
+            "skipped": self.skipped,
+            "sink_errors": sum(self.sink_errors().values()),
+        }
 
+    def summary(self) -> str:
+        line = (
+            f"summary: success={self.success} errors={self.errors} "
+            f"emitted={self.emitted}"
+        )
+        if self.not_modified:
+            line += f" not_modified={self.not_modified}"
+        if self.skipped:
+            line += f" skipped={self.skipped}"
+        if self.backoffs:
+            line += f" backoffs={self.backoffs}"
+        for name, count in self.connections.items():
+            line += f" {name}={count}"
+        for name, (nbytes, fp_rate) in self.membership.items():
+            line += f" {name}_bytes={nbytes} {name}_fp={fp_rate:.2e}"
+        for name, (_, _, max_lag, errors) in self.sink_lag.items():
+            line += f" {name}_max_lag_s={max_lag:.3f}"
+            if errors:
+                line += f" {name}_errors={errors}"
+        return line
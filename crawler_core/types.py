@@ -1,5 +1,23 @@
+import re
 from dataclasses import dataclass, field
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+
+_CHARSET_RE = re.compile(r"charset=[\"']?([\w-]+)", re.I)
+_META_CHARSET_RE = re.compile(rb"<meta[^>]+charset=[\"']?([\w-]+)", re.I)
+# <meta> declarations must appear within the first 1024 bytes per the HTML spec
+_SNIFF_BYTES = 1024
+
+
+def sniff_charset(headers: Optional[Dict[str, str]], body: bytes = b"") -> str:
+    """Charset from the Content-Type header, else a ``<meta>`` tag, else utf-8."""
+    for key, value in (headers or {}).items():
+        if key.lower() == "content-type":
+            m = _CHARSET_RE.search(value)
+            if m:
+                return m.group(1)
+            break
+    m = _META_CHARSET_RE.search(body[:_SNIFF_BYTES])
+    return m.group(1).decode("ascii") if m else "utf-8"
 
 
 @dataclass
@@ -10,9 +28,57 @@ class Request:
     attempts: int = 0
 
 
-@dataclass
 class Response:
-    url: str
-    status: int
-    text: str
+    """A fetched page that keeps the raw body and decodes ``text`` on demand.
+
+    Build it from ``content`` bytes (plus the response ``headers``) and the
+    charset is sniffed and the body decoded on access to ``text``; passing
+    ``text=`` directly still works for pages that are already str. Only the
+    representation it was built from is kept, so a page never sits in memory
+    twice: the other one is derived again on every access.
+    """
+
+    __slots__ = ("url", "status", "headers", "not_modified", "_content", "_text", "_encoding")
+
+    def __init__(
+        self,
+        url: str,
+        status: int,
+        text: Optional[str] = None,
+        content: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        encoding: Optional[str] = None,
+        not_modified: bool = False,
+    ) -> None:
+        self.url = url
+        self.status = status
+        self.headers = headers or {}
+        # served from the HTTP cache after a 304: links still matter, items do not
+        self.not_modified = not_modified
+        self._content = content
+        self._text = text
+        self._encoding = encoding
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            return (self._text or "").encode(self.encoding)
+        return self._content
+
+    @property
+    def encoding(self) -> str:
+        if self._encoding is None:
+            self._encoding = sniff_charset(self.headers, self._content or b"")
+        return self._encoding
+
+    @property
+    def text(self) -> str:
+        if self._text is not None:
+            return self._text
+        try:
+            return (self._content or b"").decode(self.encoding, errors="replace")
+        except LookupError:  # unknown charset name
+            return (self._content or b"").decode("utf-8", errors="replace")
 
+    def __repr__(self) -> str:
+        return f"Response(url={self.url!r}, status={self.status!r})"
@@ -0,0 +1,111 @@
+"""Crawl one site with several workers sharing a lease-based frontier.
+
+    # start (or join) a crawl with 4 local worker processes
+    python runners/distributed.py --config configs/douban_top250.yml --workers 4
+    # on another machine, against the same store: one more worker
+    python runners/distributed.py --config configs/douban_top250.yml --store /shared/f.db
+    # frontier progress
+    python runners/distributed.py --config configs/douban_top250.yml --status
+
+Every worker seeds the entrypoints (a no-op once they are known) and then
+leases URLs from the store until the whole frontier is drained. Each worker
+writes CSV output to its own ``<name>.<worker>.csv``. Pass ``--reset`` to
+start over; without it a finished store crawls nothing new.
+"""
+
+import argparse
+import multiprocessing
+import os
+import pathlib
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+root = pathlib.Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+from crawler_core import engine
+from crawler_core.config import Config, load_and_validate
+from crawler_core.distributed import build_store
+from crawler_core.orchestrator import SiteResult, summary
+
+
+def worker_config(cfg: Config, worker_id: str, store: str = "") -> Config:
+    sched = {**(cfg.get("scheduler") or {}), "backend": "distributed"}
+    sched["worker_id"] = worker_id
+    if store:
+        sched["path"] = store
+    pipelines = []
+    for p in cfg["pipelines"]:
+        if p.get("type") == "csv":
+            path = pathlib.Path(p["path"])
+            p = {
+                **p,
+                "path": str(path.with_name(f"{path.stem}.{worker_id}{path.suffix}")),
+            }
+        pipelines.append(p)
+    return Config({**cfg, "scheduler": sched, "pipelines": pipelines})
+
+
+def run_worker(cfg: Config, worker_id: str) -> SiteResult:
+    start = time.perf_counter()
+    telem = engine.run_config(cfg)
+    failed = telem.sink_errors()
+    return SiteResult(
+        "",
+        worker_id,
+        time.perf_counter() - start,
+        telem.counters(),
+        error=f"sink errors: {failed}" if failed else None,
+    )
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--config", required=True)
+    ap.add_argument(
+        "--store", default="", help="shared frontier (default: scheduler.path)"
+    )
+    ap.add_argument("--workers", type=int, default=1, help="local worker processes")
+    ap.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}")
+    ap.add_argument(
+        "--reset", action="store_true", help="clear the shared frontier first"
+    )
+    ap.add_argument(
+        "--status", action="store_true", help="print frontier counts and exit"
+    )
+    args = ap.parse_args()
+
+    cfg = load_and_validate(args.config)
+    sched_cfg = worker_config(cfg, "", args.store)["scheduler"]
+    store = build_store(sched_cfg, cfg["name"])
+    try:
+        if args.status:
+            print(" ".join(f"{k}={v}" for k, v in store.stats().items()))
+            return 0
+        if args.reset:
+            store.reset()
+    finally:
+        store.close()
+
+    ids = [f"{args.worker_id}-{i}" for i in range(args.workers)]
+    start = time.perf_counter()
+    if args.workers == 1:
+        results = [run_worker(worker_config(cfg, ids[0], args.store), ids[0])]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            futures = [
+                pool.submit(run_worker, worker_config(cfg, wid, args.store), wid)
+                for wid in ids
+            ]
+            results = [f.result() for f in futures]
+    print(summary(results, time.perf_counter() - start, "distributed", "workers"))
+    return 1 if any(r.error for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
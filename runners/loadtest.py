@@ -0,0 +1,194 @@
+"""Load-test the engine against the local site simulator.
+
+Starts :mod:`crawler_core.sitesim` in a child process, crawls it with
+``engine.run`` through a generated config and reports throughput, fetch and
+per-request latency percentiles (from ``ProfilingHook`` spans) and the
+crawler's peak RSS:
+
+    python runners/loadtest.py --pages 2000 --latency-ms 30 --concurrency 16
+    python runners/loadtest.py --throttle-rate 0.05 --error-rate 0.02 --out lt.json
+
+With ``--runs 2`` or more the crawl is repeated with an HTTP cache, so later
+runs revalidate every page via ``ETag``.
+"""
+
+import argparse
+import json
+import multiprocessing
+import pathlib
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+root = pathlib.Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+from crawler_core import engine
+from crawler_core.sitesim import SiteSpec, crawl_config, serve_process
+
+
+def percentiles(values: List[float], qs=(50, 90, 99)) -> Dict[str, float]:
+    """Nearest-rank percentiles of ``values``, in milliseconds."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    out = {}
+    for q in qs:
+        idx = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+        out[f"p{q}_ms"] = round(ordered[idx] * 1000, 2)
+    out["max_ms"] = round(ordered[-1] * 1000, 2)
+    return out
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def crawl_once(cfg: Dict[str, Any], tmp: pathlib.Path, n: int) -> Dict[str, Any]:
+    profiles = tmp / f"profiles{n}"
+    cfg = {
+        **cfg,
+        "hooks": [
+            {
+                "class": "crawler_core.hooks:ProfilingHook",
+                "options": {"out_dir": str(profiles), "keep": 10_000_000},
+            }
+        ],
+    }
+    cfg_path = tmp / f"loadtest{n}.json"
+    cfg_path.write_text(json.dumps(cfg))
+    start = time.perf_counter()
+    telem = engine.run(str(cfg_path))
+    elapsed = time.perf_counter() - start
+    spans_path = profiles / "spans.jsonl"
+    spans = (
+        [json.loads(line) for line in spans_path.read_text().splitlines()]
+        if spans_path.exists()
+        else []
+    )
+    # retried pages have one span per attempt
+    pages = len({s["url"] for s in spans}) or telem.success + telem.skipped
+    return {
+        "seconds": round(elapsed, 3),
+        "pages": pages,
+        "requests": len(spans),
+        "success": telem.success,
+        "errors": telem.errors,
+        "not_modified": telem.not_modified,
+        "items": telem.emitted,
+        "pages_per_s": round(pages / elapsed, 2),
+        "items_per_s": round(telem.emitted / elapsed, 2),
+        "fetch_latency": percentiles([s["fetch_s"] for s in spans]),
+        "request_latency": percentiles([s["total_s"] for s in spans]),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        **telem.connections,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    site = ap.add_argument_group("site")
+    site.add_argument("--pages", type=int, default=1000)
+    site.add_argument("--fanout", type=int, default=5)
+    site.add_argument("--cross-links", type=int, default=2)
+    site.add_argument("--items", type=int, default=20, help="items per page")
+    site.add_argument("--page-bytes", type=int, default=16_384)
+    site.add_argument("--latency-ms", type=float, default=20.0, help="median latency")
+    site.add_argument(
+        "--latency-sigma", type=float, default=0.5, help="log-normal shape"
+    )
+    site.add_argument("--error-rate", type=float, default=0.0, help="500/503 share")
+    site.add_argument("--throttle-rate", type=float, default=0.0, help="429 share")
+    site.add_argument("--no-etag", action="store_true")
+    site.add_argument("--seed", type=int, default=0)
+    crawl = ap.add_argument_group("crawler")
+    crawl.add_argument("--concurrency", type=int, default=8)
+    crawl.add_argument("--qps", type=float, default=0, help="per-host limit, 0 = off")
+    crawl.add_argument("--max-connections", type=int, default=100)
+    crawl.add_argument("--parse-workers", type=int, default=0)
+    crawl.add_argument(
+        "--adaptive-max", type=int, default=0, help="enable adaptive throttling"
+    )
+    crawl.add_argument("--runs", type=int, default=1, help=">1 revalidates via ETag")
+    ap.add_argument("--out", help="write the JSON report here")
+    args = ap.parse_args()
+
+    spec = SiteSpec(
+        pages=args.pages,
+        fanout=args.fanout,
+        cross_links=args.cross_links,
+        items_per_page=args.items,
+        page_bytes=args.page_bytes,
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        etag=not args.no_etag,
+        seed=args.seed,
+    )
+    conn, child_conn = multiprocessing.Pipe()
+    server = multiprocessing.Process(
+        target=serve_process, args=(vars(spec), child_conn), daemon=True
+    )
+    server.start()
+    base_url = conn.recv()
+    runs = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp = pathlib.Path(tmp_dir)
+            overrides: Dict[str, Any] = {
+                "request": {
+                    "timeout_s": 30,
+                    "rate_limit": {
+                        "domain_qps": args.qps,
+                        "concurrency": args.concurrency,
+                        "burst": max(1, args.concurrency),
+                    },
+                    "pool": {
+                        "max_connections": args.max_connections,
+                        "max_keepalive_connections": args.max_connections,
+                    },
+                },
+            }
+            if args.adaptive_max:
+                overrides["request"]["adaptive"] = {
+                    "enabled": True,
+                    "max_concurrency": args.adaptive_max,
+                }
+            if args.parse_workers:
+                overrides["parse"] = {"workers": args.parse_workers}
+            if args.runs > 1:
+                overrides["http_cache"] = {"path": str(tmp / "http_cache.db")}
+            cfg = crawl_config(base_url, tmp_dir, **overrides)
+            for n in range(args.runs):
+                runs.append(crawl_once(cfg, tmp, n))
+    finally:
+        conn.send("stop")
+        site_stats = conn.recv()
+        server.join()
+
+    report = {"site": vars(spec), "server": site_stats, "runs": runs}
+    for n, r in enumerate(runs):
+        print(
+            f"run {n}: {r['pages']} pages in {r['seconds']}s "
+            f"({r['pages_per_s']} pages/s, {r['items_per_s']} items/s) "
+            f"errors={r['errors']} not_modified={r['not_modified']} "
+            f"peak_rss={r['peak_rss_mb']}MB"
+        )
+        for name in ("fetch_latency", "request_latency"):
+            cols = " ".join(f"{k}={v}" for k, v in r[name].items())
+            print(f"  {name}: {cols}")
+    print(
+        f"server: {site_stats['requests']} requests, statuses={site_stats['statuses']}"
+    )
+    if args.out:
+        pathlib.Path(args.out).write_text(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,13 @@ if __name__ == "__main__":
     ap.add_argument(
         "--dry-run", action="store_true", help="validate config and exit without network"
     )
+    ap.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue from the persisted frontier (scheduler.backend: sqlite)",
+    )
     args = ap.parse_args()
-    run(args.config, dry_run=args.dry_run)
+    telem = run(args.config, dry_run=args.dry_run, resume=args.resume)
+    # items a sink failed to write are lost: do not report success
+    sys.exit(1 if telem is not None and telem.sink_errors() else 0)
 
@@ -1,14 +1,47 @@
 import argparse
 import glob
+import pathlib
+import sys
+import time
 
-from crawler_core.engine import run
+root = pathlib.Path(__file__).resolve().parents[1]
+if str(root) not in sys.path:
+    sys.path.insert(0, str(root))
+
+from crawler_core.orchestrator import Orchestrator, summary
 
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--glob", required=True)
-    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--workers", type=int, default=1, help="sites crawled at once")
+    ap.add_argument(
+        "--max-connections",
+        type=int,
+        default=0,
+        help="connections shared by all running sites (0 = per-site settings)",
+    )
+    ap.add_argument("--cpus", type=int, default=0, help="CPU budget (default: all)")
+    ap.add_argument(
+        "--history",
+        default="out/.state/schedule_history.json",
+        help="per-site durations used to start the longest crawls first",
+    )
+    ap.add_argument("--resume", action="store_true")
     args = ap.parse_args()
-    for path in glob.glob(args.glob):
-        run(path)
 
+    paths = sorted(glob.glob(args.glob))
+    start = time.perf_counter()
+    results = Orchestrator(
+        paths,
+        workers=args.workers,
+        max_connections=args.max_connections,
+        cpus=args.cpus,
+        history=args.history,
+        resume=args.resume,
+    ).run()
+    for r in sorted(results, key=lambda r: r.seconds, reverse=True):
+        status = r.error or " ".join(f"{k}={v}" for k, v in r.counters.items())
+        print(f"{r.name:<24} {r.seconds:8.1f}s  {status}")
+    print(summary(results, time.perf_counter() - start))
+    sys.exit(1 if any(r.error for r in results) else 0)
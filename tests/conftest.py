@@ -1,5 +1,47 @@
+import json
 import sys
 import pathlib
 
-sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+import pytest
 
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def _write_cfg(tmp_path, entrypoints, concurrency, items=None, **extra):
+    cfg = {
+        "name": "t",
+        "base_url": "http://127.0.0.1",
+        "request": {"rate_limit": {"concurrency": concurrency}},
+        "entrypoints": entrypoints,
+        "items": items
+        or {
+            "Movie": {
+                "list_selector": "ol.grid_view li",
+                "fields": {
+                    "title": {"candidates": [{"css": ".hd a span.title::text"}]},
+                    "detail_url": {"candidates": [{"css": ".hd a::attr(href)"}]},
+                },
+                "dedupe_keys": ["detail_url"],
+            }
+        },
+        "pipelines": [{"type": "csv", "path": str(tmp_path / "out.csv")}],
+        **extra,
+    }
+    path = tmp_path / "cfg.json"
+    path.write_text(json.dumps(cfg))
+    return str(path)
+
+
+@pytest.fixture
+def douban_page():
+    """The offline Douban Top 250 page (25 movies) the engine tests crawl."""
+    return ROOT / "offline" / "douban_top250_page1.html"
+
+
+@pytest.fixture
+def write_cfg():
+    """``write_cfg(dir, entrypoints, concurrency, items=None, **extra)`` writes
+    ``dir/cfg.json`` (a Movie item for ``douban_page`` by default, items to
+    ``dir/out.csv``) and returns its path."""
+    return _write_cfg
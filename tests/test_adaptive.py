@@ -0,0 +1,181 @@
+import asyncio
+import json
+import threading
+import time
+from email.utils import formatdate
+
+from crawler_core import engine
+from crawler_core.anti.adaptive import AdaptiveLimiter, parse_retry_after
+from crawler_core.scheduler import Scheduler
+from crawler_core.sitesim import SiteSimulator, SiteSpec
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    now = time.time()
+    assert 29 <= parse_retry_after(formatdate(now + 30, usegmt=True), now) <= 30
+    assert parse_retry_after(formatdate(now - 30, usegmt=True), now) == 0.0
+    assert parse_retry_after("soon") is None and parse_retry_after(None) is None
+
+
+def test_additive_increase_multiplicative_decrease():
+    changes = []
+    lim = AdaptiveLimiter(
+        min_concurrency=1,
+        max_concurrency=4,
+        initial_concurrency=2,
+        on_change=lambda *a: changes.append(a),
+    )
+    for _ in range(20):
+        lim.release("h", lim.acquire("h"), 200)
+    assert lim.limit("h") == 4  # capped at max_concurrency
+    started = [lim.acquire("h") for _ in range(4)]
+    with lim._lock:
+        assert lim._try_acquire("h") is None  # window full
+    for s in started:
+        lim.release("h", s, 429)
+    # one backoff for the whole window of requests sent before it
+    assert lim.limit("h") == 2
+    assert [c for c in changes if c[2] != "increase"] == [("h", 2.0, "429")]
+    lim.release("h", lim.acquire("h"), 504)
+    assert lim.limit("h") == 1  # gateway timeouts back off too
+    lim.release("h", lim.acquire("h"), 500)  # an app error is no load signal
+    for _ in range(3):
+        lim.release("h", lim.acquire("h"), None, timeout=True)
+    assert lim.limit("h") == 1  # floored at min_concurrency
+    assert lim.limits() == {"h": 1}
+
+
+def test_retry_after_pauses_the_host_only():
+    lim = AdaptiveLimiter()
+    lim.release("slow", lim.acquire("slow"), 503, retry_after=0.2)
+    start = time.monotonic()
+    lim.acquire("fast")
+    assert time.monotonic() - start < 0.05
+    lim.acquire("slow")
+    assert time.monotonic() - start >= 0.15
+
+
+def test_waiters_sleep_until_a_slot_is_released():
+    lim = AdaptiveLimiter(max_concurrency=1, initial_concurrency=1)
+    calls = []
+    try_acquire = lim._try_acquire
+    lim._try_acquire = lambda host: calls.append(host) or try_acquire(host)
+    started = lim.acquire("h")
+    woke = {}
+
+    def thread_waiter():
+        lim.release("h", lim.acquire("h"), 200)
+        woke["thread"] = time.monotonic()
+
+    async def task_waiter():
+        lim.release("h", await lim.acquire_async("h"), 200)
+        woke["task"] = time.monotonic()
+
+    t = threading.Thread(target=thread_waiter)
+    t.start()
+    loop = threading.Thread(target=asyncio.run, args=(task_waiter(),))
+    loop.start()
+    time.sleep(0.2)
+    assert woke == {} and len(calls) <= 4  # no polling while the host is full
+    released = time.monotonic()
+    lim.release("h", started, 200)
+    t.join(1)
+    loop.join(1)
+    assert set(woke) == {"thread", "task"}
+    assert max(woke.values()) - released < 0.1
+
+
+def test_delayed_host_goes_behind_the_others():
+    sched = Scheduler({"request": {"rate_limit": {"domain_qps": 0}}})
+    sched.enqueue(["http://a/1", "http://a/2", "http://b/1"])
+    sched.delay_host("http://a/", 60)
+    assert [sched.next().url for _ in range(3)] == [
+        "http://b/1",
+        "http://a/1",
+        "http://a/2",
+    ]
+
+
+def test_engine_backs_off_and_retries_throttled_pages(tmp_path):
+    spec = SiteSpec(
+        pages=30,
+        fanout=3,
+        items_per_page=1,
+        latency_ms=1,
+        throttle_rate=0.3,
+        retry_after_s=0,
+    )
+    with SiteSimulator(spec) as sim:
+        cfg = sim.crawl_config(
+            str(tmp_path),
+            request={
+                "rate_limit": {"domain_qps": 0, "concurrency": 4},
+                "retry": {"max_attempts": 20},
+                "adaptive": {"enabled": True, "max_concurrency": 4},
+            },
+        )
+        path = tmp_path / "cfg.json"
+        path.write_text(json.dumps(cfg))
+        telem = engine.run(str(path))
+        statuses = sim.stats()["statuses"]
+    assert telem.success == 30 and telem.emitted == 30
+    assert telem.errors == statuses["429"] > 0
+    assert telem.backoffs > 0
+    assert 1 <= telem.host_limits["127.0.0.1"] <= 4
+    assert "backoffs=" in telem.summary()
+
+
+def test_engine_retries_server_errors(tmp_path):
+    spec = SiteSpec(pages=30, fanout=3, items_per_page=2, latency_ms=0, error_rate=0.3)
+    with SiteSimulator(spec) as sim:
+        cfg = sim.crawl_config(
+            str(tmp_path),
+            request={
+                "rate_limit": {"domain_qps": 0},
+                "retry": {"max_attempts": 20},
+            },
+        )
+        path = tmp_path / "cfg.json"
+        path.write_text(json.dumps(cfg))
+        telem = engine.run(str(path))
+        statuses = sim.stats()["statuses"]
+    assert statuses["500"] > 0 and statuses["503"] > 0
+    assert telem.success == 30 and telem.emitted == 60
+    assert telem.errors == statuses["500"] + statuses["503"]
+
+
+def test_full_host_does_not_hold_up_the_others(tmp_path):
+    slow_spec = SiteSpec(
+        pages=8, fanout=0, items_per_page=1, latency_ms=250, latency_sigma=0
+    )
+    fast_spec = SiteSpec(
+        pages=20, fanout=3, items_per_page=1, latency_ms=10, latency_sigma=0
+    )
+    with SiteSimulator(slow_spec) as slow, SiteSimulator(fast_spec) as fast:
+        answered = []
+        count = fast.site.count
+        fast.site.count = lambda *a: answered.append(time.monotonic()) or count(*a)
+        # same server address, told apart by host name
+        fast_url = fast.base_url.replace("127.0.0.1", "localhost")
+        cfg = slow.crawl_config(
+            str(tmp_path),
+            entrypoints=[{"url": f"{slow.base_url}/page/{n}"} for n in range(8)]
+            + [{"url": f"{fast_url}/page/0"}],
+            allowed_domains=["127.0.0.1", "localhost"],
+            request={
+                "rate_limit": {"domain_qps": 0, "concurrency": 4},
+                "adaptive": {
+                    "enabled": True,
+                    "initial_concurrency": 1,
+                    "max_concurrency": 1,
+                },
+            },
+        )
+        path = tmp_path / "cfg.json"
+        path.write_text(json.dumps(cfg))
+        start = time.monotonic()
+        telem = engine.run(str(path))
+    assert telem.success == 28
+    # the slow host takes 8 x 0.25s; the fast one is not queued behind it
+    assert len(answered) == 20 and answered[-1] - start < 1.0
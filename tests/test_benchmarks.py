@@ -0,0 +1,40 @@
+import json
+import pathlib
+
+from benchmarks.run import compare, synthetic_page
+from crawler_core.config import load_and_validate
+from crawler_core.extractor import Extractor
+from crawler_core.types import Response
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+def test_compare_flags_only_drops_beyond_tolerance():
+    baseline = {
+        "a": {"items_per_s": 100.0, "pages_per_s": 10.0},
+        "b": {"items_per_s": 50.0},
+    }
+    results = {
+        "a": {"items_per_s": 81.0, "pages_per_s": 7.9},  # -19% ok, -21% regression
+        "b": {"items_per_s": 500.0},  # faster is never a regression
+        "new": {"items_per_s": 1.0},  # no baseline yet
+    }
+    assert compare(results, baseline, 0.2) == [
+        "a pages_per_s: 7.9 vs baseline 10.0 (-21%)"
+    ]
+    assert compare(results, baseline, 0.25) == []
+
+
+def test_synthetic_pages_hold_distinct_items():
+    cfg = load_and_validate(str(ROOT / "configs" / "douban_top250.yml"))
+    page = Response(url="http://x", status=200, text=synthetic_page(30, offset=100))
+    _, items = Extractor.parse(page, cfg)
+    assert len(items) == 30
+    assert len({it["detail_url"] for it in items}) == 30
+
+
+def test_baseline_covers_every_benchmark():
+    report = json.loads((ROOT / "benchmarks" / "baseline.json").read_text())
+    names = set(report["results"])
+    assert {"parse.lxml.100", "normalize.100", "dedupe.sqlite", "sink.pg"} <= names
+    assert "engine.100" in names
@@ -1,10 +1,59 @@
+from crawler_core import engine
 from crawler_core.dedupe import Dedupe
+from crawler_core.pipelines.csv_sink import CSVSink
 
 
 def test_dedupe_skips_duplicates():
-    Dedupe._seen.clear()
+    dedupe = Dedupe()
     items_cfg = {"Quote": {"dedupe_keys": ["url"]}}
     item1 = {"__type__": "Quote", "url": "u1"}
     item2 = {"__type__": "Quote", "url": "u1"}
-    assert Dedupe.seen(item1, items_cfg) is False
-    assert Dedupe.seen(item2, items_cfg) is True
+    assert dedupe.seen(item1, items_cfg) is False
+    assert dedupe.seen(item2, items_cfg) is True
+
+
+def test_dedupe_is_scoped_to_instance():
+    items_cfg = {"Quote": {"dedupe_keys": ["url"]}}
+    item = {"__type__": "Quote", "url": "u1"}
+    assert Dedupe().seen(item, items_cfg) is False
+    assert Dedupe().seen(dict(item), items_cfg) is False
+
+
+def test_dedupe_persists_per_site_across_runs(tmp_path):
+    path = str(tmp_path / "dedupe.db")
+    items_cfg = {"Quote": {"dedupe_keys": ["url"]}}
+    first = Dedupe(site="a", path=path, lru_size=1)
+    assert first.seen({"__type__": "Quote", "url": "u1"}, items_cfg) is False
+    assert first.seen({"__type__": "Quote", "url": "u2"}, items_cfg) is False
+    # u1 has been evicted from the one-entry LRU and is answered from disk
+    assert first.seen({"__type__": "Quote", "url": "u1"}, items_cfg) is True
+    first.close()
+
+    again = Dedupe(site="a", path=path)
+    assert again.seen({"__type__": "Quote", "url": "u1"}, items_cfg) is True
+    assert again.seen({"__type__": "Quote", "url": "u3"}, items_cfg) is False
+    again.close()
+    other_site = Dedupe(site="b", path=path)
+    assert other_site.seen({"__type__": "Quote", "url": "u1"}, items_cfg) is False
+    other_site.close()
+
+
+def test_items_lost_by_a_failing_sink_are_emitted_again(
+    tmp_path, monkeypatch, douban_page, write_cfg
+):
+    cfg = write_cfg(
+        tmp_path,
+        [{"url": douban_page.as_uri()}],
+        concurrency=1,
+        dedupe={"path": str(tmp_path / "dedupe.db")},
+    )
+
+    def broken(self):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as m:
+        m.setattr(CSVSink, "flush", broken)
+        engine.run(cfg)
+    assert not (tmp_path / "out.csv").exists()
+    assert engine.run(cfg).emitted == 25
+    assert engine.run(cfg).emitted == 0
@@ -0,0 +1,251 @@
+import threading
+import time
+from collections import Counter
+
+from crawler_core import engine
+from crawler_core.config import Config
+from crawler_core.distributed import (
+    DONE,
+    FAILED,
+    LEASED,
+    QUEUED,
+    DistributedScheduler,
+    FrontierStore,
+    SqliteFrontierStore,
+    build_store,
+    shard_of,
+)
+from crawler_core.sitesim import SiteSimulator, SiteSpec
+
+
+class MemoryFrontierStore(FrontierStore):
+    """In-process stand-in store, shared by every scheduler of one crawl name."""
+
+    _open: dict = {}
+
+    def __init__(self, shards):
+        self.shards = shards
+        self.lock = threading.Lock()
+        self.urls = {}  # url -> [state, attempts, worker, lease_until]
+        self.workers = {}  # worker -> seen until
+
+    @classmethod
+    def from_config(cls, sched_cfg, name):
+        return cls._open.setdefault(name, cls(int(sched_cfg.get("shards", 64))))
+
+    def heartbeat(self, worker, ttl):
+        with self.lock:
+            self.workers[worker] = time.time() + ttl
+
+    def claim(self, worker, ttl):
+        # shards are split by rank among live workers; leases keep them apart
+        self.heartbeat(worker, ttl)
+        with self.lock:
+            live = sorted(w for w, t in self.workers.items() if t > time.time())
+        rank = live.index(worker)
+        return {s for s in range(self.shards) if s % len(live) == rank}
+
+    def add(self, urls):
+        with self.lock:
+            new = [u for u in urls if u not in self.urls]
+            for u in new:
+                self.urls[u] = [QUEUED, 0, None, 0.0]
+        return len(new)
+
+    def lease(self, worker, shards, n, ttl):
+        out, now = [], time.time()
+        with self.lock:
+            for url, row in self.urls.items():
+                if len(out) == n:
+                    break
+                free = row[0] == QUEUED or (row[0] == LEASED and row[3] <= now)
+                if free and shard_of(url, self.shards) in shards:
+                    row[0], row[2], row[3] = LEASED, worker, now + ttl
+                    out.append((url, row[1]))
+        return out
+
+    def _set_state(self, worker, urls, state, attempts=None):
+        with self.lock:
+            for url in urls:
+                row = self.urls.get(url)
+                if row and row[0] == LEASED and row[2] == worker:
+                    row[0], row[2] = state, None
+                    if attempts is not None:
+                        row[1] = attempts
+
+    def complete(self, worker, urls):
+        self._set_state(worker, urls, DONE)
+
+    def retry(self, worker, url, attempts):
+        self._set_state(worker, [url], QUEUED, attempts)
+
+    def fail(self, worker, url):
+        self._set_state(worker, [url], FAILED)
+
+    def release(self, worker, urls):
+        self._set_state(worker, urls, QUEUED)
+
+    def leave(self, worker):
+        self.release(worker, [u for u, r in self.urls.items() if r[2] == worker])
+        with self.lock:
+            self.workers.pop(worker, None)
+
+    def unfinished(self):
+        with self.lock:
+            return sum(r[0] in (QUEUED, LEASED) for r in self.urls.values())
+
+    def stats(self):
+        names = ("queued", "leased", "done", "failed")
+        with self.lock:
+            return {
+                n: sum(r[0] == i for r in self.urls.values())
+                for i, n in enumerate(names)
+            }
+
+    def reset(self):
+        with self.lock:
+            self.urls.clear()
+
+
+def _cfg(tmp_path, worker, **opts):
+    sched = {"backend": "distributed", "path": str(tmp_path / "frontier.db")}
+    sched.update(worker_id=worker, shards=8, lease_batch=5, poll_interval_s=0.01)
+    sched.update(opts)
+    return {"request": {"rate_limit": {"domain_qps": 0}}, "scheduler": sched}
+
+
+def test_lapsed_leases_go_to_surviving_workers(tmp_path):
+    store = SqliteFrontierStore(str(tmp_path / "f.db"), shards=4)
+    store.add([f"http://h{i}/" for i in range(20)])
+    store.heartbeat("a", 0.2)
+    assert store.claim("a", 0.2) == {0, 1, 2, 3}
+    leased = store.lease("a", {0, 1, 2, 3}, 20, 0.2)
+    assert len(leased) == 20
+    store.heartbeat("b", 5)
+    assert store.claim("b", 5) == set()  # nothing free until "a" rebalances
+    assert store.claim("a", 0.2) == {0, 1}
+    assert store.claim("b", 5) == {2, 3}
+    assert store.lease("b", {2, 3}, 20, 5) == []  # still leased to "a"
+    time.sleep(0.3)  # "a" stops heartbeating
+    assert store.claim("b", 5) == {0, 1, 2, 3}
+    again = store.lease("b", {0, 1, 2, 3}, 20, 5)
+    assert sorted(again) == sorted(leased)
+    store.complete("a", [u for u, _ in leased])  # too late: no longer a's lease
+    assert store.stats()["leased"] == 20
+    store.complete("b", [u for u, _ in again])
+    assert store.unfinished() == 0
+    store.close()
+
+
+def test_workers_fetch_every_url_exactly_once(tmp_path):
+    urls = [f"http://h{i % 10}/{i}" for i in range(200)]
+    fetched = []
+    lock = threading.Lock()
+
+    def work(name):
+        sched = DistributedScheduler(_cfg(tmp_path, name))
+        sched.seed([{"url": u} for u in urls[:20]])
+        while sched.has_next():
+            req = sched.next()
+            with lock:
+                fetched.append((name, req.url))
+            time.sleep(0.002)  # "fetch", so the other workers get to join
+            i = int(req.url.rsplit("/", 1)[1])
+            sched.enqueue(urls[i + 20 : i + 21])
+            sched.done(req)
+        sched.close()
+
+    threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=30)
+    counts = Counter(url for _, url in fetched)
+    assert sorted(counts) == sorted(urls) and set(counts.values()) == {1}
+    assert len({n for n, _ in fetched}) > 1
+
+
+def test_defer_requeues_then_fails(tmp_path):
+    cfg = _cfg(tmp_path, "w")
+    cfg["request"]["retry"] = {"max_attempts": 2}
+    sched = DistributedScheduler(cfg)
+    sched.seed([{"url": "http://a/x"}])
+    req = sched.next() if sched.has_next() else None
+    sched.defer(req, Exception("boom"))
+    sched.done(req)
+    assert sched.has_next()
+    again = sched.next()
+    assert again.attempts == 1
+    sched.defer(again, Exception("boom"))
+    sched.done(again)
+    assert not sched.has_next()
+    assert sched.store.stats()["failed"] == 1
+    sched.close()
+
+
+def test_engines_crawl_one_site_together(tmp_path):
+    spec = SiteSpec(pages=40, fanout=3, items_per_page=2, latency_ms=2)
+    results = {}
+    with SiteSimulator(spec) as sim:
+
+        def work(name):
+            cfg = sim.crawl_config(
+                str(tmp_path / name),
+                scheduler=_cfg(tmp_path, name)["scheduler"],
+            )
+            results[name] = engine.run_config(Config(cfg))
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in ("a", "b")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=60)
+        served = sim.stats()["requests"]
+    assert sum(t.success for t in results.values()) == 40
+    assert sum(t.emitted for t in results.values()) == 80
+    assert served == 40
+    assert all(t.errors == 0 for t in results.values())
+
+
+def test_rebalance_hands_back_queued_urls(tmp_path):
+    a = DistributedScheduler(_cfg(tmp_path, "a", lease_batch=100))
+    a.seed([{"url": f"http://h{i}/"} for i in range(16)])
+    assert a.has_next() and len(a) == 16 and len(a.shards) == 8
+    b = DistributedScheduler(_cfg(tmp_path, "b", lease_batch=100))
+    assert b.shards == set()
+    a._rebalance()
+    assert len(a.shards) == 4
+    b._rebalance()
+    assert b.shards.isdisjoint(a.shards) and len(b.shards) == 4
+    urls = [b.next().url for _ in range(len(b))] if b.has_next() else []
+    assert sorted(urls + [r.url for r in a.queue]) == sorted(
+        f"http://h{i}/" for i in range(16)
+    )
+    a.close()
+    b.close()
+
+
+def test_plugged_in_store_is_built_from_config(tmp_path):
+    spec = SiteSpec(pages=30, fanout=3, items_per_page=1, latency_ms=1)
+    sched = {"store": f"{__name__}:MemoryFrontierStore", "shards": 4}
+    store = build_store(sched, "plugged")
+    assert isinstance(store, MemoryFrontierStore)
+    results = {}
+    with SiteSimulator(spec) as sim:
+
+        def work(name):
+            cfg = sim.crawl_config(
+                str(tmp_path / name),
+                name="plugged",
+                scheduler=_cfg(tmp_path, name, **sched)["scheduler"],
+            )
+            results[name] = engine.run_config(Config(cfg))
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in ("a", "b")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=60)
+        served = sim.stats()["requests"]
+    assert sum(t.success for t in results.values()) == 30 == served
+    assert store.stats()["done"] == 30 and store.unfinished() == 0
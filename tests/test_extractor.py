@@ -1,3 +1,5 @@
+import pytest
+
 from crawler_core.extractor import Extractor
 from crawler_core.types import Response
 from crawler_core.config import load_and_validate
@@ -39,3 +41,98 @@ def test_list_selector_extracts_multiple_items():
     assert len(items) == 2
     assert items[0]["title"] == "A"
     assert items[1]["title"] == "B"
+
+
+def test_compiled_plan_matches_config_parse():
+    cfg = load_and_validate("configs/douban_top250.yml")
+    html = open("offline/douban_top250_page1.html", encoding="utf-8").read()
+    resp = Response(url="file:///offline/douban_top250_page1.html", status=200, text=html)
+    plan = Extractor.compile(cfg)
+    assert plan.items[0].container == "ol.grid_view li"
+    assert plan.items[0].fields[2].candidates[0].rel_css == ".hd a span.title:first-child"
+    _, from_plan = Extractor.parse(resp, plan)
+    _, from_cfg = Extractor.parse(resp, cfg)
+    assert from_plan == from_cfg
+    assert len(from_plan) == 25
+    assert from_plan[0]["detail_url"] == "https://movie.douban.com/subject/1/"
+
+
+def test_lxml_parser_matches_bs4_on_douban_fixture():
+    cfg = load_and_validate("configs/douban_top250.yml")
+    html = open("offline/douban_top250_page1.html", encoding="utf-8").read()
+    resp = Response(url="file:///offline/douban_top250_page1.html", status=200, text=html)
+    _, with_bs4 = Extractor.parse(resp, cfg)
+    cfg["parser"] = "lxml"
+    _, with_lxml = Extractor.parse(resp, cfg)
+    assert with_lxml == with_bs4
+
+
+def test_xpath_candidates_select_lxml():
+    html = "<ul><li><a href='/1'> A </a></li><li><a href='/2'>B</a></li></ul>"
+    cfg = {
+        "items": {
+            "Demo": {
+                "list_selector": "li",
+                "fields": {
+                    "title": {"candidates": [{"xpath": ".//a/text()"}]},
+                    "href": {"candidates": [{"xpath": ".//a/@href"}]},
+                },
+            }
+        }
+    }
+    plan = Extractor.compile(cfg)
+    assert plan.parser == "lxml"
+    _, items = Extractor.parse(Response(url="http://x", status=200, text=html), plan)
+    assert [(i["title"], i["href"]) for i in items] == [("A", "/1"), ("B", "/2")]
+    cfg["parser"] = "bs4"
+    with pytest.raises(ValueError, match="Demo.title: xpath candidates need parser"):
+        Extractor.compile(cfg)
+
+
+def test_lxml_parses_raw_bytes_in_the_sniffed_charset():
+    html = '<html><head><meta charset="gbk"></head><body><h1>肖申克</h1></body></html>'
+    resp = Response(url="http://x", status=200, content=html.encode("gbk"))
+    cfg = {
+        "parser": "lxml",
+        "items": {"Demo": {"fields": {"t": {"candidates": [{"css": "h1::text"}]}}}},
+    }
+    _, items = Extractor.parse(resp, cfg)
+    assert items == [{"__type__": "Demo", "t": "肖申克"}]
+    assert resp._text is None  # the body was never kept as decoded str
+
+
+LINKS_HTML = """
+<html><body>
+<a href="/subject/1/">one</a>
+<a href="https://movie.douban.com/subject/2/#reviews">two</a>
+<a href="/subject/1/">one again</a>
+<a href="/accounts/login?next=/subject/3/">login</a>
+<a href="https://other.example/subject/4/">elsewhere</a>
+<a href="mailto:x@y.z">mail</a>
+<div class="paginator"><a class="next" href="?start=25">next</a></div>
+</body></html>
+"""
+
+
+def test_links_follow_rules_pagination_and_domains():
+    cfg = {
+        "base_url": "https://movie.douban.com",
+        "allowed_domains": ["movie.douban.com"],
+        "pagination": {"type": "next_link", "selector": "div.paginator a.next"},
+        "follow_rules": {"allow": ["^/subject/\\d+/?$"], "deny": ["accounts/login"]},
+        "items": {},
+    }
+    resp = Response(url="https://movie.douban.com/top250", status=200, text=LINKS_HTML)
+    for parser in ("bs4", "lxml"):
+        links, _ = Extractor.parse(resp, dict(cfg, parser=parser))
+        assert links == [
+            "https://movie.douban.com/top250?start=25",
+            "https://movie.douban.com/subject/1/",
+            "https://movie.douban.com/subject/2/",
+        ]
+
+
+def test_no_link_rules_means_no_links():
+    resp = Response(url="https://movie.douban.com/top250", status=200, text=LINKS_HTML)
+    links, _ = Extractor.parse(resp, {"items": {}})
+    assert links == []
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from crawler_core.fetcher import AsyncFetcher, Fetcher
+from crawler_core.types import Response
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    accept_encoding = []
+
+    def do_GET(self):
+        self.accept_encoding.append(self.headers.get("Accept-Encoding"))
+        if self.path == "/big":
+            # no Content-Length: the cap has to trip while streaming
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for _ in range(4):
+                self.wfile.write(b"400\r\n" + b"x" * 1024 + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png" if self.path == "/img" else "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def test_fetcher_reuses_pooled_connections():
+    server, base = _serve()
+    fetch = Fetcher({"request": {"pool": {"max_keepalive_connections": 4}}})
+    try:
+        for i in range(3):
+            assert fetch.get(f"{base}/{i}")["status"] == 200
+    finally:
+        fetch.close()
+        server.shutdown()
+    assert fetch.stats.requests == 3
+    assert fetch.stats.new_connections == 1
+    assert fetch.stats.reused == 2
+    assert "gzip" in _KeepAliveHandler.accept_encoding[0]
+
+
+def test_fetchers_do_not_share_a_client():
+    a, b = Fetcher({}), Fetcher({})
+    assert a.client is not b.client
+    a.close()
+    assert not b.client.is_closed
+    b.close()
+
+
+def test_async_fetcher_with_http2_pool_config():
+    server, base = _serve()
+
+    async def go():
+        fetch = AsyncFetcher({"request": {"pool": {"http2": True}}})
+        try:
+            return await fetch.get(f"{base}/"), fetch.stats
+        finally:
+            await fetch.aclose()
+
+    try:
+        resp, stats = asyncio.run(go())
+    finally:
+        server.shutdown()
+    assert resp["status"] == 200
+    assert stats.requests == 1 and stats.new_connections == 1
+
+
+def test_fetcher_skips_oversized_and_unwanted_bodies():
+    server, base = _serve()
+    cfg = {"request": {"max_body_bytes": 2048, "allowed_content_types": ["text/html"]}}
+    fetch = Fetcher(cfg)
+    try:
+        big, img, ok = (fetch.get(f"{base}/{p}") for p in ("big", "img", "page"))
+    finally:
+        fetch.close()
+        server.shutdown()
+    assert big["skipped"] == "body too large" and big["content"] == b""
+    assert img["skipped"] == "content-type image/png"
+    assert "skipped" not in ok and ok["content"] == b"ok" and "text" not in ok
+
+
+def test_response_decodes_lazily_with_sniffed_charset():
+    body = '<html><head><meta charset="gbk"></head><body>肖申克</body></html>'.encode("gbk")
+    resp = Response(url="http://x", status=200, content=body)
+    assert resp._text is None
+    assert resp.encoding == "gbk" and "肖申克" in resp.text
+    header = Response(
+        url="http://x",
+        status=200,
+        content=body,
+        headers={"Content-Type": "text/html; charset=GB18030"},
+    )
+    assert header.encoding == "GB18030" and "肖申克" in header.text
+    assert Response(url="http://x", status=200, text="hi").content == b"hi"
@@ -0,0 +1,69 @@
+import json
+
+from crawler_core import engine
+from crawler_core.hooks import HookChain, Hooks, ProfilingHook
+
+
+class Recorder(Hooks):
+    calls = []
+
+    def __init__(self, tag="r"):
+        self.tag = tag
+
+    def pre_request(self, request, context):
+        self.calls.append(("pre_request", request.url))
+
+    def pre_store(self, item, context):
+        item["tag"] = self.tag
+
+    def post_request(self, request, context):
+        self.calls.append(("post_request", request.url))
+
+
+def test_chain_only_lists_overridden_points():
+    chain = HookChain([Recorder(), Hooks()])
+    assert len(chain.pre_request) == 1 and len(chain.pre_store) == 1
+    assert chain.post_response == () and chain.on_error == ()
+    assert not HookChain() and HookChain().pre_store == ()
+
+
+def test_engine_dispatches_config_hooks(tmp_path, douban_page, write_cfg):
+    Recorder.calls = []
+    url = douban_page.as_uri()
+    profiles = tmp_path / "profiles"
+    cfg = write_cfg(
+        tmp_path,
+        [{"url": url}],
+        concurrency=1,
+        hooks=[
+            {"class": "test_hooks:Recorder", "options": {"tag": "x"}},
+            {
+                "class": "crawler_core.hooks:ProfilingHook",
+                "options": {"every_n": 1, "out_dir": str(profiles)},
+            },
+        ],
+    )
+    engine.run(cfg)
+    assert Recorder.calls == [("pre_request", url), ("post_request", url)]
+    rows = (tmp_path / "out.csv").read_text(encoding="utf-8").splitlines()
+    assert rows[0].endswith(",tag") and rows[1].endswith(",x")
+    span = json.loads((profiles / "spans.jsonl").read_text())
+    assert span["url"] == url and span["total_s"] >= span["fetch_s"]
+    assert (profiles / "000001.prof").exists()
+
+
+def test_profiling_hook_tracemalloc_sample(tmp_path):
+    hook = ProfilingHook(every_n=2, mode="tracemalloc", out_dir=str(tmp_path))
+
+    class Req:
+        url = "http://x/"
+
+    for _ in range(2):
+        ctx = {}
+        hook.pre_request(Req, ctx)
+        hook.post_response(None, ctx)
+        hook.post_request(Req, ctx)
+    hook.close()
+    assert (tmp_path / "000002.tracemalloc.txt").exists()
+    assert not (tmp_path / "000001.tracemalloc.txt").exists()
+    assert len((tmp_path / "spans.jsonl").read_text().splitlines()) == 2
@@ -0,0 +1,142 @@
+import csv
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from crawler_core import engine
+from crawler_core.fetcher import Fetcher
+from crawler_core.http_cache import HttpCache, canonical_url
+from crawler_core.pipelines.csv_sink import CSVSink
+
+PAGES = {
+    "/": b'<html><body><h1>home</h1><a href="/next">next</a></body></html>',
+    "/next": b"<html><body><h1>next</h1></body></html>",
+}
+
+
+class _ETagHandler(BaseHTTPRequestHandler):
+    seen = []
+
+    def do_GET(self):
+        etag = f'"{self.path}"'
+        self.seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        body = PAGES[self.path]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    _ETagHandler.seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ETagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def test_canonical_url():
+    assert (
+        canonical_url("HTTP://Example.COM:80/a?b=2&a=1#frag")
+        == "http://example.com/a?a=1&b=2"
+    )
+
+
+def test_fetcher_revalidates_and_serves_304_from_cache(tmp_path):
+    server, base = _serve()
+    cache = HttpCache(str(tmp_path / "cache.db"))
+    try:
+        fetch = Fetcher({}, cache=cache)
+        first = fetch.get(f"{base}/")
+        second = fetch.get(f"{base}/")
+    finally:
+        server.shutdown()
+        cache.close()
+    assert not first.get("not_modified")
+    assert second["not_modified"] and second["status"] == 200
+    assert second["content"] == first["content"] == PAGES["/"]
+    assert _ETagHandler.seen == [("/", None), ("/", '"/"')]
+
+
+def test_cache_evicts_least_recently_used_over_max_bytes(tmp_path):
+    cache = HttpCache(str(tmp_path / "cache.db"), max_bytes=10)
+    for name in ("a", "b", "c"):
+        cache.store(f"http://h/{name}", 200, {"ETag": name}, b"12345")
+    assert cache.conditional_headers("http://h/a") == {}
+    assert cache.conditional_headers("http://h/c") == {"If-None-Match": "c"}
+    assert cache.size == 10
+    cache.close()
+
+
+def test_recrawl_skips_items_of_unchanged_pages_but_follows_links(tmp_path, write_cfg):
+    server, base = _serve()
+    items = {
+        "Page": {
+            "fields": {"h": {"candidates": [{"css": "h1::text"}]}},
+            "dedupe_keys": ["h"],
+        }
+    }
+    try:
+        cfg = write_cfg(
+            tmp_path,
+            [{"url": f"{base}/"}],
+            concurrency=1,
+            items=items,
+            base_url=base,
+            follow_rules={"allow": ["/next"]},
+            http_cache={"path": str(tmp_path / "cache.db")},
+        )
+        engine.run(cfg)
+        engine.run(cfg)
+    finally:
+        server.shutdown()
+    rows = list(csv.DictReader(open(tmp_path / "out.csv", encoding="utf-8")))
+    assert [r["h"] for r in rows] == ["home", "next"]
+    assert _ETagHandler.seen[2:] == [("/", '"/"'), ("/next", '"/next"')]
+
+
+def test_pages_whose_items_were_lost_are_not_revalidated(
+    tmp_path, monkeypatch, write_cfg
+):
+    server, base = _serve()
+    items = {
+        "Page": {
+            "fields": {"h": {"candidates": [{"css": "h1::text"}]}},
+            "dedupe_keys": ["h"],
+        }
+    }
+
+    def broken(self):
+        raise OSError("disk full")
+
+    try:
+        cfg = write_cfg(
+            tmp_path,
+            [{"url": f"{base}/"}],
+            concurrency=1,
+            items=items,
+            base_url=base,
+            follow_rules={"allow": ["/next"]},
+            http_cache={"path": str(tmp_path / "cache.db")},
+            dedupe={"path": str(tmp_path / "dedupe.db")},
+        )
+        with monkeypatch.context() as m:
+            m.setattr(CSVSink, "flush", broken)
+            assert engine.run(cfg).sink_errors() == {"CSVSink": 1}
+        again = engine.run(cfg)
+        last = engine.run(cfg)
+    finally:
+        server.shutdown()
+    # the cache was rolled back with the dedupe index: full pages again
+    assert again.emitted == 2 and again.not_modified == 0
+    assert last.emitted == 0 and last.not_modified == 2
+    rows = list(csv.DictReader(open(tmp_path / "out.csv", encoding="utf-8")))
+    assert [r["h"] for r in rows] == ["home", "next"]
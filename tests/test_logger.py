@@ -0,0 +1,42 @@
+import io
+import json
+
+from crawler_core import logger
+
+
+def _lines(buf):
+    return [json.loads(line) for line in buf.getvalue().splitlines()]
+
+
+def test_json_lines_with_per_tag_sampling():
+    buf = io.StringIO()
+    logger.configure({"sample": {"fetch": 3}}, stream=buf)
+    try:
+        for i in range(9):
+            logger.info("fetch", url=f"http://x/{i}", status=200)
+        logger.warn("fetch", url="http://x/slow")
+        logger.info("dedupe", item="Movie")
+        logger.shutdown()
+    finally:
+        logger.configure()
+    events = _lines(buf)
+    fetch_ok = [e for e in events if e["event"] == "fetch" and e["level"] == "info"]
+    assert [e["url"] for e in fetch_ok] == ["http://x/0", "http://x/3", "http://x/6"]
+    assert {"event": "fetch", "level": "warning", "url": "http://x/slow"}.items() <= (
+        events[-2].items()
+    )
+    assert events[-1]["event"] == "dedupe" and "timestamp" in events[-1]
+
+
+def test_level_filters_before_queueing():
+    buf = io.StringIO()
+    logger.configure({"level": "error"}, stream=buf)
+    try:
+        logger.info("fetch", url="http://x")
+        logger.warn("fetch", url="http://x")
+        assert logger._writer is None  # nothing was queued, no thread started
+        logger.error("fetch", url="http://x", err="boom")
+        logger.shutdown()
+    finally:
+        logger.configure()
+    assert [e["level"] for e in _lines(buf)] == ["error"]
@@ -0,0 +1,60 @@
+from crawler_core.membership import (
+    FingerprintSet,
+    ScalableBloomFilter,
+    membership_stats,
+)
+from crawler_core.scheduler import Scheduler
+
+
+def test_fingerprint_set_add_discard_and_growth():
+    fs = FingerprintSet(capacity=1000)
+    urls = [f"http://a/{i}" for i in range(5000)]
+    for u in urls:
+        fs.add(u)
+    fs.add(urls[0])
+    assert len(fs) == 5000
+    assert all(u in fs for u in urls)
+    for u in urls[:2500]:
+        fs.discard(u)
+    assert len(fs) == 2500
+    assert urls[0] not in fs and urls[-1] in fs
+
+
+def test_fingerprint_width_follows_error_rate():
+    assert FingerprintSet(error_rate=1e-3, capacity=100_000).bits == 32
+    assert FingerprintSet(error_rate=1e-9, capacity=100_000).bits == 64
+
+
+def test_compact_sets_use_far_less_memory_than_str_set():
+    urls = [f"https://movie.douban.com/subject/{i}/" for i in range(20_000)]
+    fs = FingerprintSet(error_rate=1e-3, capacity=20_000)
+    bloom = ScalableBloomFilter(error_rate=1e-3, capacity=20_000)
+    for u in urls:
+        fs.add(u)
+        bloom.add(u)
+    assert membership_stats(set(urls)) is None  # O(n): only on request
+    plain = membership_stats(set(urls), plain=True)[0]
+    assert membership_stats(fs)[0] * 8 < plain
+    assert membership_stats(bloom)[0] * 10 < plain
+
+
+def test_bloom_false_positive_rate_within_bound():
+    bloom = ScalableBloomFilter(error_rate=0.01, capacity=2000)
+    for i in range(10_000):
+        bloom.add(f"http://a/{i}")
+    assert len(bloom.slices) > 1
+    assert all(f"http://a/{i}" in bloom for i in range(10_000))
+    hits = sum(f"http://b/{i}" in bloom for i in range(10_000))
+    assert hits / 10_000 < 0.02
+    assert bloom.false_positive_rate() < 0.01
+
+
+def test_scheduler_with_compact_membership():
+    sched = Scheduler({"scheduler": {"membership": "bloom"}})
+    assert isinstance(sched.visited, ScalableBloomFilter)
+    assert isinstance(sched.pending, FingerprintSet)
+    sched.enqueue(["http://a/1", "http://a/1", "http://a/2"])
+    assert len(sched) == 2
+    sched.next()
+    sched.enqueue(["http://a/1"])
+    assert len(sched) == 1
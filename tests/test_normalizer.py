@@ -20,3 +20,29 @@ def test_sanitize_html():
     html = Normalizer.apply("<article><script>x</script><p>hi</p></article>", "sanitize_html")
     assert "script" not in html
 
+
+
+ITEMS_CFG = {
+    "Movie": {"fields": {"rating": {"normalize": ["to_float"]}}},
+    "Review": {"fields": {"rating": {"normalize": ["regex_extract:(\\d)", "to_int"]}}},
+}
+
+
+def test_run_applies_only_own_type_ops():
+    movie = Normalizer.run({"__type__": "Movie", "rating": "9.5"}, ITEMS_CFG)
+    review = Normalizer.run({"__type__": "Review", "rating": "4 stars"}, ITEMS_CFG)
+    assert movie["rating"] == 9.5
+    assert review["rating"] == 4
+
+
+def test_run_batch_with_compiled_plan():
+    plan = Normalizer.compile(ITEMS_CFG)
+    items = [{"__type__": "Movie", "rating": f"{i}.5"} for i in range(3)]
+    items.append({"__type__": "Movie", "rating": None})
+    out = Normalizer.run_batch(items, plan)
+    assert [it["rating"] for it in out] == [0.5, 1.5, 2.5, None]
+
+
+def test_split_and_join_ops():
+    assert Normalizer.apply("a/b/c", "split:/->1") == "b"
+    assert Normalizer.apply(["x", "y"], "join:\\n") == "x\ny"
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from crawler_core.config import Config
+from crawler_core.orchestrator import Orchestrator, apply_limits, plan_jobs, summary
+
+
+@pytest.fixture
+def site(tmp_path, douban_page, write_cfg):
+    """``site(name, n_entrypoints=1)``: config path of a one-page site in its own dir."""
+
+    def make(name, n_entrypoints=1):
+        site_dir = tmp_path / name
+        site_dir.mkdir()
+        eps = [{"url": douban_page.as_uri() + f"?{i}"} for i in range(n_entrypoints)]
+        return write_cfg(site_dir, eps, concurrency=1, name=name)
+
+    return make
+
+
+def test_sites_run_in_parallel_processes(tmp_path, site):
+    paths = [site("a"), site("b", 2), site("c")]
+    history = tmp_path / "history.json"
+    results = Orchestrator(paths, workers=2, history=str(history)).run()
+    by_name = {r.name: r for r in results}
+    assert sorted(by_name) == ["a", "b", "c"]
+    assert all(r.error is None for r in results)
+    assert by_name["b"].counters["success"] == 2
+    # items are deduped per site, so every site emits the full page
+    assert all(r.counters["emitted"] == 25 for r in results)
+    line = summary(results, 1.0)
+    assert "sites=3 failed=0" in line and "success=4" in line and "emitted=75" in line
+    assert set(json.loads(history.read_text())) == {"a", "b", "c"}
+
+
+def test_broken_site_is_reported_not_fatal(tmp_path, site, douban_page, write_cfg):
+    good = site("good")
+    bad = write_cfg(
+        tmp_path, [{"url": douban_page.as_uri()}], 1, name="bad", parser="nope"
+    )
+    results = Orchestrator([good, bad], workers=2).run()
+    errors = {r.name: r.error for r in results}
+    assert errors["good"] is None and errors["bad"]
+
+
+def test_unparsable_config_is_reported_not_fatal(tmp_path, site):
+    good = site("good")
+    bad = tmp_path / "bad.yml"
+    bad.write_text("name: [unclosed\n")
+    results = Orchestrator([good, str(bad)], workers=2).run()
+    errors = {r.name: r.error for r in results}
+    assert errors["good"] is None and errors["bad"]
+    assert summary(results, 1.0).startswith("schedule: sites=2 failed=1")
+
+
+def test_longest_known_sites_start_first(site):
+    paths = [site(n, k) for n, k in (("a", 1), ("b", 5), ("c", 1), ("d", 3))]
+    jobs = plan_jobs(paths, {"a": 30.0, "c": 90.0})
+    assert [j.name for j in jobs] == ["b", "d", "c", "a"]
+
+
+def test_limits_split_the_global_budget():
+    cfg = Config(
+        {
+            "request": {
+                "rate_limit": {"concurrency": 32},
+                "pool": {"max_connections": 64},
+            },
+            "parse": {"workers": 8},
+        }
+    )
+    out = apply_limits(cfg, max_connections=10, cpus=3)
+    assert out["request"]["pool"] == {
+        "max_connections": 10,
+        "max_keepalive_connections": 10,
+    }
+    assert out["request"]["rate_limit"]["concurrency"] == 10
+    assert out["parse"]["workers"] == 2
+    assert cfg["parse"]["workers"] == 8  # the loaded config is left alone
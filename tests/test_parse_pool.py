@@ -0,0 +1,58 @@
+import csv
+import pathlib
+
+from crawler_core import engine
+from crawler_core.config import load_and_validate
+from crawler_core.extractor import Extractor
+from crawler_core.normalizer import Normalizer
+from crawler_core.parse_pool import ParsePool
+from crawler_core.types import Response
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+def test_parse_pool_matches_inline_and_keeps_order(douban_page):
+    cfg = load_and_validate(str(ROOT / "configs" / "douban_top250.yml"))
+    cfg["parser"] = "lxml"  # plan must survive pickling into the workers
+    plan = Extractor.compile(cfg)
+    text = douban_page.read_text("utf-8")
+    pages = [
+        Response(url=f"{douban_page.as_uri()}?p={i}", status=200, text=text)
+        for i in range(6)
+    ]
+    norm = Normalizer.compile(cfg["items"])
+    pool = ParsePool(plan, norm, workers=2, max_inflight=2, ordered=True)
+    try:
+        done = []
+        for i, resp in enumerate(pages):
+            done.extend(pool.submit(i, resp))
+            assert pool.pending <= 2
+        done.extend(pool.drain())
+    finally:
+        pool.close()
+    assert [token for token, _ in done] == list(range(6))
+    _, inline = Extractor.parse(pages[0], plan)
+    inline = Normalizer.run_batch(inline, norm)
+    assert done[0][1][1] == inline
+    assert inline[0]["rating"] == 9.1
+
+
+def test_engine_with_parse_workers(tmp_path, douban_page, write_cfg):
+    eps = [{"url": f"{douban_page.as_uri()}?p={i}"} for i in range(3)]
+    items = {
+        "Movie": {
+            "list_selector": "ol.grid_view li",
+            "fields": {
+                "url": {"from": "meta.url"},
+                "detail_url": {"candidates": [{"css": ".hd a::attr(href)"}]},
+            },
+            "dedupe_keys": ["url", "detail_url"],
+        }
+    }
+    for concurrency in (1, 3):
+        out = tmp_path / f"c{concurrency}"
+        out.mkdir()
+        cfg = write_cfg(out, eps, concurrency, items=items, parse={"workers": 2})
+        engine.run(cfg)
+        rows = list(csv.DictReader(open(out / "out.csv", encoding="utf-8")))
+        assert len(rows) == 75
@@ -1,6 +1,10 @@
 import csv
+import gzip
+import json
 import sqlite3
 
+import pytest
+
 from crawler_core.pipelines.csv_sink import CSVSink
 from crawler_core.pipelines.pg_sink import PgSink
 
@@ -10,19 +14,89 @@ def test_csv_sink(tmp_path):
     sink = CSVSink({"path": str(path)})
     sink.emit({"a": 1, "b": "x"})
     sink.emit({"a": 2, "b": "y"})
+    sink.close()
     rows = list(csv.DictReader(open(path)))
     assert rows[0]["a"] == "1"
     assert rows[1]["b"] == "y"
 
 
+def test_csv_sink_buffers_until_flush_rows(tmp_path):
+    path = tmp_path / "out.csv"
+    sink = CSVSink({"path": str(path), "flush_rows": 3})
+    sink.emit_batch([{"a": 1}, {"a": 2}])
+    assert not path.exists()
+    sink.emit({"a": 3})
+    assert [r["a"] for r in csv.DictReader(open(path))] == ["1", "2", "3"]
+    sink.emit({"a": 4})
+    sink.close()
+    assert len(list(csv.DictReader(open(path)))) == 4
+
+
+def test_csv_sink_rotates_gzip_segments(tmp_path):
+    path = tmp_path / "out.csv"
+    sink = CSVSink(
+        {"path": str(path), "flush_rows": 2, "rotate_bytes": 1, "compression": "gzip"}
+    )
+    sink.emit_batch([{"a": i, "b": "x"} for i in range(5)])
+    sink.close()
+    segments = sorted(p.name for p in tmp_path.iterdir())
+    assert segments == ["out.00001.csv.gz", "out.00002.csv.gz", "out.00003.csv.gz"]
+    rows = []
+    for name in segments:
+        with gzip.open(tmp_path / name, "rt", newline="") as f:
+            rows.extend(csv.DictReader(f))
+    assert [r["a"] for r in rows] == ["0", "1", "2", "3", "4"]
+
+
 def test_pg_sink_upsert(tmp_path):
     db = tmp_path / "t.db"
     sink = PgSink({"dsn": f"sqlite:///{db}", "table": "t", "upsert_keys": ["id"]})
     sink.emit({"id": 1, "v": "a"})
     sink.emit({"id": 1, "v": "b"})
+    sink.close()
     conn = sqlite3.connect(db)
     cur = conn.execute("select count(*) from t")
     assert cur.fetchone()[0] == 1
     cur = conn.execute("select v from t where id=1")
     assert cur.fetchone()[0] == "b"
 
+
+
+def test_pg_sink_batches_until_batch_size(tmp_path):
+    db = tmp_path / "t.db"
+    sink = PgSink(
+        {"dsn": f"sqlite:///{db}", "table": "t", "upsert_keys": ["id"], "batch_size": 3}
+    )
+    sink.emit_batch([{"id": i, "v": str(i)} for i in range(4)])
+    conn = sqlite3.connect(db)
+    assert conn.execute("select count(*) from t").fetchone()[0] == 3
+    sink.close()
+    assert conn.execute("select count(*) from t").fetchone()[0] == 4
+    assert conn.execute("pragma journal_mode").fetchone()[0] == "wal"
+
+
+def test_pg_sink_sets_a_rejected_batch_aside(tmp_path):
+    db, rejects = tmp_path / "t.db", tmp_path / "rejects.jsonl"
+    sink = PgSink(
+        {
+            "dsn": f"sqlite:///{db}",
+            "table": "t",
+            "batch_size": 2,
+            "reject_path": str(rejects),
+        }
+    )
+    sink.emit({"id": 0, "v": "a"})
+    sink.conn.execute(
+        "CREATE TRIGGER no_b BEFORE INSERT ON t WHEN NEW.v = 'b' "
+        "BEGIN SELECT RAISE(ABORT, 'bad row'); END"
+    )
+    with pytest.raises(sqlite3.Error):
+        sink.emit_batch([{"id": 1, "v": "b"}])
+    assert [json.loads(line) for line in rejects.read_text().splitlines()] == [
+        {"id": 0, "v": "a"},
+        {"id": 1, "v": "b"},
+    ]
+    sink.emit_batch([{"id": 2, "v": "c"}, {"id": 3, "v": "d"}])
+    sink.close()
+    conn = sqlite3.connect(db)
+    assert [r[0] for r in conn.execute("select id from t")] == ["2", "3"]
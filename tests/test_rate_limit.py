@@ -0,0 +1,45 @@
+import asyncio
+import threading
+import time
+
+from crawler_core.anti.rate_limit import RateLimiter
+
+
+def test_burst_then_spaced_by_qps():
+    limiter = RateLimiter(qps=20, burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.acquire("a")
+    # two tokens are free, the next two wait 50ms each
+    assert 0.08 <= time.monotonic() - start < 0.3
+
+
+def test_hosts_are_independent():
+    limiter = RateLimiter(qps=1, burst=1)
+    limiter.acquire("slow")
+    assert limiter.delay("slow") > 0.5
+    start = time.monotonic()
+    limiter.acquire("fast")
+    assert time.monotonic() - start < 0.05
+
+
+def test_shared_across_threads_and_tasks():
+    limiter = RateLimiter(qps=50, burst=1)
+    start = time.monotonic()
+    threads = [threading.Thread(target=limiter.acquire, args=("h",)) for _ in range(5)]
+    for t in threads:
+        t.start()
+
+    async def tasks():
+        await asyncio.gather(*(limiter.acquire_async("h") for _ in range(5)))
+
+    asyncio.run(tasks())
+    for t in threads:
+        t.join()
+    # ten reservations at 50 qps with a single token of burst
+    assert time.monotonic() - start >= 0.17
+
+
+def test_from_config_uses_domain_qps_and_burst():
+    limiter = RateLimiter.from_config({"rate_limit": {"domain_qps": 0.5, "burst": 2}})
+    assert limiter.qps == 0.5 and limiter.burst == 2
@@ -1,4 +1,8 @@
-from crawler_core.scheduler import Scheduler
+import math
+import time
+
+from crawler_core.anti.adaptive import AdaptiveLimiter
+from crawler_core.scheduler import Scheduler, build_scheduler
 
 
 def test_scheduler_prevents_duplicate_enqueue():
@@ -10,3 +14,116 @@ def test_scheduler_prevents_duplicate_enqueue():
     assert first.url == "http://a"
     sched.enqueue(["http://a"])
     assert [r.url for r in sched.queue] == ["http://b"]
+
+
+def test_scheduler_round_robins_hosts():
+    sched = Scheduler({})
+    sched.enqueue([f"http://a/{i}" for i in range(3)] + ["http://b/0", "http://b/1"])
+    order = [sched.next().url for _ in range(5)]
+    assert order == ["http://a/0", "http://b/0", "http://a/1", "http://b/1", "http://a/2"]
+    assert not sched.has_next()
+
+
+def test_scheduler_reports_when_a_host_is_ready():
+    sched = Scheduler({"request": {"rate_limit": {"domain_qps": 10, "burst": 1}}})
+    sched.enqueue(["http://a/0", "http://a/1", "http://b/0"])
+    assert sched.ready_in() == 0
+    assert [sched.next().url for _ in range(2)] == ["http://a/0", "http://b/0"]
+    # only a is left, and it was hit just now
+    assert 0.05 < sched.ready_in() <= 0.1
+    time.sleep(sched.ready_in())
+    assert sched.ready_in() == 0 and sched.next().url == "http://a/1"
+
+
+def test_scheduler_parks_hosts_at_their_adaptive_limit():
+    sched = Scheduler({"request": {"rate_limit": {"domain_qps": 0}}})
+    sched.slots = AdaptiveLimiter(max_concurrency=1, initial_concurrency=1)
+    sched.enqueue(["http://a/0", "http://a/1", "http://b/0"])
+    first = sched.next()
+    assert first.url == "http://a/0"
+    assert sched.next().url == "http://b/0"  # a is still fetching
+    assert sched.ready_in() == math.inf
+    sched.fetched(first)
+    assert sched.ready_in() == 0 and sched.next().url == "http://a/1"
+
+
+def test_scheduler_defer_requeues_until_max_attempts():
+    sched = Scheduler({"request": {"retry": {"max_attempts": 2}}})
+    sched.seed([{"url": "http://a/x"}])
+    req = sched.next()
+    sched.defer(req, Exception("boom"))
+    assert sched.has_next() and "http://a/x" in sched.pending
+    again = sched.next()
+    assert again.attempts == 1
+    sched.defer(again, Exception("boom"))
+    assert not sched.has_next()
+
+
+def _sqlite_cfg(tmp_path, **opts):
+    return {"scheduler": {"backend": "sqlite", "path": str(tmp_path / "f.db"), **opts}}
+
+
+def test_sqlite_scheduler_spills_beyond_hot_window(tmp_path):
+    sched = build_scheduler(_sqlite_cfg(tmp_path, hot_window=4))
+    urls = [f"http://a/{i}" for i in range(10)]
+    sched.enqueue(urls)
+    assert len(sched.hosts["a"]) == 4 and len(sched) == 10
+    sched.enqueue(urls)
+    assert [sched.next().url for _ in range(10)] == urls
+    assert not sched.has_next()
+    sched.close()
+
+
+def test_sqlite_scheduler_resume_skips_visited(tmp_path):
+    cfg = _sqlite_cfg(tmp_path, hot_window=2)
+    eps = [{"url": f"http://a/{i}"} for i in range(5)]
+    sched = build_scheduler(cfg)
+    sched.seed(eps)
+    done = [sched.next() for _ in range(2)]
+    for req in done:
+        sched.done(req)
+    sched.checkpoint()
+    sched.conn.close()  # simulate a crash: no close() bookkeeping
+
+    resumed = build_scheduler(cfg, resume=True)
+    resumed.seed(eps)
+    rest = []
+    while resumed.has_next():
+        rest.append(resumed.next().url)
+    assert [r.url for r in done] == ["http://a/0", "http://a/1"]
+    assert rest == ["http://a/2", "http://a/3", "http://a/4"]
+    resumed.close()
+
+
+def test_sqlite_scheduler_resume_refetches_pages_in_flight(tmp_path):
+    cfg = _sqlite_cfg(tmp_path)
+    eps = [{"url": f"http://a/{i}"} for i in range(3)]
+    sched = build_scheduler(cfg)
+    flushed = []
+    sched.before_commit = lambda: flushed.append(True)
+    sched.seed(eps)
+    first, second = sched.next(), sched.next()
+    sched.done(first)
+    sched.checkpoint()  # "a/1" is still being fetched
+    assert flushed
+    sched.conn.close()
+
+    resumed = build_scheduler(cfg, resume=True)
+    resumed.seed(eps)
+    rest = []
+    while resumed.has_next():
+        req = resumed.next()
+        rest.append(req.url)
+        resumed.done(req)
+    assert second.url == "http://a/1"
+    assert rest == ["http://a/1", "http://a/2"]
+    assert "http://a/1" in resumed.visited and "http://a/1" not in resumed.pending
+    resumed.close()
+
+
+def test_scheduler_does_not_throttle_local_files():
+    sched = Scheduler({"request": {"rate_limit": {"domain_qps": 1, "burst": 1}}})
+    sched.enqueue([f"file:///tmp/{i}.html" for i in range(3)])
+    for _ in range(3):
+        assert sched.ready_in() == 0
+        sched.next()
@@ -0,0 +1,69 @@
+import threading
+import time
+
+from crawler_core.pipelines.base import Sink
+from crawler_core.pipelines.dispatcher import SinkDispatcher
+from crawler_core.telemetry import Telemetry
+
+
+class _Slow(Sink):
+    def __init__(self, gate: threading.Event) -> None:
+        self.gate = gate
+        self.rows = []
+        self.closed = False
+
+    def emit(self, item):
+        self.gate.wait()
+        self.rows.append(item)
+
+    def close(self):
+        self.closed = True
+
+
+def test_dispatcher_applies_backpressure_and_drains_on_close():
+    gate = threading.Event()
+    slow, fast = _Slow(gate), _Slow(threading.Event())
+    fast.gate.set()
+    disp = SinkDispatcher([slow, fast], maxsize=1)
+    disp.emit_batch([{"i": 0}])  # picked up by the writer, blocked on the gate
+    time.sleep(0.05)
+    disp.emit_batch([{"i": 1}])  # fills the queue
+
+    done = threading.Event()
+    threading.Thread(target=lambda: (disp.emit_batch([{"i": 2}]), done.set())).start()
+    assert not done.wait(0.1), "emit should block while the sink queue is full"
+    assert disp.lag()["_Slow"][0] == 3
+
+    gate.set()
+    assert done.wait(1)
+    disp.close()
+    assert [r["i"] for r in slow.rows] == [0, 1, 2]
+    assert [r["i"] for r in fast.rows] == [0, 1, 2]
+    assert slow.closed and fast.closed
+    pending, _, max_lag, errors = disp.lag()["_Slow"]
+    assert pending == 0 and max_lag > 0 and errors == 0
+    assert "_Slow2" in disp.lag()
+
+
+class _Broken(Sink):
+    def emit(self, item):
+        raise OSError("disk full")
+
+
+def test_sink_failures_are_counted_and_reported():
+    disp = SinkDispatcher([_Broken(), _Slow(threading.Event())])
+    disp.lanes[1].sink.gate.set()
+    disp.emit_batch([{"i": 0}])
+    disp.emit_batch([{"i": 1}])
+    assert disp.flush() is False
+    assert disp.flush() is True  # nothing failed since the last flush
+    disp.close()
+    lag = disp.lag()
+    assert lag["_Broken"][3] == 2 and lag["_Slow"][3] == 0
+
+    telem = Telemetry()
+    telem.record_sink_lag(lag)
+    assert telem.sink_errors() == {"_Broken": 2}
+    assert telem.counters()["sink_errors"] == 2
+    assert "_Broken_errors=2" in telem.summary()
+    assert "_Slow_errors" not in telem.summary()
@@ -0,0 +1,55 @@
+import json
+
+import httpx
+
+from crawler_core import engine
+from crawler_core.sitesim import SiteSimulator, SiteSpec
+
+
+def test_site_is_deterministic_and_revalidates():
+    spec = SiteSpec(pages=50, latency_ms=0, page_bytes=4096)
+    with SiteSimulator(spec) as a, SiteSimulator(spec) as b:
+        ra = httpx.get(f"{a.base_url}/page/7")
+        rb = httpx.get(f"{b.base_url}/page/7")
+        assert ra.status_code == 200 and ra.content == rb.content
+        assert len(ra.content) == 4096
+        assert ra.headers["etag"] == rb.headers["etag"]
+        again = httpx.get(
+            f"{a.base_url}/page/7", headers={"If-None-Match": ra.headers["etag"]}
+        )
+        assert again.status_code == 304
+        assert httpx.get(f"{a.base_url}/page/50").status_code == 404
+        assert a.stats()["statuses"] == {"200": 1, "304": 1, "404": 1}
+
+
+def test_failures_follow_the_configured_rates():
+    spec = SiteSpec(pages=10, latency_ms=0, throttle_rate=0.2, error_rate=0.1, seed=3)
+    with SiteSimulator(spec) as sim:
+        with httpx.Client() as client:
+            statuses = [
+                client.get(f"{sim.base_url}/page/1").status_code for _ in range(500)
+            ]
+            throttled = client.get(f"{sim.base_url}/page/1")
+            while throttled.status_code != 429:
+                throttled = client.get(f"{sim.base_url}/page/1")
+    assert 70 < statuses.count(429) < 130
+    assert 25 < statuses.count(500) + statuses.count(503) < 75
+    assert throttled.headers["retry-after"] == "1"
+
+
+def test_engine_crawls_the_whole_site(tmp_path):
+    spec = SiteSpec(pages=30, fanout=3, items_per_page=4, latency_ms=1)
+    with SiteSimulator(spec) as sim:
+        cfg = sim.crawl_config(
+            str(tmp_path),
+            request={"rate_limit": {"domain_qps": 0, "concurrency": 4}},
+        )
+        path = tmp_path / "cfg.json"
+        path.write_text(json.dumps(cfg))
+        telem = engine.run(str(path))
+        served = sim.stats()["requests"]
+    assert telem.success == 30 and telem.errors == 0
+    assert telem.emitted == 30 * 4
+    assert served == 30
+    rows = (tmp_path / "items.csv").read_text(encoding="utf-8").splitlines()
+    assert len(rows) == 1 + 30 * 4
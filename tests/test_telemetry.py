@@ -0,0 +1,35 @@
+import httpx
+
+from crawler_core.telemetry import Telemetry
+
+
+def test_metrics_endpoint_exposes_per_stage_series():
+    telem = Telemetry()
+    telem.observe_fetch("https://example.com/a", 200, 0.12, 2048)
+    telem.observe_fetch("https://example.com/b", None, 1.5, 0)
+    with telem.stage("parse"):
+        pass
+    telem.observe_sink("CSVSink", 0.003)
+    telem.track_queue(lambda: 7)
+    telem.fetch_started()
+    telem.mark_success()
+    port = telem.serve(0)
+    try:
+        body = httpx.get(f"http://127.0.0.1:{port}/metrics").text
+    finally:
+        telem.close()
+    assert 'crawler_fetch_seconds_count{host="example.com",status="200"} 1.0' in body
+    assert 'crawler_fetch_seconds_count{host="example.com",status="error"} 1.0' in body
+    assert 'crawler_fetch_bytes_total{host="example.com"} 2048.0' in body
+    assert 'crawler_stage_seconds_count{stage="parse"} 1.0' in body
+    assert 'crawler_sink_emit_seconds_count{sink="CSVSink"} 1.0' in body
+    assert "crawler_queue_depth 7.0" in body
+    assert "crawler_inflight_requests 1.0" in body
+    assert 'crawler_pages_total{outcome="success"} 1.0' in body
+
+
+def test_registries_are_per_instance():
+    a, b = Telemetry(), Telemetry()
+    a.mark_emit()
+    assert a.registry.get_sample_value("crawler_items_emitted_total") == 1
+    assert b.registry.get_sample_value("crawler_items_emitted_total") == 0